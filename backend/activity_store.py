@@ -0,0 +1,288 @@
+# health_wellness_agent2/activity_store.py
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from data_dir import data_path
+
+KINDS = ("workout", "meal", "measurement")
+DAY = 86400
+
+
+class Activity(NamedTuple):
+    """One logged workout, meal or measurement"""
+    uid: str
+    kind: str
+    name: str
+    value: Optional[float] = None
+    unit: Optional[str] = None
+    ts: Optional[float] = None
+
+
+class ProgressSummary(NamedTuple):
+    """Aggregates for one user as of `now`; every field is read from one row"""
+    total: int
+    totals: Dict[str, int]
+    this_week: Dict[str, int]
+    last_week: Dict[str, int]
+    streak: int
+    best_streak: int
+    active_days: int
+    last_ts: Optional[float]
+    weight: Optional[float]
+    weight_change_week: Optional[float]
+    weight_change_total: Optional[float]
+
+
+def day_of(ts: float) -> int:
+    """Days since the epoch (UTC)"""
+    return int(ts // DAY)
+
+
+def week_of(day: int) -> int:
+    """Monday-based weeks since the epoch (1970-01-01 was a Thursday)"""
+    return (day + 3) // 7
+
+
+class Aggregates:
+    """
+    Running per-user totals, folded one activity at a time in timestamp
+    order: totals per kind, a consecutive-active-days streak, counts for
+    the current and previous calendar week, and weights (first, at the
+    start of the current week, latest).
+    """
+
+    COLUMNS = (
+        "first_ts", "last_ts", "last_day", "streak", "best_streak", "active_days",
+        "total_workout", "total_meal", "total_measurement",
+        "week", "week_workout", "week_meal", "week_measurement",
+        "prev_workout", "prev_meal", "prev_measurement",
+        "first_weight", "week_start_weight", "last_weight"
+    )
+    __slots__ = COLUMNS
+
+    def __init__(self, row: Optional[tuple] = None):
+        if row is None:
+            row = (None, None, None, 0, 0, 0, 0, 0, 0, None, 0, 0, 0, 0, 0, 0, None, None, None)
+        for column, value in zip(self.COLUMNS, row):
+            setattr(self, column, value)
+
+    def row(self) -> tuple:
+        return tuple(getattr(self, column) for column in self.COLUMNS)
+
+    def fold(self, kind: str, name: str, value: Optional[float], ts: float) -> None:
+        day = day_of(ts)
+        if day != self.last_day:
+            self.streak = self.streak + 1 if self.last_day == day - 1 else 1
+            self.best_streak = max(self.best_streak, self.streak)
+            self.active_days += 1
+            self.last_day = day
+
+        week = week_of(day)
+        if week != self.week:
+            rolled = self.week is not None and week == self.week + 1
+            self.prev_workout = self.week_workout if rolled else 0
+            self.prev_meal = self.week_meal if rolled else 0
+            self.prev_measurement = self.week_measurement if rolled else 0
+            self.week_workout = self.week_meal = self.week_measurement = 0
+            self.week_start_weight = self.last_weight
+            self.week = week
+
+        setattr(self, f"total_{kind}", getattr(self, f"total_{kind}") + 1)
+        setattr(self, f"week_{kind}", getattr(self, f"week_{kind}") + 1)
+        if kind == "measurement" and name == "weight" and value is not None:
+            if self.first_weight is None:
+                self.first_weight = value
+            if self.week_start_weight is None:
+                self.week_start_weight = value
+            self.last_weight = value
+
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+
+    def summary(self, now: float) -> ProgressSummary:
+        today = day_of(now)
+        current = week_of(today)
+        counts = {kind: getattr(self, f"week_{kind}") for kind in KINDS}
+        previous = {kind: getattr(self, f"prev_{kind}") for kind in KINDS}
+        empty = dict.fromkeys(KINDS, 0)
+        if self.week == current:
+            this_week, last_week = counts, previous
+        elif self.week is not None and self.week == current - 1:
+            this_week, last_week = empty, counts
+        else:
+            this_week, last_week = empty, dict(empty)
+        totals = {kind: getattr(self, f"total_{kind}") for kind in KINDS}
+
+        weight_change_week = None
+        if self.last_weight is not None and self.week == current:
+            weight_change_week = round(self.last_weight - self.week_start_weight, 2)
+        weight_change_total = None
+        if self.last_weight is not None:
+            weight_change_total = round(self.last_weight - self.first_weight, 2)
+        return ProgressSummary(
+            total=sum(totals.values()),
+            totals=totals,
+            this_week=this_week,
+            last_week=last_week,
+            # a streak is still alive until a full day passes without activity
+            streak=self.streak if self.last_day is not None and self.last_day >= today - 1 else 0,
+            best_streak=self.best_streak,
+            active_days=self.active_days,
+            last_ts=self.last_ts,
+            weight=self.last_weight,
+            weight_change_week=weight_change_week,
+            weight_change_total=weight_change_total
+        )
+
+
+class ActivityStore:
+    """
+    Append-only SQLite log of activities per user, indexed on (uid, ts),
+    plus one aggregates row per user updated in the same transaction as
+    each append, so progress summaries are a primary-key lookup whatever
+    the history length. Appends older than the user's latest entry are
+    accepted; that user's aggregates are then rebuilt from the log.
+    One connection is shared behind a lock (so ":memory:" works); WAL
+    mode and BEGIN IMMEDIATE keep several worker processes consistent.
+    """
+
+    def __init__(self, path: str = "activity.db", clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS activities ("
+                "id INTEGER PRIMARY KEY, uid TEXT NOT NULL, ts REAL NOT NULL, kind TEXT NOT NULL, "
+                "name TEXT NOT NULL, value REAL, unit TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS activities_uid_ts ON activities(uid, ts)")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS activity_stats (uid TEXT PRIMARY KEY, "
+                f"{', '.join(Aggregates.COLUMNS)})"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _aggregates(self, conn: sqlite3.Connection, uid: str) -> Aggregates:
+        row = conn.execute(
+            f"SELECT {', '.join(Aggregates.COLUMNS)} FROM activity_stats WHERE uid = ?", (uid,)
+        ).fetchone()
+        return Aggregates(row)
+
+    def _rebuild(self, conn: sqlite3.Connection, uid: str) -> Aggregates:
+        aggregates = Aggregates()
+        for kind, name, value, ts in conn.execute(
+            "SELECT kind, name, value, ts FROM activities WHERE uid = ? ORDER BY ts, id", (uid,)
+        ):
+            aggregates.fold(kind, name, value, ts)
+        return aggregates
+
+    def append_many(self, activities: Iterable[Activity]) -> int:
+        """Append activities in one transaction; returns how many were written"""
+        now = self.clock()
+        rows: List[tuple] = []
+        touched: Dict[str, Aggregates] = {}
+        stale = set()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for activity in activities:
+                    if activity.kind not in KINDS:
+                        raise ValueError(f"unknown activity kind: {activity.kind!r}")
+                    ts = now if activity.ts is None else activity.ts
+                    rows.append((activity.uid, ts, activity.kind, activity.name, activity.value, activity.unit))
+                    aggregates = touched.get(activity.uid)
+                    if aggregates is None:
+                        aggregates = touched[activity.uid] = self._aggregates(conn, activity.uid)
+                    if aggregates.last_ts is not None and ts < aggregates.last_ts:
+                        stale.add(activity.uid)
+                    elif activity.uid not in stale:
+                        aggregates.fold(activity.kind, activity.name, activity.value, ts)
+                conn.executemany(
+                    "INSERT INTO activities (uid, ts, kind, name, value, unit) VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                for uid in stale:
+                    touched[uid] = self._rebuild(conn, uid)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO activity_stats (uid, {', '.join(Aggregates.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(Aggregates.COLUMNS) + 1))})",
+                    [(uid, *aggregates.row()) for uid, aggregates in touched.items()]
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def append(self, uid: str, kind: str, name: str, value: Optional[float] = None,
+               unit: Optional[str] = None, ts: Optional[float] = None) -> ProgressSummary:
+        """Append one activity and return the user's updated summary"""
+        self.append_many([Activity(uid, kind, name, value, unit, ts)])
+        return self.summary(uid)
+
+    def summary(self, uid: str, now: Optional[float] = None) -> ProgressSummary:
+        """O(1): one primary-key lookup of the aggregates row"""
+        with self._lock:
+            aggregates = self._aggregates(self._connection(), uid)
+        return aggregates.summary(self.clock() if now is None else now)
+
+    def history(self, uid: str, since: Optional[float] = None, limit: int = 50) -> List[Activity]:
+        """Most recent activities first, read through the (uid, ts) index"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT uid, kind, name, value, unit, ts FROM activities WHERE uid = ? AND ts >= ? "
+                "ORDER BY ts DESC LIMIT ?", (uid, since if since is not None else float("-inf"), limit)
+            ).fetchall()
+        return [Activity(*row) for row in rows]
+
+    def daily(self, uid: str, start_day: int) -> List[Tuple[int, str, str, int, Optional[float]]]:
+        """
+        Per-day rollup from `start_day` on, through the (uid, ts) index:
+        (day, kind, name, count, last value) rows; name is "" except for
+        measurements.
+        """
+        with self._lock:
+            return self._connection().execute(
+                # with MAX(ts), SQLite reads the bare `value` from the latest row of each group
+                "SELECT day, kind, label, entries, value FROM ("
+                "SELECT CAST(ts / ? AS INTEGER) AS day, kind, "
+                "CASE WHEN kind = 'measurement' THEN name ELSE '' END AS label, COUNT(*) AS entries, value, MAX(ts) "
+                "FROM activities WHERE uid = ? AND ts >= ? GROUP BY day, kind, label)",
+                (DAY, uid, start_day * DAY)
+            ).fetchall()
+
+    async def log(self, uid: str, kind: str, name: str, value: Optional[float] = None,
+                  unit: Optional[str] = None) -> ProgressSummary:
+        return await asyncio.to_thread(self.append, uid, kind, name, value, unit)
+
+    async def progress(self, uid: str) -> ProgressSummary:
+        return await asyncio.to_thread(self.summary, uid)
+
+    async def recent_days(self, uid: str, days: int) -> Tuple[int, int, list]:
+        """(start_day, end_day, daily rows) for the last `days` days up to today"""
+        end_day = day_of(self.clock())
+        start_day = end_day - days + 1
+        return start_day, end_day, await asyncio.to_thread(self.daily, uid, start_day)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_activity_store() -> ActivityStore:
+    """Build the store from ACTIVITY_DB_PATH (default activity.db in DATA_DIR; ":memory:" keeps it in-process)"""
+    return ActivityStore(os.getenv("ACTIVITY_DB_PATH") or data_path("activity.db"))
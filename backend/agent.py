@@ -1,19 +1,63 @@
 # health_wellness_agent2/agent.py
 
 import asyncio
-from typing import Optional
-from context import UserSessionContext
-from tools.goal_analyzer import analyze_goal
-from tools.meal_planner import generate_meal_plan
-from tools.workout_recommender import recommend_workout
+import os
+from functools import cached_property
+from typing import List, NamedTuple, Optional
+from context import Goal, UserSessionContext
+from deadline import DeadlineExceeded, check_deadline
+from guardrails import GuardrailResult, InputGuardrails, create_input_guardrails
+from hooks import HookRegistry
+from router import IntentRouter
+from tools.goal_analyzer import GOAL_KEYWORDS, analyze_goal
+from tools.meal_planner import DIET_PLANS, generate_meal_plan
+from tools.workout_recommender import WORKOUT_PLANS, recommend_workout
+from tools.plan_builder import meal_plan_for_goal, sync_meal_plan, sync_plans, workout_for_goal
 from tools.scheduler import schedule_checkin
 from tools.tracker import track_progress, log_activity, search_progress
 from agents.escalation_agent import EscalationAgent
 from agents.injury_support_agent import InjurySupportAgent
 from agents.nutrition_expert_agent import NutritionExpertAgent
 
+# Routes scoring below the fallback threshold go to OpenAI; between the two
+# thresholds a cached fallback answer is preferred over the local one
+ROUTE_FALLBACK_THRESHOLD = float(os.getenv("ROUTE_FALLBACK_THRESHOLD", "0.05"))
+ROUTE_LOCAL_THRESHOLD = float(os.getenv("ROUTE_LOCAL_THRESHOLD", "0.2"))
+
+class Intent(NamedTuple):
+    """Routing decision for a single message; score is the keyword coverage in [0, 1]"""
+    route: str
+    sub_intent: Optional[str] = None
+    score: float = 1.0
+
 class HealthWellnessAgent:
-    def __init__(self):
+    name = "HealthWellnessAgent"
+
+    # Hook names for each route: sub-agents receive a handoff, commands run a tool
+    HANDOFF_TARGETS = {
+        "escalation": "EscalationAgent",
+        "injury": "InjurySupportAgent",
+        "nutrition": "NutritionExpertAgent"
+    }
+    # Goal type answered for a stated goal's action
+    GOAL_TYPES = {"lose": "weight_loss", "gain": "weight_gain", "build": "muscle_building", "improve": "general_fitness"}
+    ROUTE_TOOLS = {
+        "schedule": "schedule_checkin",
+        "progress": "search_progress",
+        "search": "search_plans",
+        "workout": "recommend_workout",
+        "meal": "generate_meal_plan",
+        "goal": "analyze_goal"
+    }
+
+    def __init__(self, hooks: Optional[HookRegistry] = None,
+                 fallback_threshold: float = ROUTE_FALLBACK_THRESHOLD,
+                 local_threshold: float = ROUTE_LOCAL_THRESHOLD,
+                 guardrails: Optional[InputGuardrails] = None):
+        self.hooks = hooks if hooks is not None else HookRegistry()
+        self.guardrails = guardrails if guardrails is not None else create_input_guardrails()
+        self.fallback_threshold = fallback_threshold
+        self.local_threshold = max(local_threshold, fallback_threshold)
         self.tools = {
             "analyze_goal": analyze_goal,
             "generate_meal_plan": generate_meal_plan,
@@ -24,22 +68,40 @@ class HealthWellnessAgent:
             "search_progress": search_progress
         }
 
-        self.escalation_agent = EscalationAgent()
-        self.injury_support_agent = InjurySupportAgent()
-        self.nutrition_expert_agent = NutritionExpertAgent()
-
         self._init_command_handlers()
         self._init_handoff_triggers()
+        self._router_tables = None  # versions of the catalog tables the router was built from
+
+    # Sub-agents and the compiled router are built on first use (or by warm_up),
+    # so constructing the agent costs nothing at startup
+    @cached_property
+    def escalation_agent(self) -> EscalationAgent:
+        return EscalationAgent()
+
+    @cached_property
+    def injury_support_agent(self) -> InjurySupportAgent:
+        return InjurySupportAgent()
+
+    @cached_property
+    def nutrition_expert_agent(self) -> NutritionExpertAgent:
+        return NutritionExpertAgent()
+
+    def warm_up(self) -> None:
+        """Build the router and sub-agents ahead of the first message"""
+        for name in ("router", "escalation_agent", "injury_support_agent", "nutrition_expert_agent"):
+            getattr(self, name)
 
     def _init_command_handlers(self):
-        """Initialize command to handler mappings"""
-        self.command_handlers = [
-            (["monday", "check-in", "remind", "schedule"], self._handle_schedule),
-            (["track ", "log "], self._handle_tracking),
-            (["progress", "stats", "how am i doing"], self._handle_progress),
-            (["workout", "exercise", "train", "gym"], self._handle_workout),
-            (["meal", "diet", "food", "nutrition"], self._handle_nutrition)
-        ]
+        """Initialize command to handler mappings (checked in order)"""
+        self.command_handlers = {
+            "schedule": (["monday", "check-in", "remind", "schedule"], self._handle_schedule),
+            "tracking": (["track ", "log "], self._handle_tracking),
+            "progress": (["progress", "stats", "how am i doing"], self._handle_progress),
+            "workout": (["workout", "exercise", "train", "gym"], self._handle_workout),
+            "meal": (["meal", "diet", "food", "nutrition"], self._handle_nutrition),
+            # last, and only for messages starting with the keyword (see _classify)
+            "search": (["find ", "search "], self._handle_search)
+        }
 
     def _init_handoff_triggers(self):
         """Initialize keywords that trigger handoff to specialized agents"""
@@ -50,44 +112,181 @@ class HealthWellnessAgent:
                         "allergy", "weight loss", "energy", "medical diet"]
         }
 
-    def _check_handoff_triggers(self, input_lower: str) -> Optional[str]:
-        """Check if input matches any handoff trigger keywords"""
-        for agent_type, triggers in self.handoff_triggers.items():
-            if any(trigger in input_lower for trigger in triggers):
-                return agent_type
-        return None
-
-    async def _handle_agent_handoff(self, agent_type: str, input: str, context: UserSessionContext) -> str:
-        """Route message to appropriate specialized agent"""
-        if agent_type == "escalation":
-            if self.escalation_agent.should_escalate(input):
-                return self.escalation_agent.generate_response(input, context)
-        elif agent_type == "injury":
-            return await self.injury_support_agent.handle_message(input, context)
-        elif agent_type == "nutrition":
-            return await self.nutrition_expert_agent.handle_message(input, context)
+    @cached_property
+    def router(self) -> IntentRouter:
+        """Every keyword table compiled into a single-pass matcher"""
+        self._router_tables = (WORKOUT_PLANS.version, DIET_PLANS.version)
+        return IntentRouter({
+            "handoff": self.handoff_triggers,
+            "escalation": {"escalation": EscalationAgent.ESCALATION_KEYWORDS},
+            "command": {name: keywords for name, (keywords, _) in self.command_handlers.items()},
+            "injury": InjurySupportAgent.INJURY_KEYWORDS,
+            "nutrition": NutritionExpertAgent.CONDITION_KEYWORDS,
+            "workout": {level: [level] for level in WORKOUT_PLANS},
+            "meal": {diet: [diet] for diet in DIET_PLANS},
+            "goal": GOAL_KEYWORDS
+        })
+
+    def classify(self, input: str, goal: Optional[Goal] = None) -> Intent:
+        """
+        Resolve the route and sub-intent for a message. A message stating
+        a goal (from the guardrails) is answered by the goal route unless
+        the keywords point somewhere else with confidence.
+        """
+        intent = self._classify(input.lower())
+        if goal is not None and intent.score < self.local_threshold:
+            return Intent("goal", self.GOAL_TYPES[goal.action])
+        return intent
+
+    def _classify(self, input_lower: str) -> Intent:
+        """
+        Priority: handoff triggers (escalation, injury, nutrition), then
+        command keywords in order, then goal analysis. The score is how
+        much of the message the keyword tables behind the route explain.
+        """
+        # workout levels and diets route by their catalog keys: a reload
+        # (catalog.refresh_forever, in the background) rebuilds the router
+        if self._router_tables != (WORKOUT_PLANS.version, DIET_PLANS.version):
+            self.__dict__.pop("router", None)
+        match = self.router.match(input_lower)
+        matches = match.winners
+
+        # Check for handoff to specialized agents
+        handoff_agent = matches.get("handoff")
+        if handoff_agent == "escalation" and "escalation" in matches:
+            return Intent("escalation", None, match.score("handoff", "escalation"))
+        if handoff_agent in ("injury", "nutrition"):
+            return Intent(handoff_agent, matches.get(handoff_agent, "unknown"),
+                          match.score("handoff", handoff_agent))
+
+        # Then fallback to regular commands
+        command = matches.get("command")
+        if command == "search" and not input_lower.startswith(("find ", "search ")):
+            command = None  # "find"/"search" inside a message is not a search request
+        if command == "tracking":
+            return Intent(command, "log" if input_lower.startswith("log ") else "track",
+                          match.score("command"))
+        if command == "search":  # levels and diets named in the query count towards it
+            return Intent(command, None, match.score("command", "workout", "meal"))
+        if command in ("workout", "meal"):
+            return Intent(command, matches.get(command, "unknown"), match.score("command", command))
+        if command:
+            return Intent(command, None, match.score("command"))
+        return Intent("goal", matches.get("goal", "unknown"), match.score("goal"))
 
-        # fallback to default routing
-        return await self._route_command(input.lower(), context)
+    def screen(self, input: str, context: UserSessionContext) -> GuardrailResult:
+        """Run the input guardrails; a newly stated goal or diet updates the context and its plans"""
+        return self._apply(self.guardrails.check(input), context)
 
-    async def handle_message(self, input: str, context: Optional[UserSessionContext] = None) -> str:
+    def screen_batch(self, inputs: List[str], context: UserSessionContext) -> List[GuardrailResult]:
+        return [self._apply(result, context) for result in self.guardrails.check_batch(inputs)]
+
+    @staticmethod
+    def _apply(result: GuardrailResult, context: UserSessionContext) -> GuardrailResult:
+        diet = None
+        if result.diet is not None and result.diet.preference != context.diet_preferences:
+            diet = context.diet_preferences = result.diet.preference
+        if result.goal is not None and result.goal != context.goal:
+            context.goal = result.goal
+            sync_plans(context, diet)
+        elif diet is not None and context.goal is not None:
+            sync_meal_plan(context, diet)
+        return result
+
+    def decide(self, intent: Intent) -> str:
+        """Pick local, cached (a cached fallback answer beats the local one) or fallback"""
+        if intent.score < self.fallback_threshold:
+            return "fallback"
+        if intent.score < self.local_threshold:
+            return "cached"
+        return "local"
+
+    async def handle_message(self, input: str, context: Optional[UserSessionContext] = None,
+                             intent: Optional[Intent] = None) -> str:
+        """
+        Answer a message. Without `intent` the message is screened by the
+        guardrails and classified here; callers passing `intent` have
+        already screened (screen) and classified the cleaned text.
+        """
         if context is None:
             context = UserSessionContext()
+        if intent is None:
+            screened = self.screen(input, context)
+            if screened.rejection is not None:
+                return screened.rejection
+            input = screened.text
+            intent = self.classify(input, screened.goal)
+
+        hooks = self.hooks
+        if not hooks.enabled:
+            return await self._dispatch(input, context, intent)
 
+        token = hooks.open()
+        hooks.emit("agent_start", self.name, context, detail=input)
         try:
-            input_lower = input.lower()
+            return await self._dispatch(input, context, intent)
+        finally:
+            hooks.emit("agent_end", self.name, context)
+            await hooks.flush(token)
 
-            # Check for handoff to specialized agents
-            handoff_agent = self._check_handoff_triggers(input_lower)
-            if handoff_agent:
-                return await self._handle_agent_handoff(handoff_agent, input, context)
+    async def _dispatch(self, input: str, context: UserSessionContext,
+                        intent: Optional[Intent] = None) -> str:
+        try:
+            check_deadline()
+            input_lower = input.lower()
+            if intent is None:
+                intent = self._classify(input_lower)
+            if intent.score < self.fallback_threshold:
+                return "__FALLBACK__"
+            if self.hooks.enabled:
+                return await self._dispatch_with_hooks(input, input_lower, intent, context)
 
-            # Then fallback to regular commands
-            return await self._route_command(input_lower, context)
+            if intent.route == "escalation":
+                return self.escalation_agent.generate_response(input, context)
+            if intent.route == "injury":
+                return await self.injury_support_agent.handle_message(input, context, intent.sub_intent)
+            if intent.route == "nutrition":
+                return await self.nutrition_expert_agent.handle_message(input, context, intent.sub_intent)
+            if intent.route in self.command_handlers:
+                _, handler = self.command_handlers[intent.route]
+                return await handler(input_lower, context, intent.sub_intent)
+            return await analyze_goal(input_lower, context, intent.sub_intent)
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return self._format_error(e)
 
+    async def _dispatch_with_hooks(self, input: str, input_lower: str, intent: Intent,
+                                   context: UserSessionContext) -> str:
+        """Same dispatch as above, emitting handoff/agent or tool events around it"""
+        hooks = self.hooks
+        target = self.HANDOFF_TARGETS.get(intent.route)
+        if target is not None:
+            hooks.emit("handoff", self.name, context, target=target)
+            hooks.emit("agent_start", target, context, detail=input)
+            try:
+                if intent.route == "escalation":
+                    return self.escalation_agent.generate_response(input, context)
+                if intent.route == "injury":
+                    return await self.injury_support_agent.handle_message(input, context, intent.sub_intent)
+                return await self.nutrition_expert_agent.handle_message(input, context, intent.sub_intent)
+            finally:
+                hooks.emit("agent_end", target, context)
+
+        if intent.route == "tracking":
+            tool = "log_activity" if intent.sub_intent == "log" else "track_progress"
+        else:
+            tool = self.ROUTE_TOOLS[intent.route]
+        hooks.emit("tool_start", self.name, context, target=tool)
+        try:
+            if intent.route in self.command_handlers:
+                _, handler = self.command_handlers[intent.route]
+                return await handler(input_lower, context, intent.sub_intent)
+            return await analyze_goal(input_lower, context, intent.sub_intent)
+        finally:
+            hooks.emit("tool_end", self.name, context, target=tool)
+
     async def _handle_nutrition_expert(self, input_lower: str, context: UserSessionContext) -> str:
         """Handle specialized nutrition queries"""
         return await self.nutrition_expert_agent.handle_message(input_lower, context)
@@ -96,27 +295,32 @@ class HealthWellnessAgent:
         """Handle injury-related queries"""
         return await self.injury_support_agent.handle_message(input_lower, context)
 
-    async def _route_command(self, input_lower: str, context: UserSessionContext) -> str:
-        """Route command to appropriate handler"""
-        for keywords, handler in self.command_handlers:
-            if any(kw in input_lower for kw in keywords):
-                return await handler(input_lower, context)
-        return await analyze_goal(input_lower, context)
+    async def _handle_schedule(self, input_lower: str, context: UserSessionContext, sub_intent: Optional[str] = None) -> str:
+        return await schedule_checkin(context, input_lower)
 
-    async def _handle_schedule(self, input_lower: str, context: UserSessionContext) -> str:
-        return await schedule_checkin(context)
+    async def _handle_tracking(self, input_lower: str, context: UserSessionContext, sub_intent: Optional[str] = None) -> str:
+        if sub_intent == "log":
+            return await log_activity(context, input_lower)
+        return await track_progress(context, input_lower)
 
-    async def _handle_tracking(self, input_lower: str, context: UserSessionContext) -> str:
-        return await log_activity(context) if input_lower.startswith("log ") else await track_progress(context)
-
-    async def _handle_progress(self, input_lower: str, context: UserSessionContext) -> str:
+    async def _handle_progress(self, input_lower: str, context: UserSessionContext, sub_intent: Optional[str] = None) -> str:
         return await search_progress(context)
 
-    async def _handle_workout(self, input_lower: str, context: UserSessionContext) -> str:
-        return await recommend_workout(input_lower, context)
+    async def _handle_search(self, input_lower: str, context: UserSessionContext, sub_intent: Optional[str] = None) -> str:
+        from tools.plan_search import search_plans  # NumPy, imported on the first search
+
+        return await search_plans(input_lower, context)
+
+    # With a goal set, workout and meal requests get the plans stored for it
+    async def _handle_workout(self, input_lower: str, context: UserSessionContext, sub_intent: Optional[str] = None) -> str:
+        if context.goal is not None:
+            return await workout_for_goal(context, sub_intent)
+        return await recommend_workout(input_lower, context, sub_intent)
 
-    async def _handle_nutrition(self, input_lower: str, context: UserSessionContext) -> str:
-        return await generate_meal_plan(input_lower, context)
+    async def _handle_nutrition(self, input_lower: str, context: UserSessionContext, sub_intent: Optional[str] = None) -> str:
+        if context.goal is not None:
+            return await meal_plan_for_goal(context, sub_intent)
+        return await generate_meal_plan(input_lower, context, sub_intent)
 
     def _format_error(self, error: Exception) -> str:
         """Format error message consistently"""
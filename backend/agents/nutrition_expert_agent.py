@@ -1,8 +1,10 @@
 # health_wellness_agent2/agents/nutrition_expert_agent.py
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from context import UserSessionContext
-import asyncio
+from deadline import check_deadline
+from plan_catalog import catalog
+from response_cache import ResponseTable
 
 class NutritionExpertAgent:
     """Specialized agent for nutrition and dietary concerns with colorful formatting"""
@@ -14,39 +16,22 @@ class NutritionExpertAgent:
     WEIGHT_LOSS = "weight loss"
     ENERGY_BOOST = "energy boost"
 
+    CONDITION_KEYWORDS = {
+        DIABETES: ["diabetes", "diabetic", "blood sugar", "glucose"],
+        HYPERTENSION: ["blood pressure", "hypertension", "high bp"],
+        ALLERGIES: ["allergy", "allergic", "intolerance"],
+        WEIGHT_LOSS: ["lose weight", "weight loss", "slimming", "dieting"],
+        ENERGY_BOOST: ["energy", "fatigue", "tired", "low energy"]
+    }
+
     def __init__(self):
-        self.dietary_conditions = {
-            self.DIABETES: {
-                "avoid": ["🍬 High sugar foods", "🍞 Refined carbs", "🥤 Sugary drinks", "🍞 White bread"],
-                "recommend": ["🌾 Whole grains", "🍗 Lean proteins", "🥦 Non-starchy vegetables", "🥑 Healthy fats"],
-                "tips": ["📊 Monitor blood sugar regularly", "⏰ Eat at consistent times", "🍽️ Control portion sizes"]
-            },
-            self.HYPERTENSION: {
-                "avoid": ["🧂 High sodium foods", "🥓 Processed meats", "🥫 Canned soups", "🍔 Fast food"],
-                "recommend": ["🍎 Fresh fruits", "🥕 Vegetables", "🌾 Whole grains", "🥛 Low-fat dairy"],
-                "tips": ["🧂 Limit sodium to 2300mg/day", "🌿 Use herbs and spices", "🏷️ Read nutrition labels"]
-            },
-            self.ALLERGIES: {
-                "avoid": ["⚠️ Known allergens", "🔄 Cross-contaminated foods", "🏷️ Unclear ingredient foods"],
-                "recommend": ["🍎 Fresh whole foods", "🏷️ Clearly labeled products", "🏠 Home-cooked meals"],
-                "tips": ["👀 Always read labels", "💊 Carry emergency meds", "🍽️ Inform restaurants"]
-            },
-            self.WEIGHT_LOSS: {
-                "avoid": ["🍟 Fried foods", "🍰 Sugary desserts", "🥤 Sweetened beverages", "🍕 Fast food"],
-                "recommend": ["🥗 High-volume veggies", "🍗 Lean proteins", "🌰 Healthy fats", "💧 Water"],
-                "tips": ["⚖️ Track portions", "⏲️ Eat mindfully", "🏃 Combine with exercise"]
-            },
-            self.ENERGY_BOOST: {
-                "avoid": ["☕ Excess caffeine", "🍬 Sugar crashes", "🍞 Refined carbs", "🍔 Heavy meals"],
-                "recommend": ["🍌 Potassium-rich foods", "🥜 Healthy fats", "💧 Hydration", "🌿 Iron-rich foods"],
-                "tips": ["⏰ Eat small frequent meals", "💤 Prioritize sleep", "🧘 Manage stress"]
-            }
-        }
+        self.dietary_conditions = catalog.table("nutrition")
+        self.advice_responses = ResponseTable(self.dietary_conditions, self._render_condition_advice)
 
-    async def handle_message(self, message: str, context: UserSessionContext) -> str:
+    async def handle_message(self, message: str, context: UserSessionContext,
+                             condition: Optional[str] = None) -> str:
         """Process nutrition-related concerns with async support"""
-        await asyncio.sleep(0.1)  # Simulate async processing
-        
+        check_deadline()  # the handoff inherits the request's deadline
         print(f"\n🥗 Nutrition query: {message[:50]}...")
         
         try:
@@ -55,7 +40,8 @@ class NutritionExpertAgent:
         except Exception :
             pass  # Silently ignore if logging fails
         
-        condition = self._identify_dietary_condition(message)
+        if condition is None:
+            condition = self._identify_dietary_condition(message)
         
         if condition in self.dietary_conditions:
             return self._generate_condition_specific_advice(condition)
@@ -66,15 +52,7 @@ class NutritionExpertAgent:
         """Identify dietary condition from message"""
         message_lower = message.lower()
         
-        condition_keywords = {
-            self.DIABETES: ["diabetes", "diabetic", "blood sugar", "glucose"],
-            self.HYPERTENSION: ["blood pressure", "hypertension", "high bp"],
-            self.ALLERGIES: ["allergy", "allergic", "intolerance"],
-            self.WEIGHT_LOSS: ["lose weight", "weight loss", "slimming", "dieting"],
-            self.ENERGY_BOOST: ["energy", "fatigue", "tired", "low energy"]
-        }
-        
-        for condition, keywords in condition_keywords.items():
+        for condition, keywords in self.CONDITION_KEYWORDS.items():
             if any(kw in message_lower for kw in keywords):
                 return condition
         
@@ -82,8 +60,11 @@ class NutritionExpertAgent:
 
     def _generate_condition_specific_advice(self, condition: str) -> str:
         """Generate colorful advice for specific conditions"""
-        info = self.dietary_conditions[condition]
-        
+        return self.advice_responses.get(condition)
+
+    @staticmethod
+    def _render_condition_advice(condition: str, info: dict) -> str:
+        """Render the advice text for one condition (done once per table version)"""
         return (
             f"🍏 **{condition.upper()} NUTRITION GUIDE** 🍎\n\n"
             f"🚫 **AVOID These:**\n"
@@ -0,0 +1,142 @@
+"""
+Activity store at scale: millions of activities across thousands of
+users in a temporary SQLite file.
+- bulk append throughput (batched transactions);
+- single append latency (one transaction each, as the API does);
+- progress summary latency from the aggregates row vs recomputing it from
+  the user's history, measured with the store half full and full: the
+  aggregate lookup stays flat while the rescan grows with history;
+- the stored aggregates of sampled users match a rebuild from the log.
+
+Checks first that only explicit "log ..."/"track ..." commands write:
+questions that mention tracking, and measurements without a unit, leave
+the store untouched.
+
+Run from the backend directory:
+    python benchmarks/bench_activity_store.py [--entries 2000000 --users 5000]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")
+
+from activity_store import DAY, Activity, ActivityStore
+
+NOW = 1_750_000_000.0
+NAMES = {"workout": ["run", "yoga", "bench press", "cycling"], "meal": ["breakfast", "lunch", "dinner"],
+         "measurement": ["weight"]}
+
+
+def generate(users: int, entries: int, days: int, seed: int = 1):
+    """Activities in time order, as they would arrive"""
+    rng = random.Random(seed)
+    start = NOW - days * DAY
+    step = days * DAY / entries
+    weights = [75.0 + rng.random() * 20 for _ in range(users)]
+    for i in range(entries):
+        uid = rng.randrange(users)
+        kind = rng.choices(("workout", "meal", "measurement"), (4, 5, 1))[0]
+        value = None
+        if kind == "measurement":
+            weights[uid] += rng.uniform(-0.3, 0.25)
+            value = round(weights[uid], 1)
+        yield Activity(f"user-{uid}", kind, rng.choice(NAMES[kind]), value, "kg" if value else None, start + i * step)
+
+
+NOT_COMMANDS = ["how often should i track my weight, like 2 times a week?",
+                "should i log my weight 3 times a week", "i track my weight 5 days a week",
+                "log weight 72", "track how much water 2 l", "log weight?"]
+
+
+async def check_commands() -> None:
+    from agent import HealthWellnessAgent
+    from context import UserSessionContext
+    from tools.tracker import activity_store
+
+    agent, context = HealthWellnessAgent(), UserSessionContext()
+    uid = str(context.uid)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for message in NOT_COMMANDS:
+            await agent.handle_message(message, context)
+        assert sum((await activity_store.progress(uid)).totals.values()) == 0
+        await agent.handle_message("log weight 72kg", context)
+        await agent.handle_message("track weight 71.5 kg", context)
+        await agent.handle_message("log 5km run", context)
+        await agent.handle_message("log weight 157lbs", context)  # stored as 71.21 kg
+    summary = await activity_store.progress(uid)
+    assert summary.totals["measurement"] == 3 and summary.totals["workout"] == 1, summary.totals
+    assert summary.weight == 71.21 and summary.weight_change_total == -0.79, summary
+
+
+def rescan_summary(store: ActivityStore, uid: str) -> tuple:
+    """What search_progress would cost without aggregates: fold the whole history"""
+    return store._rebuild(store._connection(), uid).summary(NOW)
+
+
+def timed(fn, uids, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for uid in uids:
+            fn(uid)
+    return (time.perf_counter() - start) / (len(uids) * repeat) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch", type=int, default=20000)
+    args = parser.parse_args()
+
+    asyncio.run(check_commands())
+    print("checks passed: only explicit log/track commands write, questions never do, lbs are stored as kg")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ActivityStore(os.path.join(tmp, "activity.db"), clock=lambda: NOW)
+        rng = random.Random(2)
+        sample = [f"user-{rng.randrange(args.users)}" for _ in range(200)]
+        print(f"{args.entries:,} activities, {args.users:,} users, {args.days} days")
+        print(f"{'loaded':>10} {'append/s':>10} {'summary us':>11} {'rescan us':>10} {'history/user':>13}")
+
+        batch, written, elapsed = [], 0, 0.0
+        checkpoints = {args.entries // 2, args.entries}
+        for activity in generate(args.users, args.entries, args.days):
+            batch.append(activity)
+            if len(batch) == args.batch or written + len(batch) in checkpoints:
+                start = time.perf_counter()
+                written += store.append_many(batch)
+                elapsed += time.perf_counter() - start
+                batch = []
+                if written in checkpoints:
+                    summary_us = timed(store.summary, sample, repeat=5)
+                    rescan_us = timed(lambda uid: rescan_summary(store, uid), sample[:50])
+                    print(f"{written:>10,} {written / elapsed:>10,.0f} {summary_us:>11.1f} {rescan_us:>10.0f} "
+                          f"{written / args.users:>13,.0f}")
+
+        latencies = []
+        for i in range(500):
+            start = time.perf_counter()
+            store.append(sample[i % len(sample)], "workout", "run", ts=NOW + i)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        print(f"single append + summary: p50 {latencies[250]:.3f} ms, p99 {latencies[495]:.3f} ms")
+
+        for uid in sample[:50]:
+            assert store.summary(uid, NOW + 1000) == store._rebuild(store._connection(), uid).summary(NOW + 1000), uid
+        print("aggregates match a rebuild from the log for 50 sampled users")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
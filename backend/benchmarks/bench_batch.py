@@ -0,0 +1,84 @@
+"""
+Batch throughput: one POST /query/batch vs a loop of POST /query, against
+a local fake OpenAI server.
+
+Questions the router cannot match go to the fallback. The fallback cache is reset before each run so both modes
+pay for the same upstream calls.
+
+Run from the backend directory:
+    python benchmarks/bench_batch.py [--prompts 60 --fallback-share 0.5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+from openai_client import UpstreamClient
+
+from fake_openai import FakeOpenAIServer
+
+LOCAL_PROMPTS = ["beginner workout plan", "vegan meal ideas", "knee pain while running",
+                 "diet for diabetes", "how to build muscle", "show my progress"]
+
+
+def prompts(count: int, fallback_share: float):
+    rng = random.Random(5)
+    return [
+        f"what is the boiling point of water question {i}" if rng.random() < fallback_share
+        else rng.choice(LOCAL_PROMPTS)
+        for i in range(count)
+    ]
+
+
+async def main_async(count: int, fallback_share: float, latency: float):
+    import fast_api
+    from rate_limit import FallbackLimiter
+    fast_api.limiter = FallbackLimiter.unlimited()  # measured without budgets
+    from fallback_cache import FallbackCache
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    batch = prompts(count, fallback_share)
+    with FakeOpenAIServer(latency=latency, token_interval=0) as server:
+        fast_api.upstream = UpstreamClient(api_key="sk-fake", base_url=server.base_url)
+        transport = httpx.ASGITransport(app=fast_api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            fast_api.fallback_cache = FallbackCache(similarity_threshold=None)
+            start = time.perf_counter()
+            for prompt in batch:
+                (await client.post("/query", params={"user_input": prompt})).raise_for_status()
+            sequential = time.perf_counter() - start
+
+            fast_api.fallback_cache = FallbackCache(similarity_threshold=None)
+            start = time.perf_counter()
+            response = await client.post("/query/batch", json={"inputs": batch})
+            response.raise_for_status()
+            batched = time.perf_counter() - start
+        await fast_api.upstream.close()
+
+    results = response.json()["results"]
+    assert [r["source"] for r in results].count("local") == sum(p in LOCAL_PROMPTS for p in batch)
+    print(f"{count} prompts, {sum(p not in LOCAL_PROMPTS for p in batch)} via fallback "
+          f"({latency * 1000:.0f} ms upstream), batch concurrency {fast_api.BATCH_CONCURRENCY}")
+    print(f"{'mode':<11} {'seconds':>8} {'prompts/s':>10}")
+    print(f"{'sequential':<11} {sequential:>8.2f} {count / sequential:>10.1f}")
+    print(f"{'batch':<11} {batched:>8.2f} {count / batched:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=60)
+    parser.add_argument("--fallback-share", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.prompts, args.fallback_share, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Request deadlines and cancellation, checked against the ASGI app with a
+hand-driven receive channel (so the client can "disconnect" mid-request)
+and an in-process stub OpenAI client with a slow completion.
+
+Checks:
+- a slow tool: /query answers with source "timeout" at about `timeout_ms`
+  and the tool sees the cancellation;
+- a slow OpenAI fallback: same, the call is cancelled and its token
+  reservation refunded;
+- a client disconnect cancels the fallback promptly (499);
+- of two clients sharing one OpenAI call, one leaving does not cancel it
+  for the other; when both leave, the call is cancelled; a short
+  deadline on the first client does not cut the call short for the other;
+- a batch that times out keeps the answered items;
+- the CLI's get_response times out with a short notice.
+After every check no task started for a request is left running.
+Also reports what running a local answer under a deadline costs.
+
+Run from the backend directory:
+    python benchmarks/bench_deadlines.py
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")
+
+from fake_openai import StubOpenAIClient
+
+FALLBACK_QUESTION = "what is the capital of france"
+GLOBAL_TOKENS = 100_000
+
+
+class CancelCountingStub(StubOpenAIClient):
+    """Stub completion that records calls which were cancelled mid-flight"""
+
+    def __init__(self, latency: float):
+        super().__init__(latency)
+        self.cancelled = 0
+
+    async def _create(self, model: str, messages: list, **kwargs):
+        try:
+            return await super()._create(model, messages, **kwargs)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+async def call(app, path: str, params: dict, body: bytes = b"", disconnect_after: float = None,
+               session: str = "deadline-check") -> tuple:
+    """One request through the ASGI app; returns (status, JSON body or None, seconds)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": urlencode(params).encode(),
+        "headers": [(b"host", b"test"), (b"x-session-id", session.encode()),
+                    (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1234), "server": ("test", 80)
+    }
+    disconnected = asyncio.Event()
+    sent_body = False
+    messages = []
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    if disconnect_after is not None:
+        asyncio.get_running_loop().call_later(disconnect_after, disconnected.set)
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - start
+    disconnected.set()
+    status = messages[0]["status"]
+    content = b"".join(message.get("body", b"") for message in messages[1:])
+    return status, json.loads(content) if content else None, elapsed
+
+
+async def settled(baseline: set) -> set:
+    """Tasks still alive (besides the baseline) once the loop had a moment"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+    return {task for task in asyncio.all_tasks() if task not in baseline and not task.done()}
+
+
+def tokens_available(fast_api) -> float:
+    return fast_api.limiter.stats()["global_tokens_available"]
+
+
+async def check_slow_tool(fast_api, baseline: set) -> None:
+    keywords, original = fast_api.agent.command_handlers["workout"]
+    cancelled = asyncio.Event()
+
+    async def slow_tool(input_lower, context, sub_intent=None):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    fast_api.agent.command_handlers["workout"] = (keywords, slow_tool)
+    try:
+        status, body, elapsed = await call(fast_api.app, "/query",
+                                           {"user_input": "beginner workout plan please", "timeout_ms": 100})
+    finally:
+        fast_api.agent.command_handlers["workout"] = (keywords, original)
+    assert status == 200 and body["source"] == "timeout", (status, body)
+    assert elapsed < 0.5, elapsed
+    assert cancelled.is_set()
+    assert not await settled(baseline)
+    print(f"slow tool: degraded answer after {elapsed * 1000:.0f} ms (timeout 100 ms), tool cancelled")
+
+
+async def check_slow_fallback(fast_api, stub, baseline: set) -> None:
+    before = stub.cancelled
+    status, body, elapsed = await call(fast_api.app, "/query", {"user_input": FALLBACK_QUESTION, "timeout_ms": 150})
+    assert status == 200 and body["source"] == "timeout", (status, body)
+    assert elapsed < 0.6, elapsed
+    assert stub.cancelled == before + 1
+    assert fast_api.openai_flights.inflight == 0
+    assert tokens_available(fast_api) == GLOBAL_TOKENS
+    assert not await settled(baseline)
+    print(f"slow fallback: degraded answer after {elapsed * 1000:.0f} ms, OpenAI call cancelled, tokens refunded")
+
+
+async def check_disconnect(fast_api, stub, baseline: set) -> None:
+    before = stub.cancelled
+    status, body, elapsed = await call(fast_api.app, "/query", {"user_input": FALLBACK_QUESTION},
+                                       disconnect_after=0.05)
+    assert status == 499 and body is None, (status, body)
+    assert elapsed < 0.3, elapsed
+    assert stub.cancelled == before + 1
+    assert tokens_available(fast_api) == GLOBAL_TOKENS
+    assert fast_api.inflight_requests.value("/query") == 0
+    assert not await settled(baseline)
+    print(f"client disconnect: request released after {elapsed * 1000:.0f} ms (left at 50 ms), "
+          f"OpenAI call cancelled")
+
+
+async def check_shared_call(fast_api, stub, baseline: set) -> None:
+    before_calls, before_cancelled = stub.calls, stub.cancelled
+    stub.latency = 0.3
+    leaving = call(fast_api.app, "/query", {"user_input": FALLBACK_QUESTION}, disconnect_after=0.05, session="a")
+    staying = call(fast_api.app, "/query", {"user_input": FALLBACK_QUESTION}, session="b")
+    (status_a, _, _), (status_b, body_b, _) = await asyncio.gather(leaving, staying)
+    assert (status_a, status_b, body_b["source"]) == (499, 200, "openai"), (status_a, status_b, body_b)
+    assert stub.calls == before_calls + 1 and stub.cancelled == before_cancelled
+
+    abandoned, available = fast_api.openai_flights.abandoned, tokens_available(fast_api)
+    results = await asyncio.gather(*(
+        call(fast_api.app, "/query", {"user_input": "who wrote the iliad"}, disconnect_after=0.05,
+             session=s)
+        for s in ("c", "d")
+    ))
+    assert [status for status, _, _ in results] == [499, 499], results
+    assert stub.cancelled == before_cancelled + 1 and fast_api.openai_flights.abandoned == abandoned + 1
+    assert tokens_available(fast_api) >= available
+    assert not await settled(baseline)
+    stub.latency = 2.0
+    print("shared OpenAI call: kept while one client waits, cancelled once every client left")
+
+
+async def check_shared_deadlines(fast_api, stub, baseline: set) -> None:
+    before_calls, before_cancelled = stub.calls, stub.cancelled
+    stub.latency = 0.3
+    question = "how far away is the moon"
+    hurried = call(fast_api.app, "/query", {"user_input": question, "timeout_ms": 100}, session="e")
+    patient = call(fast_api.app, "/query", {"user_input": question}, session="f")
+    (_, body_a, elapsed_a), (_, body_b, elapsed_b) = await asyncio.gather(hurried, patient)
+    assert (body_a["source"], body_b["source"]) == ("timeout", "openai"), (body_a, body_b)
+    assert elapsed_a < 0.25 and elapsed_b >= 0.3, (elapsed_a, elapsed_b)
+    assert stub.calls == before_calls + 1 and stub.cancelled == before_cancelled
+    assert not await settled(baseline)
+    stub.latency = 2.0
+    print("shared OpenAI call: each client keeps its own deadline (100 ms leader, default follower)")
+
+
+async def check_batch(fast_api, baseline: set) -> None:
+    fast_api.QUERY_TIMEOUT_SECONDS = 0.2
+    try:
+        body = json.dumps({"inputs": ["beginner workout plan", "how tall is mount everest"]}).encode()
+        status, result, elapsed = await call(fast_api.app, "/query/batch", {}, body=body)
+    finally:
+        fast_api.QUERY_TIMEOUT_SECONDS = 15.0
+    sources = [item["source"] for item in result["results"]]
+    assert status == 200 and sources == ["local", "timeout"], (status, result)
+    assert not await settled(baseline)
+    print(f"batch: local item kept, fallback item degraded after {elapsed * 1000:.0f} ms")
+
+
+async def check_cli(baseline: set) -> None:
+    from main import Assistant
+    from openai_client import UpstreamClient
+    from rate_limit import FallbackLimiter
+
+    assistant = Assistant()
+    assistant.timeout = 0.1
+    assistant.limiter = FallbackLimiter.unlimited()
+    assistant.client = UpstreamClient(client=StubOpenAIClient(latency=2.0))
+    start = time.perf_counter()
+    answer = await assistant.get_response(FALLBACK_QUESTION)
+    elapsed = time.perf_counter() - start
+    assert "Timed out" in answer and elapsed < 0.5, (answer, elapsed)
+    await assistant.close()  # the catalog refresh and SDK import started with the agent
+    assert not await settled(baseline)
+    print(f"CLI: timed out after {elapsed * 1000:.0f} ms with a short notice")
+
+
+async def deadline_overhead(fast_api, repeat: int) -> tuple:
+    from deadline import Deadline, run_with_deadline
+    from context import UserSessionContext
+
+    context = UserSessionContext(uid=1)
+    intent = fast_api.agent.classify("beginner workout plan")
+
+    async def direct():
+        return await fast_api.answer_locally("beginner workout plan", context, intent)
+
+    async def bounded():
+        return await run_with_deadline(fast_api.answer_locally("beginner workout plan", context, intent),
+                                       Deadline(15))
+
+    timings = []
+    for fn in (direct, bounded):
+        await fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await fn()
+        timings.append((time.perf_counter() - start) / repeat * 1e6)
+    return tuple(timings)
+
+
+async def run(args) -> None:
+    import fast_api
+    from openai_client import UpstreamClient
+    from rate_limit import FallbackLimiter
+
+    stub = CancelCountingStub(latency=2.0)
+    fast_api.upstream = UpstreamClient(client=stub, timeout=10.0)
+    fast_api.limiter = FallbackLimiter(session_rps=0, global_rps=0, session_tokens_per_day=0,
+                                       global_tokens_per_day=GLOBAL_TOKENS)
+    baseline = set(asyncio.all_tasks())
+
+    await check_slow_tool(fast_api, baseline)
+    await check_slow_fallback(fast_api, stub, baseline)
+    await check_disconnect(fast_api, stub, baseline)
+    await check_shared_call(fast_api, stub, baseline)
+    await check_shared_deadlines(fast_api, stub, baseline)
+    await check_batch(fast_api, baseline)
+    await check_cli(baseline)
+    print("no tasks left behind by any cancelled or timed-out request")
+
+    direct_us, bounded_us = await deadline_overhead(fast_api, args.repeat)
+    print(f"local answer: {direct_us:.1f} µs direct, {bounded_us:.1f} µs under a deadline "
+          f"(+{bounded_us - direct_us:.1f} µs)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
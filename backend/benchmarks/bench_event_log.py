@@ -0,0 +1,68 @@
+"""
+Memory for 1M session events: the old list-of-dicts with ISO timestamp
+strings vs the EventLog ring buffer (unbounded-equivalent and bounded).
+
+Run from the backend directory:
+    python benchmarks/bench_event_log.py [--events 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import EventLog
+
+EVENTS = [("agent_start", "agent", "HealthWellnessAgent"), ("tool_start", "tool", "recommend_workout"),
+          ("tool_end", "tool", "recommend_workout"), ("agent_end", "agent", "HealthWellnessAgent")]
+
+
+def legacy(count: int):
+    logs = []
+    for i in range(count):
+        event, key, name = EVENTS[i % len(EVENTS)]
+        logs.append({"timestamp": datetime.now().isoformat(), "event": event, key: name})
+    return logs
+
+
+def ring(count: int, capacity: int):
+    log = EventLog(capacity)
+    for i in range(count):
+        event, _, name = EVENTS[i % len(EVENTS)]
+        log.record(event, name)
+    return log
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--capacity", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{args.events:,} events")
+    print(f"{'structure':<28} {'retained MiB':>13} {'peak MiB':>9} {'seconds':>8}")
+    for label, fn, fn_args in (
+        ("list of dicts (before)", legacy, (args.events,)),
+        (f"EventLog capacity={args.events:,}", ring, (args.events, args.events)),
+        (f"EventLog capacity={args.capacity:,}", ring, (args.events, args.capacity)),
+    ):
+        current, peak, elapsed = measure(fn, *fn_args)
+        print(f"{label:<28} {current / 2**20:>13.1f} {peak / 2**20:>9.1f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Fallback cache hit rate and latency savings against a stub OpenAI client.
+Replays a stream of paraphrased questions through
+fast_api.answer_with_fallback with the cache off, exact-only and
+similarity-enabled.
+
+Checks first that similarity never serves the answer to a question that
+asks something else: a different goal ("lose"/"gain"), an antonym
+("safe"/"unsafe") or a negation, even at a loose threshold.
+
+Run from the backend directory:
+    python benchmarks/bench_fallback_cache.py [--latency 0.2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from fake_openai import StubOpenAIClient
+from openai_client import UpstreamClient
+
+PARAPHRASES = [
+    ["how much water should I drink", "How much water should I drink?",
+     "how much water should i drink daily", "how much water should I drink per day"],
+    ["is coffee bad for you", "Is coffee bad for you?", "is coffee bad for my health"],
+    ["how many hours of sleep do I need", "How many hours of sleep do I need?",
+     "how many hours of sleep do i really need"],
+    ["what is a good resting heart rate", "What's a good resting heart rate?",
+     "what is a good resting heart rate for adults"],
+    ["should I stretch before running", "Should I stretch before running?",
+     "should i stretch before going running"],
+]
+
+# (cached question, different question) pairs that must never share an answer
+DIFFERENT = [
+    ("how many calories should i eat to lose weight", "how many calories should i eat to gain weight"),
+    ("is it safe to run every day", "is it unsafe to run every day"),
+    ("is it safe to run every day", "is it safe to not run every day"),
+    ("should i eat before a workout", "should i not eat before a workout"),
+    ("can i drink coffee when pregnant", "can't i drink coffee when pregnant"),
+    ("when should i stretch", "why should i stretch"),
+]
+
+
+def check_similarity() -> None:
+    from fallback_cache import FallbackCache, create_fallback_cache
+
+    assert create_fallback_cache().similarity_threshold is None  # exact keys only by default
+    for threshold in (0.5, 0.9):
+        cache = FallbackCache(similarity_threshold=threshold)
+        for cached, other in DIFFERENT:
+            cache.put(cached, cached)
+            assert cache.get(other) is None, (threshold, cached, other)
+            assert cache.get(other, similarity_threshold=0.1) is None, (cached, other)
+        cache.put("How much water should I drink?", "water")
+        assert cache.get("how much water should i drink please") == "water"  # same content words
+
+
+async def replay(fast_api, questions, cache, latency: float) -> dict:
+    stub = StubOpenAIClient(latency=latency)
+    fast_api.upstream = UpstreamClient(client=stub)
+    fast_api.fallback_cache = cache
+    start = time.perf_counter()
+    for question in questions:
+        await fast_api.answer_with_fallback(question)
+    elapsed = time.perf_counter() - start
+    return {"upstream_calls": stub.calls, "avg_ms": elapsed / len(questions) * 1000}
+
+
+async def main_async(requests: int, latency: float):
+    import fast_api
+    from rate_limit import FallbackLimiter
+    fast_api.limiter = FallbackLimiter.unlimited()  # measured without budgets
+    from fallback_cache import FallbackCache
+
+    check_similarity()
+    print("checks passed: different goals, antonyms and negations never share a cached answer")
+    rng = random.Random(11)
+    questions = [rng.choice(rng.choice(PARAPHRASES)) for _ in range(requests)]
+    modes = {
+        "no cache": FallbackCache(max_entries=0, similarity_threshold=None),
+        "exact": FallbackCache(similarity_threshold=None),
+        "similar": FallbackCache(similarity_threshold=0.9)
+    }
+    print(f"{len(questions)} questions, stub latency {latency * 1000:.0f} ms")
+    print(f"{'mode':<9} {'upstream':>9} {'hit rate':>9} {'avg ms':>8}")
+    for mode, cache in modes.items():
+        result = await replay(fast_api, questions, cache, latency)
+        print(f"{mode:<9} {result['upstream_calls']:>9} {cache.stats()['hit_rate']:>9.2%} "
+              f"{result['avg_ms']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.latency))
+
+
+if __name__ == "__main__":
+    main()
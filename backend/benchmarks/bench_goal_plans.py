@@ -0,0 +1,178 @@
+"""
+Goal parsing and stored plans: checks, then multi-turn sessions.
+
+Checks:
+- goals parse into action/amount/unit/timeframe ("Gain 2.5 pounds within
+  1 month" -> gain, 2.5, lbs, 1, months) and survive a session round trip;
+- a zero amount or timeframe is refused, and weight goals faster than
+  1 kg (2.2 lbs) a week are flagged and planned at that rate;
+- stating a goal derives the workout and meal plans once; asking for them
+  again derives nothing;
+- a new level re-derives only the workout plan, a new diet only the meal
+  plan, a new goal both, and a change to a plan table only the plans
+  copied from it;
+- a goal statement the keywords cannot place is answered locally.
+
+Multi-turn: N sessions of T turns (state a goal, then ask for the plans,
+switch level or diet now and then, change the goal every 20 turns),
+with plans stored on the context against re-deriving them every turn.
+Reports plan derivations and time per turn.
+
+Run from the backend directory:
+    python benchmarks/bench_goal_plans.py [--sessions 200 --turns 40]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")
+
+from agent import HealthWellnessAgent
+from context import Goal, UserSessionContext
+from guardrails import GoalInput, InputGuardrails, parse_goal
+from tools import plan_builder
+from tools.workout_recommender import WORKOUT_PLANS
+
+GOALS = ["I want to lose 5kg in 2 months", "help me gain 10 lbs within 12 weeks",
+         "build 3 kg for 16 weeks", "improve 10% in 6 weeks"]
+FOLLOW_UPS = ["my workout plan", "my meal plan", "my workout plan", "my meal plan",
+              "intermediate workout", "my workout plan", "my diet is vegan", "my meal plan"]
+
+
+class DerivationCounter:
+    """Counts plan derivations by wrapping the plan_builder functions"""
+
+    def __init__(self):
+        self.count = 0
+        self._originals = (plan_builder.derive_workout_plan, plan_builder.derive_meal_plan)
+
+    def _counted(self, derive):
+        def wrapper(*args):
+            self.count += 1
+            return derive(*args)
+        return wrapper
+
+    def __enter__(self):
+        plan_builder.derive_workout_plan, plan_builder.derive_meal_plan = map(self._counted, self._originals)
+        return self
+
+    def __exit__(self, *exc):
+        plan_builder.derive_workout_plan, plan_builder.derive_meal_plan = self._originals
+
+
+def check_parsing() -> None:
+    assert parse_goal("Gain 2.5 pounds within 1 month") == Goal(
+        action="gain", amount=2.5, unit="lbs", timeframe=1, timeframe_unit="months")
+    goal = GoalInput(description="lose 5kg in 2 months").parse()
+    assert (goal.action, goal.amount, goal.unit, goal.timeframe, goal.timeframe_unit) == \
+        ("lose", 5.0, "kg", 2, "months")
+    assert parse_goal("improve 10% for 3 weeks").unit == "%"
+    assert parse_goal("lose weight soon") is None
+    context = UserSessionContext(goal=goal)
+    assert UserSessionContext.model_validate_json(context.model_dump_json()).goal == goal
+    assert plan_builder.daily_calories(goal) == -round(5 * 7700 / (2 * 52 / 12) / 7)
+
+    for text in ("lose 5kg in 0 days", "gain 0 lbs in 3 weeks"):  # stated, but nothing to plan for
+        assert parse_goal(text) is None
+        assert InputGuardrails().check(text).rejection is not None, text
+    assert parse_goal("lose 0kg in 2 weeks, lose 3kg in 2 months").amount == 3.0
+    fast = parse_goal("lose 5kg in 1 week")
+    assert plan_builder.planned_weekly_rate(fast) == 1.0 and "Too fast to be safe" in plan_builder.summarize_goal(fast)
+    assert plan_builder.planned_weekly_rate(parse_goal("gain 4 lbs in 1 week")) == 2.2
+    assert "Too fast" not in plan_builder.summarize_goal(goal)
+
+
+async def check_incremental(agent: HealthWellnessAgent) -> None:
+    context = UserSessionContext()
+
+    async def derived(message: str) -> int:
+        with DerivationCounter() as counter:
+            await agent.handle_message(message, context)
+        return counter.count
+
+    assert await derived("I want to lose 5kg in 2 months") == 2
+    assert context.workout_plan["level"] == "beginner" and context.meal_plan["diet"] == "balanced"
+    assert await derived("my workout plan") == 0
+    assert await derived("my meal plan") == 0
+    assert await derived("I want to lose 5kg in 2 months") == 0  # same goal again
+    assert await derived("advanced workout") == 1 and context.workout_plan["level"] == "advanced"
+    assert await derived("my workout plan") == 0
+    assert await derived("my diet is keto") == 1 and context.meal_plan["diet"] == "keto"
+    assert await derived("gain 4kg in 3 months") == 2
+    assert context.workout_plan["level"] == "advanced" and context.meal_plan["diet"] == "keto"
+    assert "above maintenance" in context.meal_plan["text"]
+
+    WORKOUT_PLANS.replace(dict(WORKOUT_PLANS))  # a new table version, as after a catalog reload
+    assert await derived("my workout plan") == 1
+    assert await derived("my meal plan") == 0
+
+    other = UserSessionContext()
+    answer = await agent.handle_message("help me gain 10 lbs within 12 weeks", other)
+    assert answer != "__FALLBACK__" and "gain 10 lbs in 12 weeks" in answer, answer
+
+
+def script(rng: random.Random, turns: int) -> list:
+    messages = []
+    for turn in range(turns):
+        if turn % 20 == 0:
+            messages.append(rng.choice(GOALS))
+        else:
+            messages.append(rng.choice(FOLLOW_UPS))
+    return messages
+
+
+async def sessions(agent: HealthWellnessAgent, scripts: list, stored: bool) -> tuple:
+    """(derivations, seconds) for every session's script"""
+    with DerivationCounter() as counter:
+        start = time.perf_counter()
+        for messages in scripts:
+            context = UserSessionContext()
+            for message in messages:
+                if not stored:  # what every turn costs when plans are not kept
+                    context.workout_plan = context.meal_plan = None
+                await agent.handle_message(message, context)
+        elapsed = time.perf_counter() - start
+    return counter.count, elapsed
+
+
+async def run(args) -> None:
+    agent = HealthWellnessAgent()
+    agent.warm_up()
+    check_parsing()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await check_incremental(agent)
+    print("checks passed: parsing, session round trip, derive once per change, incremental updates, "
+          "table changes, local goal answers")
+
+    rng = random.Random(11)
+    scripts = [script(rng, args.turns) for _ in range(args.sessions)]
+    turns = args.sessions * args.turns
+    print(f"{args.sessions} sessions x {args.turns} turns")
+    print(f"{'plans':<18} {'derivations/turn':>17} {'µs/turn':>9}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [(name, *await sessions(agent, scripts, stored))
+                   for name, stored in (("re-derived", False), ("stored", True))]
+    for name, derivations, elapsed in results:
+        print(f"{name:<18} {derivations / turns:>17.2f} {elapsed / turns * 1e6:>9.1f}")
+    (_, before, _), (_, after, _) = results
+    print(f"stored plans derive {before / max(after, 1):.1f}x less often")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
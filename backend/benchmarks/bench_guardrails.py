@@ -0,0 +1,171 @@
+"""
+Input guardrails: validations per second for the goal and dietary models
+as they were (pydantic v1-style @validator, the goal pattern passed to
+re.search as a string, the dietary options rebuilt as a list on every
+call) against the current ones (compiled pattern, frozenset, v2
+field_validator), and for the screening stage one message at a time vs
+whole batches through the list TypeAdapter.
+
+Checks first:
+- control characters are stripped and whitespace collapsed;
+- empty and over-long messages are rejected;
+- stated goals and known diets end up on the session context, while
+  "my diet is <anything else>" passes through as an ordinary message;
+- check_batch gives the same results as check, message by message;
+- /query and /query/batch answer rejected messages with source "guardrail".
+
+Run from the backend directory:
+    python benchmarks/bench_guardrails.py [--messages 100000 --batch 100]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import random
+import re
+import sys
+import time
+import warnings
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")
+
+from pydantic import BaseModel, ValidationError
+
+from guardrails import DietaryInput, GoalInput, InputGuardrails
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from pydantic import validator
+
+    class OldGoalInput(BaseModel):
+        description: str
+
+        @validator("description")
+        def validate_goal_format(cls, v):
+            pattern = r"(lose|gain|build|improve)\s+\d+\s*(kg|lbs|%|pounds)?\s*(in|within|for)\s+\d+\s*(weeks|months|days|years)"
+            if not re.search(pattern, v, re.IGNORECASE):
+                raise ValueError("Goal must be in format: [action] [amount] [unit] in [timeframe]. Example: 'lose 5kg in 2 months'")
+            return v
+
+    class OldDietaryInput(BaseModel):
+        preference: str
+
+        @validator("preference")
+        def validate_preference(cls, v):
+            valid_options = ["vegetarian", "vegan", "gluten-free", "dairy-free", "keto", "paleo", "mediterranean", "none"]
+            if v.lower() not in valid_options:
+                raise ValueError(f"Dietary preference must be one of: {', '.join(valid_options)}")
+            return v.lower()
+
+GOALS = ["lose 5kg in 2 months", "gain 3 kg within 10 weeks", "build 2 lbs for 6 weeks",
+         "improve 10% in 3 months", "get fit soon", "lose weight fast"]
+DIETS = ["Vegan", "keto", "mediterranean", "none", "carnivore", "Gluten-Free", "junk"]
+MESSAGES = ["beginner workout plan", "I want to lose 5kg in 2 months", "my diet is vegan, meal ideas?",
+            "knee pain\twhile  running", "show my progress", "log 5km run", "my diet is carnivore",
+            "what is the capital of france", " \x00 ", "x" * 600]
+
+
+def check_screening() -> None:
+    guardrails = InputGuardrails(max_length=500)
+    assert guardrails.check("knee pain\twhile \x07 running\n").text == "knee pain while running"
+    assert guardrails.check(" \x00\x01 ").rejection == guardrails.too_short
+    assert guardrails.check("x" * 501).rejection == guardrails.too_long
+    for message in ("my diet is carnivore", "my diet is bad, how can I improve it?",
+                    "my diet is mostly vegetables and rice"):
+        result = guardrails.check(message)
+        assert result.rejection is None and result.diet is None, result
+    result = guardrails.check("help me lose 5kg in 2 months")
+    assert result.rejection is None and result.goal.describe() == "lose 5 kg in 2 months"
+    assert guardrails.check("diet: Keto").diet.preference == "keto"
+    assert guardrails.check_batch(MESSAGES) == [guardrails.check(message) for message in MESSAGES]
+    off = InputGuardrails(enabled=False)
+    assert off.check(" \x00 ").rejection is None
+
+
+async def check_agent() -> None:
+    from agent import HealthWellnessAgent
+    from context import UserSessionContext
+
+    agent = HealthWellnessAgent(guardrails=InputGuardrails())
+    context = UserSessionContext()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert "must be one of" not in await agent.handle_message("my diet is bad, how can I improve it?", context)
+        assert "Keto Meal Plan" in await agent.handle_message("my diet is keto, meal plan?", context)
+        await agent.handle_message("I want to lose 5kg in 2 months", context)
+    assert context.diet_preferences == "keto"
+    assert context.goal.describe() == "lose 5 kg in 2 months"
+
+
+async def check_api() -> None:
+    import httpx
+    import fast_api
+
+    transport = httpx.ASGITransport(app=fast_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/query", params={"user_input": " \x07 "})
+        assert response.json()["source"] == "guardrail", response.json()
+        response = await client.post("/query/batch", json={"inputs": ["beginner workout plan", "  \x00  ",
+                                                                     "my diet is junk"]})
+        sources = [item["source"] for item in response.json()["results"]]
+        assert sources[:2] == ["local", "guardrail"] and sources[2] != "guardrail", sources
+
+
+def per_second(fn, items: list) -> float:
+    """Validations per second of fn over items (an invalid item counts as a validation)"""
+    start = time.perf_counter()
+    for item in items:
+        try:
+            fn(item)
+        except ValidationError:
+            pass
+    return len(items) / (time.perf_counter() - start)
+
+
+def batch_per_second(guardrails: InputGuardrails, items: List[str], size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(items), size):
+        guardrails.check_batch(items[i:i + size])
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    check_screening()
+    asyncio.run(check_agent())
+    asyncio.run(check_api())
+    print("checks passed: cleaning, rejections, goal/diet on the context, unknown diets pass, "
+          "batch == single, API source")
+
+    rng = random.Random(7)
+    goals = [rng.choice(GOALS) for _ in range(args.messages)]
+    diets = [rng.choice(DIETS) for _ in range(args.messages)]
+    messages = [rng.choice(MESSAGES) for _ in range(args.messages)]
+
+    print(f"{'validation':<26} {'before /s':>11} {'after /s':>11} {'speedup':>8}")
+    for name, old, new, items in (
+        ("GoalInput", lambda v: OldGoalInput(description=v), lambda v: GoalInput(description=v), goals),
+        ("DietaryInput", lambda v: OldDietaryInput(preference=v), lambda v: DietaryInput(preference=v), diets)
+    ):
+        before, after = per_second(old, items), per_second(new, items)
+        print(f"{name:<26} {before:>11,.0f} {after:>11,.0f} {after / before:>7.2f}x")
+
+    guardrails = InputGuardrails()
+    single = per_second(guardrails.check, messages)
+    batched = batch_per_second(guardrails, messages, args.batch)
+    print(f"{'screening, one by one':<26} {single:>11,.0f}")
+    print(f"{f'screening, batches of {args.batch}':<26} {batched:>11,.0f} {'':>11} {batched / single:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
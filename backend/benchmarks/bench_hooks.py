@@ -0,0 +1,111 @@
+"""
+Lifecycle-hook overhead: handle_message throughput over the local route
+mix with hooks disabled (the baseline), with a no-op subscriber and with
+RunHooks recording into the session logs. Every mode runs the same
+handle_message path (screening, routing, dispatch); the modes take turns
+over --repeat runs and the best run of each is reported. Also checks that
+concurrent messages each get a batch holding only their own events.
+
+Run from the backend directory:
+    python benchmarks/bench_hooks.py [--rounds 2000 --repeat 3]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")  # tracking queries log activities
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")  # schedule queries store check-in rules
+
+from bench_local_latency import ROUTE_QUERIES
+
+
+async def throughput(call, rounds: int) -> float:
+    from context import UserSessionContext
+
+    queries = list(ROUTE_QUERIES.values())
+    context = UserSessionContext()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            await call(query, context)
+    return rounds * len(queries) / (time.perf_counter() - start)
+
+
+async def check_concurrent(agent, hooks) -> None:
+    """Interleaved handle_message calls each flush exactly their own events"""
+    from context import UserSessionContext
+
+    batches = []
+
+    async def collect(events):
+        batches.append(events)
+
+    hooks.subscribe(collect)
+    contexts = [UserSessionContext() for _ in ROUTE_QUERIES]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(agent.handle_message(query, context)
+                                   for query, context in zip(ROUTE_QUERIES.values(), contexts)))
+    finally:
+        hooks.unsubscribe(collect)
+    assert len(batches) == len(contexts), [len(batch) for batch in batches]
+    for batch in batches:
+        assert len({id(event.context) for event in batch}) == 1, [event.event for event in batch]
+        assert batch[0].event == "agent_start" and batch[-1].event == "agent_end", [event.event for event in batch]
+    assert {id(batch[0].context) for batch in batches} == {id(context) for context in contexts}
+    print(f"concurrent messages: {len(batches)} batches, one per message; checks passed")
+
+
+async def main_async(rounds: int, repeat: int) -> None:
+    from agent import HealthWellnessAgent
+    from hooks import HookRegistry, RunHooks
+
+    logging.getLogger("hooks").setLevel(logging.WARNING)
+    hooks = HookRegistry()
+    agent = HealthWellnessAgent(hooks=hooks)
+    await check_concurrent(agent, hooks)
+    delivered = []
+
+    async def noop(events):
+        delivered.append(len(events))
+
+    def handle(query, context):
+        return agent.handle_message(query, context)
+
+    modes = {"hooks off": None, "no-op subscriber": noop, "RunHooks": RunHooks.deliver}
+    results = dict.fromkeys(modes, 0.0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        await throughput(handle, rounds // 10 or 1)  # warm up
+        for _ in range(repeat):
+            for mode, subscriber in modes.items():
+                if subscriber is not None:
+                    hooks.subscribe(subscriber)
+                assert hooks.enabled == (subscriber is not None)
+                results[mode] = max(results[mode], await throughput(handle, rounds))
+                if subscriber is not None:
+                    hooks.unsubscribe(subscriber)
+
+    baseline = results["hooks off"]
+    print(f"{'mode':<17} {'msg/s':>10} {'overhead':>9}")
+    for mode, rate in results.items():
+        print(f"{mode:<17} {rate:>10.0f} {(baseline / rate - 1) * 100:>8.1f}%")
+    print(f"events per message with hooks on: {sum(delivered) / len(delivered):.1f} (one batch each)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.rounds, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
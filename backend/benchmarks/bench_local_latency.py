@@ -0,0 +1,100 @@
+"""
+Local-path latency check: every local route must answer under a fixed
+threshold. Exits non-zero when any route's p99 is over the limit, so it
+can gate CI.
+
+One-off costs are paid before anything is timed, as a prewarmed worker
+pays them at startup: fast_api.warm_up() (router, OpenAI SDK, NumPy, plan
+index), then --warmup rounds of every route through the agent and /query
+(SQLite's first writes, first trends).
+
+Run from the backend directory:
+    python benchmarks/bench_local_latency.py [--threshold-ms 10 --warmup 20]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")  # tracking queries log activities
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")  # schedule queries store check-in rules
+
+import httpx
+
+ROUTE_QUERIES = {
+    "escalation": "i want to talk to a real person",
+    "injury": "my knee is in pain after running",
+    "nutrition": "diet advice for diabetes",
+    "schedule": "remind me on monday",
+    "tracking": "log workout done",
+    "progress": "show my progress",
+    "workout": "beginner workout please",
+    "meal": "vegan meal ideas",
+    "goal": "how do i build muscle"
+}
+
+
+def p99(samples):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+async def warm_up(fast_api, client: httpx.AsyncClient, rounds: int, threshold_ms: float) -> None:
+    """Imports, index builds and first writes, outside the timed loop"""
+    await asyncio.to_thread(fast_api.warm_up)
+    for _ in range(rounds):
+        for query in ROUTE_QUERIES.values():
+            await fast_api.agent.handle_message(query)
+            response = await client.post("/query", params={"user_input": query, "budget_ms": threshold_ms})
+            response.raise_for_status()
+
+
+async def run(rounds: int, warmup: int, threshold_ms: float) -> bool:
+    import fast_api
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    ok = True
+    transport = httpx.ASGITransport(app=fast_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await warm_up(fast_api, client, warmup, threshold_ms)
+        print(f"{'route':<11} {'agent p99 ms':>13} {'/query p99 ms':>14} {'over budget':>12}")
+        for route, query in ROUTE_QUERIES.items():
+            agent_samples, http_samples, over = [], [], 0
+            for _ in range(rounds):
+                start = time.perf_counter()
+                await fast_api.agent.handle_message(query)
+                agent_samples.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                response = await client.post(
+                    "/query", params={"user_input": query, "budget_ms": threshold_ms}
+                )
+                http_samples.append((time.perf_counter() - start) * 1000)
+                over += response.json()["budget_exceeded"]
+            route_ok = p99(agent_samples) < threshold_ms and p99(http_samples) < threshold_ms
+            ok &= route_ok
+            print(f"{route:<11} {p99(agent_samples):>13.3f} {p99(http_samples):>14.3f} "
+                  f"{over:>12}{'' if route_ok else '  FAIL'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20, help="untimed rounds of every route first")
+    parser.add_argument("--threshold-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.rounds, args.warmup, args.threshold_ms)):
+        raise SystemExit(f"local path slower than {args.threshold_ms} ms")
+    print(f"all local routes under {args.threshold_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
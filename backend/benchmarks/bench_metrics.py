@@ -0,0 +1,115 @@
+"""
+/metrics scrape check: drives synthetic load through /query (every local
+route, plus OpenAI fallbacks against a stub client that repeat so the cache
+answers some) and /query/batch, then scrapes /metrics. The scraped
+counters must match the traffic that was sent. Also reports the cost of
+recording one query.
+
+Run from the backend directory:
+    python benchmarks/bench_metrics.py [--rounds 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")  # tracking queries log activities
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")  # schedule queries store check-in rules
+
+import httpx
+
+from bench_local_latency import ROUTE_QUERIES
+from fake_openai import StubOpenAIClient
+from openai_client import UpstreamClient
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+FALLBACK_QUESTIONS = ["is coffee bad before cardio", "how much water per day",
+                      "are eggs healthy", "best time to stretch"]
+
+
+def parse(text: str) -> dict:
+    """{(name, frozenset(labels)): value} for every sample line"""
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            pairs = frozenset(re.findall(r'(\w+)="([^"]*)"', labels or ""))
+            samples[(name, pairs)] = float(value)
+    return samples
+
+
+def total(samples: dict, name: str, **labels) -> float:
+    wanted = set(labels.items())
+    return sum(v for (n, pairs), v in samples.items() if n == name and wanted <= pairs)
+
+
+async def main_async(rounds: int) -> None:
+    import fast_api
+    from rate_limit import FallbackLimiter
+    fast_api.limiter = FallbackLimiter.unlimited()  # measured without budgets
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stub = StubOpenAIClient(latency=0.01, completion_tokens=30)
+    fast_api.upstream = UpstreamClient(client=stub)
+
+    transport = httpx.ASGITransport(app=fast_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(rounds):
+                for query in ROUTE_QUERIES.values():
+                    await client.post("/query", params={"user_input": query})
+
+            fast_api.needs_openai_fallback = lambda response: True
+            await asyncio.gather(*(
+                client.post("/query", params={"user_input": FALLBACK_QUESTIONS[i % len(FALLBACK_QUESTIONS)]})
+                for i in range(rounds)
+            ))
+            await client.post("/query/batch", json={"inputs": ["protein after workout", "how much sleep"]})
+
+        scrape = await client.get("/metrics")
+
+    assert scrape.status_code == 200 and scrape.headers["content-type"].startswith("text/plain")
+    samples = parse(scrape.text)
+    local = total(samples, "health_queries_total", endpoint="/query", source="local", status="ok")
+    fallback = total(samples, "health_queries_total", endpoint="/query", source="openai") \
+        + total(samples, "health_queries_total", endpoint="/query", source="cache")
+    assert local == rounds * len(ROUTE_QUERIES), local
+    assert fallback == rounds, fallback
+    for route in ROUTE_QUERIES:
+        count = total(samples, "health_query_duration_seconds_count", endpoint="/query", route=route, source="local")
+        assert count == rounds, (route, count)
+    assert total(samples, "health_queries_total", endpoint="/query/batch") == 2
+    assert total(samples, "health_inflight_requests") == 0
+    completion = total(samples, "health_openai_tokens_total", kind="completion")
+    assert completion == stub.calls * stub.completion_tokens, (completion, stub.calls)
+
+    print(f"local /query: {local:.0f}   fallback /query: {fallback:.0f} "
+          f"(openai {total(samples, 'health_queries_total', endpoint='/query', source='openai'):.0f}, "
+          f"cache {total(samples, 'health_queries_total', endpoint='/query', source='cache'):.0f})")
+    print(f"upstream calls: {stub.calls}   completion tokens: {completion:.0f}")
+    print(f"scrape: {len(scrape.text.splitlines())} lines, {len(scrape.content)} bytes")
+
+    calls = 200_000
+    start = time.perf_counter()
+    for _ in range(calls):
+        fast_api.record_query("/query", "workout", "local", "ok", start)
+    print(f"record_query: {(time.perf_counter() - start) / calls * 1e9:.0f} ns per query")
+    print("metrics match the synthetic load")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Plan catalog: checks, then per-request cost as the catalog grows.
+
+Runs against a copy of catalog/ in a temporary directory, so files can be
+rewritten to exercise hot reload.
+
+Checks:
+- tables are read-only all the way down, and repeated lines are one
+  interned string;
+- requests never read the files; editing one reloads it on the next
+  background refresh: a new workout level is routed and answered, and a
+  stored goal plan is derived again;
+- a broken or unsupported file is logged and the loaded table kept,
+  then picked up once fixed;
+- msgpack files load the same as JSON (skipped without msgpack).
+
+Scale: workout tables of 3 to --plans levels written to disk and hot
+reloaded; reports load and router rebuild time, and what a workout
+request and a throttled refresh() cost at each size.
+
+Run from the backend directory:
+    python benchmarks/bench_plan_catalog.py [--plans 5000]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")
+CATALOG_COPY = tempfile.mkdtemp(prefix="plan-catalog-")
+shutil.copytree(os.path.join(BACKEND, "catalog"), CATALOG_COPY, dirs_exist_ok=True)
+os.environ["PLAN_CATALOG_DIR"] = CATALOG_COPY
+os.environ["PLAN_CATALOG_CHECK_SECONDS"] = "0"
+
+from plan_catalog import PlanCatalog, catalog
+
+
+def write_table(name: str, items: dict, version, format: int = 1) -> None:
+    """Rewrite a catalog file and move its mtime forward (some filesystems keep coarse mtimes)"""
+    path = os.path.join(CATALOG_COPY, f"{name}.json")
+    previous = os.stat(path).st_mtime_ns
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"format": format, "version": version, "items": items}, f, ensure_ascii=False)
+    os.utime(path, ns=(previous + 1_000_000_000, previous + 1_000_000_000))
+
+
+def original(name: str) -> dict:
+    with open(os.path.join(BACKEND, "catalog", f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)["items"]
+
+
+def check_frozen() -> None:
+    workouts, injuries = catalog.table("workouts"), catalog.table("injuries")
+    for mutate in (lambda: workouts.__setitem__("x", []), lambda: workouts["beginner"].append("x"),
+                   lambda: injuries["knee"].__setitem__("avoid", [])):
+        try:
+            mutate()
+        except (TypeError, AttributeError):
+            continue
+        raise AssertionError("catalog table was mutable")
+    assert injuries["ankle"]["alternatives"][2] is injuries["foot"]["alternatives"][2]  # "🪑 Seated exercises"
+
+
+async def check_reload() -> None:
+    from agent import HealthWellnessAgent
+    from context import UserSessionContext
+
+    agent = HealthWellnessAgent()
+    context = UserSessionContext()
+    await agent.handle_message("I want to lose 5kg in 2 months", context)
+    before = context.workout_plan["key"]
+
+    workouts = original("workouts")
+    workouts["expert"] = ["🏋️ **Strength**: Olympic lifts (5x3)", "⚡ **Conditioning**: Sled pushes (6x30m)"]
+    write_table("workouts", workouts, 2)
+    assert "Expert Workout Plan" not in await agent.handle_message("expert workout plan", UserSessionContext())
+    refresher = asyncio.ensure_future(catalog.refresh_forever())  # as the server runs it
+    await asyncio.sleep(0.3)
+    refresher.cancel()
+    answer = await agent.handle_message("expert workout plan", UserSessionContext())
+    assert "Expert Workout Plan" in answer, answer
+    assert catalog.table("workouts").content_version == 2
+    await agent.handle_message("my workout plan", context)
+    assert context.workout_plan["key"] != before  # derived again from the new table
+
+    errors = catalog.errors
+    path = os.path.join(CATALOG_COPY, "workouts.json")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("{ not json")
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 1_000_000_000,) * 2)
+    assert not catalog.refresh() and catalog.errors == errors + 1
+    assert "expert" in catalog.table("workouts")
+    write_table("workouts", workouts, 3, format=99)
+    assert not catalog.refresh() and catalog.errors == errors + 2
+    write_table("workouts", original("workouts"), 4)
+    assert catalog.refresh() and "expert" not in catalog.table("workouts")
+    answer = await agent.handle_message("expert workout plan", UserSessionContext())
+    assert "Expert Workout Plan" not in answer
+
+
+def check_msgpack() -> str:
+    try:
+        import msgpack
+    except ImportError:
+        return "msgpack not installed, skipped"
+    directory = tempfile.mkdtemp(prefix="plan-catalog-msgpack-")
+    for name in os.listdir(CATALOG_COPY):
+        with open(os.path.join(CATALOG_COPY, name), encoding="utf-8") as f, \
+                open(os.path.join(directory, name[:-5] + ".msgpack"), "wb") as out:
+            out.write(msgpack.packb(json.load(f), use_bin_type=True))
+    packed = PlanCatalog(directory)
+    assert dict(packed.table("injuries")) == dict(catalog.table("injuries"))
+    shutil.rmtree(directory)
+    return "msgpack loads the same"
+
+
+def generated_workouts(count: int) -> dict:
+    workouts = original("workouts")
+    for i in range(count - len(workouts)):
+        workouts[f"program{i:05d}"] = [f"🏋️ **Strength**: Circuit {i % 40} (3x{8 + i % 5})",
+                                       "🧘 **Flexibility**: Daily stretching (10 mins)",
+                                       f"🏃 **Cardio**: Intervals {i % 12} (3x/week)"]
+    return workouts
+
+
+async def request_cost(agent, repeat: int) -> float:
+    from context import UserSessionContext
+
+    context = UserSessionContext()
+    await agent.handle_message("beginner workout plan", context)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await agent.handle_message("beginner workout plan", context)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+async def scale(args) -> None:
+    from agent import HealthWellnessAgent
+
+    agent = HealthWellnessAgent()
+    sizes = sorted({3, 100, 1000, args.plans})
+    print(f"{'plans':>6} {'file KB':>8} {'reload ms':>10} {'router ms':>10} {'request µs':>11} {'refresh µs':>11}")
+    for size in sizes:
+        write_table("workouts", generated_workouts(size), size)
+        start = time.perf_counter()
+        assert catalog.refresh()
+        reload_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        agent.classify("beginner workout plan")  # rebuilds the router for the new table
+        router_ms = (time.perf_counter() - start) * 1000
+        assert agent.classify(f"program{size - 4:05d} workout").sub_intent == f"program{size - 4:05d}" or size <= 3
+
+        catalog.check_seconds = 2.0  # the default: a clock read between checks
+        request_us = await request_cost(agent, args.repeat)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            catalog.refresh()
+        refresh_us = (time.perf_counter() - start) / args.repeat * 1e6
+        catalog.check_seconds = 0
+        size_kb = os.path.getsize(os.path.join(CATALOG_COPY, "workouts.json")) / 1024
+        print(f"{size:>6} {size_kb:>8.0f} {reload_ms:>10.1f} {router_ms:>10.1f} {request_us:>11.1f} {refresh_us:>11.2f}")
+    write_table("workouts", original("workouts"), 1)
+    catalog.refresh()
+
+
+async def run(args) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        check_frozen()
+        await check_reload()
+    print(f"checks passed: read-only interned tables, hot reload (routing, answers, stored plans), "
+          f"broken files kept out; {check_msgpack()}")
+    await scale(args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plans", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+    logging.getLogger("plan_catalog").setLevel(logging.CRITICAL)  # the broken-file checks log errors
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(CATALOG_COPY)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Plan search: checks, then top-k latency on a generated catalog of 50k
+exercises and meals.
+
+Checks:
+- "vegan high-protein dinner" and "knee-safe beginner cardio" find the
+  vegan dinner and the beginner cardio; a knee drops the lines its
+  "avoid" list names (jumps), and constraints that exclude each other
+  find nothing;
+- levels and diets are found by term ("beginners" -> beginner), and
+  table words by their stem ("training", "recipes");
+- a catalog reload rebuilds the index;
+- "find ..." messages are answered by the agent from the index;
+- on the generated catalog the index returns the same top k as a
+  brute-force scan computing the same BM25 scores line by line.
+
+Then p50/p99 per query for the index against that scan (what looping
+over every plan costs at this size); exits non-zero when a query's p50
+misses the target.
+
+Run from the backend directory:
+    python benchmarks/bench_plan_search.py [--items 50000 --k 5 --target-ms 1]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")
+
+from plan_catalog import catalog
+from tools import plan_search
+from tools.meal_planner import DIET_PLANS, identify_diet
+from tools.plan_search import B, GENERIC_TERMS, K1, PlanIndex, current_index, tokenize
+from tools.workout_recommender import identify_workout_level
+
+QUERIES = ["vegan high-protein dinner", "knee-safe beginner cardio", "keto breakfast with eggs",
+           "quick low-carb lunch", "advanced hiit sprints", "wrist-friendly strength", "salmon",
+           "tofu stir-fry", "gluten-free snack with berries", "intermediate mobility",
+           "diabetes-friendly dinner", "beginner workout"]
+
+WORKOUT_LABELS = {
+    "Strength": ["squats", "push-ups", "deadlifts", "dumbbell rows", "lunges", "pull-ups", "bench press",
+                 "kettlebell swings", "glute bridges", "overhead press"],
+    "Cardio": ["brisk walking", "jogging", "cycling", "swimming", "rowing", "running intervals",
+               "stair climbing", "elliptical", "dance cardio"],
+    "Mobility": ["hip openers", "dynamic stretches", "foam rolling", "band pull-aparts", "ankle circles"],
+    "HIIT": ["sprints", "burpees", "mountain climbers", "jump squats", "battle ropes", "tabata rounds"],
+    "Flexibility": ["yoga flow", "hamstring stretches", "pilates", "daily stretching"],
+    "Plyometrics": ["box jumps", "skater hops", "tuck jumps", "lateral bounds"]
+}
+WORKOUT_STYLES = ["low-impact", "bodyweight", "quick", "high-intensity", "steady", "partner", "outdoor", "gentle"]
+MEAL_LABELS = ["Breakfast", "Lunch", "Dinner", "Snack"]
+PROTEINS = ["tofu", "tempeh", "chickpeas", "lentils", "black beans", "eggs", "chicken", "salmon", "turkey",
+            "greek yogurt", "cottage cheese", "seitan", "edamame", "shrimp"]
+BASES = ["salad", "bowl", "wrap", "stir-fry", "curry", "soup", "omelette", "oats", "toast", "smoothie", "tacos"]
+SIDES = ["spinach", "avocado", "broccoli", "sweet potatoes", "quinoa", "brown rice", "berries", "asparagus",
+         "peppers", "zucchini", "cauliflower rice", "honey", "white bread", "mushrooms"]
+MEAL_STYLES = ["high-protein", "low-carb", "quick", "one-pot", "spicy", "meal-prep", "light", "hearty"]
+
+
+def generated_catalog(items: int, seed: int = 5) -> dict:
+    """Half exercises, half meals; most lines under the real levels and diets, the rest spread over 200 programs each"""
+    rng = random.Random(seed)
+    workouts = {level: [] for level in ("beginner", "intermediate", "advanced")}
+    diets = {diet: [] for diet in DIET_PLANS}
+    for i in range(items // 2):
+        level = rng.choice(list(workouts)[:3]) if rng.random() < 0.6 else f"program-{rng.randrange(200):03d}"
+        label = rng.choice(list(WORKOUT_LABELS))
+        workouts.setdefault(level, []).append(
+            f"🏋️ **{label}**: {rng.choice(WORKOUT_STYLES).capitalize()} {rng.choice(WORKOUT_LABELS[label])} "
+            f"({rng.randint(2, 5)}x{rng.randint(6, 20)}), {rng.choice(WORKOUT_LABELS[label])} {rng.randint(10, 40)} mins")
+        diet = rng.choice(list(DIET_PLANS)) if rng.random() < 0.6 else f"diet-{rng.randrange(200):03d}"
+        diets.setdefault(diet, []).append(
+            f"🍽️ **{rng.choice(MEAL_LABELS)}**: {rng.choice(MEAL_STYLES).capitalize()} {rng.choice(PROTEINS)} "
+            f"{rng.choice(BASES)} with {rng.choice(SIDES)} and {rng.choice(SIDES)}")
+    return {"workouts": workouts, "diets": diets}
+
+
+def advice_tables() -> dict:
+    return {name: catalog.table(name) for name in plan_search.AVOID_TABLES}
+
+
+class LinearSearch:
+    """Every line scored against the query in turn: the same BM25 and constraints, no index"""
+
+    def __init__(self, plans: dict, avoid: dict):
+        self.lines = []
+        for table, groups in plans.items():
+            for key, lines in groups.items():
+                for line in lines:
+                    label = plan_search._LABEL.search(line)
+                    terms = tokenize(line)
+                    self.lines.append((table, plan_search._name_term(key),
+                                       plan_search._name_term(label.group(1)) if label else None,
+                                       Counter(terms), len(terms), line))
+        self.df = Counter(term for line in self.lines for term in line[3])
+        self.average = sum(line[4] for line in self.lines) / len(self.lines)
+        self.keys = {line[1] for line in self.lines}
+        self.labels = {line[2] for line in self.lines} - {None}
+        self.tables = {plan_search.stem(word): table
+                       for table, words in plan_search.TABLE_WORDS.items() for word in words}
+        self.avoid = {plan_search._name_term(name): [set(tokenize(phrase)) - GENERIC_TERMS
+                                                     for phrase in entry["avoid"]]
+                      for advice in avoid.values() for name, entry in advice.items()}
+
+    def search(self, query: str, k: int) -> list:
+        terms = list(dict.fromkeys(tokenize(query)))
+        keys = {t for t in terms if t in self.keys}
+        labels = {t for t in terms if t in self.labels and t not in keys}
+        tables = {self.tables[t] for t in terms if t in self.tables and t not in keys | labels}
+        facets = keys | labels | set(t for t in terms if t in self.tables and t not in keys | labels)
+        avoid = [phrase for t in terms if t not in facets and t in self.avoid for phrase in self.avoid[t]]
+        scored = [t for t in terms if t not in facets and t not in self.avoid and t in self.df]
+        if not (facets or avoid or scored):
+            return []
+        results = []
+        for i, (table, key, label, counts, length, _) in enumerate(self.lines):
+            if keys and key not in keys or labels and label not in labels or tables and table not in tables:
+                continue
+            if any(phrase and all(t in counts for t in phrase) for phrase in avoid):
+                continue
+            score = 0.0
+            for t in scored:
+                tf = counts.get(t)
+                if tf:
+                    idf = math.log(1 + (len(self.lines) - self.df[t] + 0.5) / (self.df[t] + 0.5))
+                    score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / self.average))
+            if score > 0 or not scored or facets or avoid:
+                results.append((-score, i))
+        results.sort()
+        return [(-score, i) for score, i in results[:k]]
+
+
+def check_catalog() -> None:
+    index = current_index()
+    [hit] = index.search("vegan high-protein dinner", 5)
+    assert hit.doc.key == "vegan" and hit.doc.label == "Dinner", hit
+    [hit] = index.search("knee-safe beginner cardio", 5)
+    assert hit.doc.key == "beginner" and "walking" in hit.doc.text, hit
+    assert any("jumps" in hit.doc.text for hit in index.search("advanced", 5))
+    assert not any("jumps" in hit.doc.text for hit in index.search("knee-safe advanced", 5))
+    assert index.search("vegan workout", 5) == [] and index.search("the of and", 5) == []
+    assert [hit.doc.key for hit in index.search("salmon", 5)] == ["keto", "gluten-free"]
+    for word in ("training", "workouts", "exercises", "recipes", "meals"):  # table words, stemmed as queries are
+        table = "diets" if word in ("recipes", "meals") else "workouts"
+        hits = index.search(f"{word} with spinach", 10)
+        assert hits and all(hit.doc.table == table for hit in hits), (word, hits)
+
+    assert identify_workout_level("Beginners workout please") == "beginner"
+    assert identify_workout_level("advanced or beginner workout") == "beginner"  # table order, as the router
+    assert identify_diet("a Gluten-Free meal") == "gluten-free"
+    assert identify_diet("a meal") == "unknown"
+
+    diets = catalog.table("diets")
+    original = dict(diets)
+    diets.replace({**original, "paleo": ["🥩 **Dinner**: Grass-fed steak with roasted roots"]})
+    try:
+        assert current_index() is not index
+        assert current_index().search("paleo dinner", 5)[0].doc.key == "paleo"
+        assert identify_diet("paleo meal") == "paleo"
+    finally:
+        diets.replace(original)
+
+
+async def check_agent() -> None:
+    from agent import HealthWellnessAgent
+
+    agent = HealthWellnessAgent()
+    assert agent.classify("find vegan high-protein dinner").route == "search"
+    assert agent.classify("search my progress").route == "progress"
+    with contextlib.redirect_stdout(io.StringIO()):
+        answer = await agent.handle_message("find knee-safe beginner cardio")
+    assert "Brisk walking" in answer and "Beginner workout plan" in answer, answer
+
+
+def timings(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--target-ms", type=float, default=1.0, help="p50 per query")
+    args = parser.parse_args()
+
+    check_catalog()
+    asyncio.run(check_agent())
+
+    plans = generated_catalog(args.items)
+    start = time.perf_counter()
+    index = PlanIndex(plans, advice_tables())
+    build = time.perf_counter() - start
+    linear = LinearSearch(plans, advice_tables())
+    for query in QUERIES:
+        expected = linear.search(query, args.k)
+        got = [(hit.score, index.docs.index(hit.doc)) for hit in index.search(query, args.k)]
+        assert [i for _, i in got] == [i for _, i in expected], (query, got, expected)
+        assert all(math.isclose(a, b, abs_tol=1e-9) for (a, _), (b, _) in zip(got, expected)), query
+    print("checks passed: constrained queries, avoid lists, level/diet lookup, reload, agent route, "
+          "same top k as a full scan")
+
+    postings = sum(ids.nbytes + weights.nbytes for ids, weights in index._postings.values())
+    print(f"{len(index)} lines, {len(index._postings)} terms, postings {postings / 2**20:.1f} MiB, "
+          f"built in {build * 1000:.0f} ms")
+    print(f"{'query':<32} {'hits':>4} {'p50 µs':>8} {'p99 µs':>8} {'scan µs':>9}")
+    missed = []
+    for query in QUERIES:
+        hits = len(index.search(query, args.k))
+        samples = timings(lambda: index.search(query, args.k), args.repeat)
+        p50, p99 = samples[len(samples) // 2] / 1000, samples[int(len(samples) * 0.99)] / 1000
+        scan = timings(lambda: linear.search(query, args.k), 3)[1] / 1000
+        print(f"{query:<32} {hits:>4} {p50:>8.0f} {p99:>8.0f} {scan:>9.0f}")
+        if p50 > args.target_ms * 1000:
+            missed.append(query)
+    if missed:
+        raise SystemExit(f"p50 over {args.target_ms} ms for: {', '.join(missed)}")
+    print(f"target met: every query's p50 under {args.target_ms} ms with {len(index)} lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Progress analytics: NumPy column operations vs a pure-Python baseline
+(loops over a dict of days) on years of daily data for one user. Both
+compute the same full-history outputs:
+- 7- and 30-day moving averages of weight (missing days skipped);
+- weekly workout counts and monthly weight averages (downsampling);
+- 7-day rolling meal adherence;
+- the weight slope over the whole history;
+and the results are checked to agree. "numpy ms" includes building the
+arrays from the daily rows; "compute ms" is the column operations alone.
+
+Also checks that the pure-Python trends served while NumPy loads
+(tools/progress_trends.py) match the NumPy ones on 90-day windows.
+
+Run from the backend directory:
+    python benchmarks/bench_progress_analytics.py [--years 1 3 10]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from tools.progress_analytics import ProgressSeries, rolling_mean, rolling_sum, slope_per_day, trends
+from tools.progress_trends import daily_trends
+
+
+def daily_rows(days: int, seed: int = 4) -> list:
+    """(day, kind, name, count, value) rows as ActivityStore.daily returns them"""
+    rng = random.Random(seed)
+    rows, weight = [], 90.0
+    for day in range(days):
+        if rng.random() < 0.55:
+            rows.append((day, "workout", "", rng.randint(1, 2), None))
+        rows.append((day, "meal", "", rng.randint(0, 4), None))
+        if rng.random() < 0.4:
+            weight += rng.uniform(-0.3, 0.2)
+            rows.append((day, "measurement", "weight", 1, round(weight, 1)))
+    return rows
+
+
+def vectorized(rows: list, days: int) -> dict:
+    return compute(ProgressSeries.from_daily(rows, 0, days - 1))
+
+
+def compute(series: ProgressSeries) -> dict:
+    weight = series.measurements["weight"]
+    weekly = series.downsample(7)
+    monthly = series.downsample(30)
+    return {
+        "ma7": rolling_mean(weight, 7),
+        "ma30": rolling_mean(weight, 30),
+        "weekly_workouts": weekly.workouts,
+        "monthly_weight": monthly.measurements["weight"],
+        "adherence7": rolling_sum(np.minimum(series.meals, 3), 7) / 21,
+        "slope": slope_per_day(weight)
+    }
+
+
+def pure_python(rows: list, days: int) -> dict:
+    by_day = {}
+    for day, kind, name, count, value in rows:
+        entry = by_day.setdefault(day, {"workout": 0, "meal": 0, "weight": None})
+        if kind == "measurement":
+            entry["weight"] = value
+        else:
+            entry[kind] += count
+
+    def moving_average(window):
+        out = []
+        for day in range(days):
+            values = [by_day[d]["weight"] for d in range(max(0, day - window + 1), day + 1)
+                      if d in by_day and by_day[d]["weight"] is not None]
+            out.append(sum(values) / len(values) if values else math.nan)
+        return out
+
+    def buckets(size):
+        start = days % size
+        return [range(first, first + size) for first in range(start, days, size)]
+
+    weekly = [sum(by_day.get(d, {}).get("workout", 0) for d in bucket) for bucket in buckets(7)]
+    monthly = []
+    for bucket in buckets(30):
+        values = [by_day[d]["weight"] for d in bucket if d in by_day and by_day[d]["weight"] is not None]
+        monthly.append(sum(values) / len(values) if values else math.nan)
+    adherence = []
+    for day in range(days):
+        eaten = sum(min(by_day.get(d, {}).get("meal", 0), 3) for d in range(max(0, day - 6), day + 1))
+        adherence.append(eaten / 21)
+
+    points = [(d, by_day[d]["weight"]) for d in range(days) if d in by_day and by_day[d]["weight"] is not None]
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    slope = (sum((x - mean_x) * (y - mean_y) for x, y in points)
+             / sum((x - mean_x) ** 2 for x, _ in points))
+    return {
+        "ma7": moving_average(7), "ma30": moving_average(30), "weekly_workouts": weekly,
+        "monthly_weight": monthly, "adherence7": adherence, "slope": slope
+    }
+
+
+def check_daily_trends() -> None:
+    rows = daily_rows(400, seed=9)
+    rows.append((390, "measurement", "waist", 1, 81.5))
+    for start_day, end_day in ((310, 399), (0, 89), (380, 469), (395, 399), (500, 589)):
+        window = [row for row in rows if start_day <= row[0] <= end_day]
+        fast = trends(ProgressSeries.from_daily(window, start_day, end_day))
+        slow = daily_trends(window, start_day, end_day)
+        assert fast._replace(measurements_avg={}) == slow._replace(measurements_avg={}), (start_day, fast, slow)
+        assert fast.measurements_avg == slow.measurements_avg, (start_day, fast, slow)
+
+
+def timed(fn, *args, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3, 10])
+    args = parser.parse_args()
+
+    check_daily_trends()
+    print("pure-Python trends match the NumPy ones")
+    print(f"{'years':>5} {'days':>6} {'python ms':>10} {'numpy ms':>9} {'speedup':>8} {'compute ms':>11}")
+    for years in args.years:
+        days = years * 365
+        rows = daily_rows(days)
+        fast, slow = vectorized(rows, days), pure_python(rows, days)
+        for key in fast:
+            assert np.allclose(np.asarray(fast[key], dtype=float), np.asarray(slow[key], dtype=float),
+                               equal_nan=True), key
+        python_ms = timed(pure_python, rows, days, repeat=3)
+        numpy_ms = timed(vectorized, rows, days, repeat=20)
+        compute_ms = timed(compute, ProgressSeries.from_daily(rows, 0, days - 1), repeat=100)
+        print(f"{years:>5} {days:>6} {python_ms:>10.2f} {numpy_ms:>9.2f} {python_ms / numpy_ms:>7.1f}x "
+              f"{compute_ms:>11.3f}")
+    print("vectorized results match the pure-Python baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Fallback budgets under bursty traffic, against a stub OpenAI client:
+- bucket arithmetic with a fake clock (burst, refill, daily tokens);
+- a concurrent burst admits exactly the burst size (no overshoot);
+- with the SQLite backend, worker processes sharing one table admit the
+  burst once between them, not once each, and an acquire that finds the
+  table locked is refused within ~10 ms (a settle is deferred, not lost);
+- bursts from several sessions through /query: upstream calls stay within
+  the budgets and the rest get cached or local answers, never an error;
+- acquire cost with 10 vs 100k tracked sessions (O(1) accounting), and
+  with the shared SQLite table.
+
+Run from the backend directory:
+    python benchmarks/bench_rate_limit.py
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+
+from fake_openai import StubOpenAIClient
+from openai_client import UpstreamClient
+from rate_limit import FallbackLimiter, SharedFallbackLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def bucket_arithmetic() -> None:
+    clock = FakeClock()
+    limiter = FallbackLimiter(session_rps=2, session_burst=5, global_rps=0,
+                              session_tokens_per_day=1000, global_tokens_per_day=0, clock=clock)
+    burst = [limiter.acquire("a", 10) for _ in range(20)]
+    assert burst.count(None) == 5 and burst[5] == "session_requests", burst
+    assert limiter.acquire("b", 10) is None  # other sessions keep their own budget
+    clock.now += 1.0
+    assert [limiter.acquire("a", 10) for _ in range(3)].count(None) == 2  # 2 requests/s refill
+
+    for _ in range(7):
+        limiter.settle("a", 10, 150)  # calls cost more than reserved
+    clock.now += 100.0
+    assert limiter.acquire("a", 10) == "session_tokens"
+    clock.now += FallbackLimiter.DAY
+    assert limiter.acquire("a", 10) is None  # daily budget refilled
+    print("bucket arithmetic: burst 5 then 2/s refill, daily token budget exhausted and refilled")
+
+
+async def concurrent_burst() -> None:
+    limiter = FallbackLimiter(session_rps=0, global_rps=10, global_burst=50, session_tokens_per_day=0,
+                              global_tokens_per_day=0)
+
+    async def attempt() -> bool:
+        await asyncio.sleep(0)
+        return limiter.acquire(None, 1) is None
+
+    admitted = sum(await asyncio.gather(*(attempt() for _ in range(1000))))
+    print(f"concurrent burst: {admitted} of 1000 admitted with a burst of 50")
+    assert 50 <= admitted <= 51  # one more may refill while the burst runs
+
+
+def shared_attempts(path: str, attempts: int, admitted) -> None:
+    limiter = SharedFallbackLimiter(path, session_rps=1, session_burst=5, global_rps=0.01, global_burst=20,
+                                    session_tokens_per_day=0, global_tokens_per_day=0)
+    count = sum(limiter.acquire(f"user-{i % 2}", 1) is None for i in range(attempts))
+    with admitted.get_lock():
+        admitted.value += count
+
+
+def shared_contention() -> None:
+    """While another worker holds the write lock: acquire refuses fast, settle is kept for later"""
+    path = os.path.join(tempfile.mkdtemp(prefix="fallback-limits-"), "limits.db")
+    clock = FakeClock()
+    limiter = SharedFallbackLimiter(path, session_rps=0, global_rps=0, session_tokens_per_day=1000,
+                                    global_tokens_per_day=0, clock=clock)
+    assert limiter.acquire("a", 600) is None
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    assert limiter.acquire("a", 100) == "contention"
+    waited = time.perf_counter() - start
+    limiter.settle("a", 600, 100)  # refunds 500 once the lock is free
+    other.execute("ROLLBACK")
+    assert limiter.acquire("a", 800) is None  # 400 left + the deferred 500 refund
+    print(f"shared contention: acquire refused after {waited * 1000:.0f} ms with the lock held, settle deferred")
+    assert waited < 0.1
+    assert limiter.rejected == {"contention": 1}
+
+
+def shared_workers(workers: int = 4) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="fallback-limits-"), "limits.db")
+    clock = FakeClock()
+    first = SharedFallbackLimiter(path, session_rps=1, session_burst=5, global_rps=0, session_tokens_per_day=1000,
+                                  global_tokens_per_day=0, clock=clock)
+    second = SharedFallbackLimiter(path, session_rps=1, session_burst=5, global_rps=0, session_tokens_per_day=1000,
+                                   global_tokens_per_day=0, clock=clock)
+    assert [(first, second)[i % 2].acquire("a", 10) for i in range(8)].count(None) == 5
+    clock.now += 2
+    assert [second.acquire("a", 10) for _ in range(3)].count(None) == 2  # 1 request/s refill, seen by both
+    second.settle("a", 10, 990)
+    clock.now += 1
+    assert first.acquire("a", 10) == "session_tokens"  # spent through the other worker
+
+    admitted = multiprocessing.Value("i", 0)
+    processes = [multiprocessing.Process(target=shared_attempts, args=(path + ".burst", 50, admitted))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    print(f"shared buckets: {workers} processes x 50 attempts -> {admitted.value} admitted "
+          f"(sessions burst 5 each, global burst 20)")
+    assert admitted.value == 10  # two sessions' bursts, once across every worker
+
+
+async def bursty_sessions(sessions: int, burst: int) -> None:
+    import fast_api
+    from fallback_cache import FallbackCache
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stub = StubOpenAIClient(latency=0.02, completion_tokens=60)
+    fast_api.upstream = UpstreamClient(client=stub)
+    fast_api.fallback_cache = FallbackCache(similarity_threshold=None)  # similar matches only when limited
+    fast_api.needs_openai_fallback = lambda response: True
+    fast_api.limiter = FallbackLimiter(session_rps=1, session_burst=3, global_rps=5, global_burst=8,
+                                       session_tokens_per_day=2000, global_tokens_per_day=100000)
+
+    transport = httpx.ASGITransport(app=fast_api.app)
+    sources, statuses = Counter(), Counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def ask(session: int, i: int) -> None:
+            response = await client.post(
+                "/query", params={"user_input": f"question {i} from user {session} about sleep"},
+                headers={"X-Session-ID": f"user-{session}"}
+            )
+            statuses[response.status_code] += 1
+            sources[response.json()["source"]] += 1
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for wave in range(3):
+                await asyncio.gather(*(ask(s, wave * burst + i) for s in range(sessions) for i in range(burst)))
+                await asyncio.sleep(1.0)
+
+    sent = 3 * sessions * burst
+    print(f"bursty /query: {sent} fallbacks from {sessions} sessions in 3 waves -> "
+          f"{stub.calls} upstream calls; sources {dict(sources)}; HTTP {dict(statuses)}")
+    print(f"               limiter: {fast_api.limiter.stats()['rejected']}")
+    assert statuses == Counter({200: sent})
+    assert stub.calls <= 8 + 3 * 5  # global burst plus ~2 s of refill
+    assert sources["openai"] == stub.calls
+
+
+def acquire_cost() -> None:
+    for tracked in (10, 100_000):
+        limiter = FallbackLimiter(session_burst=1e9, global_burst=1e9, max_sessions=tracked)
+        ids = [f"session-{i}" for i in range(tracked)]
+        for session_id in ids:
+            limiter.acquire(session_id, 1)
+        start = time.perf_counter()
+        calls = 200_000
+        for i in range(calls):
+            limiter.acquire(ids[i % tracked], 1)
+        print(f"acquire with {tracked:>7} sessions: {(time.perf_counter() - start) / calls * 1e9:.0f} ns")
+    limiter = SharedFallbackLimiter(os.path.join(tempfile.mkdtemp(prefix="fallback-limits-"), "limits.db"),
+                                    session_burst=1e9, global_burst=1e9)
+    start = time.perf_counter()
+    for i in range(2000):
+        limiter.acquire(f"session-{i % 100}", 1)
+    print(f"shared (SQLite) acquire: {(time.perf_counter() - start) / 2000 * 1e6:.0f} µs")
+
+
+async def main_async(sessions: int, burst: int) -> None:
+    bucket_arithmetic()
+    await concurrent_burst()
+    shared_workers()
+    shared_contention()
+    await bursty_sessions(sessions, burst)
+    acquire_cost()
+    print("all rate limit checks passed")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=6, help="requests per session per wave")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.sessions, args.burst))
+
+
+if __name__ == "__main__":
+    main()
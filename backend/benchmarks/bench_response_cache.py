@@ -0,0 +1,73 @@
+"""
+Per-request allocations for the deterministic local answers: rendering on
+every call (the old behaviour) vs serving from the precomputed tables.
+
+Run from the backend directory:
+    python benchmarks/bench_response_cache.py [--calls 10000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.injury_support_agent import InjurySupportAgent
+from agents.nutrition_expert_agent import NutritionExpertAgent
+from tools import meal_planner, workout_recommender
+
+
+def routes():
+    injury, nutrition = InjurySupportAgent(), NutritionExpertAgent()
+    return {
+        "workout": (workout_recommender.WORKOUT_PLANS, workout_recommender._render_workout_plan,
+                    workout_recommender.WORKOUT_RESPONSES),
+        "meal": (meal_planner.DIET_PLANS, meal_planner._render_meal_plan,
+                 meal_planner.DIET_RESPONSES),
+        "injury": (injury.injury_modifications, injury._render_injury_advice,
+                   injury.advice_responses),
+        "nutrition": (nutrition.dietary_conditions, nutrition._render_condition_advice,
+                      nutrition.advice_responses)
+    }
+
+
+def allocations(fn, keys, calls: int):
+    """Blocks/bytes still held per call (results are kept alive) and calls/sec"""
+    results = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    for i in range(calls):
+        results.append(fn(keys[i % len(keys)]))
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in diff)
+    size = sum(stat.size_diff for stat in diff)
+    # The results list itself is bookkeeping, not a per-request allocation
+    list_bytes = sys.getsizeof(results)
+    return blocks / calls, (size - list_bytes) / calls, calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'route':<10} {'mode':<8} {'blocks/call':>12} {'bytes/call':>11} {'calls/s':>12}")
+    for route, (source, render, table) in routes().items():
+        keys = list(source)
+        for mode, fn in (("render", lambda key: render(key, source[key])), ("lookup", table.get)):
+            blocks, size, rate = allocations(fn, keys, args.calls)
+            print(f"{route:<10} {mode:<8} {blocks:>12.2f} {size:>11.1f} {rate:>12,.0f}")
+
+        # Replacing the table's content must invalidate the precomputed text
+        key = keys[0]
+        source.replace(dict(source))
+        assert table.get(key) == render(key, source[key])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Micro-benchmark: cascaded keyword scans vs the compiled IntentRouter,
+and the extra cost of scoring the match (agent.classify).
+
+Run from the backend directory:
+    python benchmarks/bench_router.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent import HealthWellnessAgent, Intent
+from tools.goal_analyzer import identify_goal_type
+from tools.meal_planner import DIET_PLANS
+from tools.workout_recommender import WORKOUT_PLANS
+
+FILLER = ["please", "can you help", "i want", "what about", "this week", "my", "the", "today"]
+OFF_TOPIC = ["what is the capital of france", "tell me a joke", "how tall is everest"]
+
+# The command table the cascade was written against; routes added since
+# (the leading-keyword "search") are checked separately in main()
+BASELINE_COMMANDS = {
+    "schedule": ["monday", "check-in", "remind", "schedule"],
+    "tracking": ["track ", "log "],
+    "progress": ["progress", "stats", "how am i doing"],
+    "workout": ["workout", "exercise", "train", "gym"],
+    "meal": ["meal", "diet", "food", "nutrition"]
+}
+SEARCH_CHECKS = {
+    "find vegan high-protein dinner": "search",
+    "search knee-safe beginner cardio": "search",
+    "i find it hard to stick to a diet, any food tips?": "meal",
+    "can you find me a beginner workout": "workout",
+    "where can i find a gym": "workout",
+    "search my progress": "progress"
+}
+
+
+def _first_key(table, input_lower: str) -> str:
+    """The pre-index level/diet lookup: a substring test per table key"""
+    for key in table:
+        if key in input_lower:
+            return key
+    return "unknown"
+
+
+def legacy_classify(agent: HealthWellnessAgent, input: str) -> Intent:
+    """The pre-router cascade: one `any(kw in text)` sweep per table"""
+    input_lower = input.lower()
+    for agent_type, triggers in agent.handoff_triggers.items():
+        if any(trigger in input_lower for trigger in triggers):
+            if agent_type == "escalation":
+                if agent.escalation_agent.should_escalate(input):
+                    return Intent("escalation")
+                break
+            if agent_type == "injury":
+                return Intent("injury", agent.injury_support_agent._identify_injury_type(input))
+            return Intent("nutrition", agent.nutrition_expert_agent._identify_dietary_condition(input))
+    for name, keywords in BASELINE_COMMANDS.items():
+        if any(kw in input_lower for kw in keywords):
+            if name == "tracking":
+                return Intent(name, "log" if input_lower.startswith("log ") else "track")
+            if name == "workout":
+                return Intent(name, _first_key(WORKOUT_PLANS, input_lower))
+            if name == "meal":
+                return Intent(name, _first_key(DIET_PLANS, input_lower))
+            return Intent(name)
+    return Intent("goal", identify_goal_type(input_lower))
+
+
+def build_corpus(agent: HealthWellnessAgent, size: int, seed: int = 7) -> list:
+    keywords = sorted(_keywords(agent))
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.1:
+            corpus.append(rng.choice(OFF_TOPIC))
+            continue
+        words = rng.sample(keywords, rng.randint(1, 3)) + rng.sample(FILLER, 3)
+        rng.shuffle(words)
+        corpus.append(" ".join(words).capitalize())
+    return corpus
+
+
+def _keywords(agent: HealthWellnessAgent) -> set:
+    tables = [agent.handoff_triggers, agent.injury_support_agent.INJURY_KEYWORDS,
+              agent.nutrition_expert_agent.CONDITION_KEYWORDS]
+    words = {kw for table in tables for kws in table.values() for kw in kws}
+    words.update(kw for kws in BASELINE_COMMANDS.values() for kw in kws)
+    words.update(agent.escalation_agent.ESCALATION_KEYWORDS)
+    words.update(agent.router.groups["workout"] + agent.router.groups["meal"])
+    return words
+
+
+def measure(fn, corpus, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in corpus:
+            fn(message)
+    return rounds * len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    agent = HealthWellnessAgent()
+    corpus = build_corpus(agent, 5000)
+
+    mismatches = [m for m in corpus if legacy_classify(agent, m)[:2] != agent.classify(m)[:2]]
+    if mismatches:
+        raise SystemExit(f"Routing differs for {len(mismatches)} messages, e.g. {mismatches[0]!r}")
+    wrong = {m: agent.classify(m).route for m, route in SEARCH_CHECKS.items() if agent.classify(m).route != route}
+    if wrong:
+        raise SystemExit(f"find/search routed wrongly: {wrong}")
+
+    before = measure(lambda m: legacy_classify(agent, m), corpus, rounds=5)
+    after = measure(lambda m: agent.router.scan(m.lower()), corpus, rounds=5)
+    scored = measure(agent.classify, corpus, rounds=5)
+    print(f"messages:        {len(corpus)} (routing identical)")
+    print(f"cascaded scans:  {before:,.0f} msg/s")
+    print(f"compiled router: {after:,.0f} msg/s")
+    print(f"speedup:         {after / before:.2f}x")
+    print(f"scored classify: {scored:,.0f} msg/s ({(1 / scored - 1 / after) * 1e6:.1f} us per message to score)")
+
+
+if __name__ == "__main__":
+    main()
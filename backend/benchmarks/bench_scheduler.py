@@ -0,0 +1,249 @@
+"""
+Check-in scheduler: behaviour checks on a fake clock, then scale.
+
+Checks (the clock is a mutable value, no real waiting):
+- weekly, biweekly and monthly occurrences land on the right days;
+- "/schedule biweekly" through the agent changes a session's cadence;
+- a due rule fires once and moves to its next occurrence; missed
+  occurrences (scheduler down for weeks) fire once, not once per period;
+- rules survive a restart (a new scheduler on the same database);
+- two schedulers sharing a database never fire the same occurrence twice;
+- rules another scheduler changes or adds while one is firing are not
+  lost: a changed rule that is already due fires, a new one is synced;
+- the background task fires after the clock moves and it is woken.
+
+Scale: N users (default 100k) with random weekday/time rules; reports
+the queue rebuild on startup, push/peek/pop cost on the due-queue, and
+how long firing a whole week of reminders takes in batches.
+
+Run from the backend directory:
+    python benchmarks/bench_scheduler.py [--users 100000] [--batch 500]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")
+
+from checkin_scheduler import CheckinRule, CheckinScheduler, DueQueue, next_occurrence
+
+DAY = 86400
+# Wednesday 2025-01-01 00:00 UTC
+START = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now: float = START):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def utc(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+def check_occurrences() -> None:
+    weekly = next_occurrence(CheckinRule("u", "weekly", 0, 9), START)
+    assert utc(weekly) == datetime(2025, 1, 6, 9, tzinfo=timezone.utc), utc(weekly)
+    biweekly = CheckinRule("u", "biweekly", 0, 9, 0, weekly)
+    assert next_occurrence(biweekly, weekly) == weekly + 14 * DAY
+    assert next_occurrence(biweekly, weekly + 20 * DAY) == weekly + 28 * DAY
+    monthly = next_occurrence(CheckinRule("u", "monthly", 4, 18, 30), START)
+    assert utc(monthly) == datetime(2025, 1, 3, 18, 30, tzinfo=timezone.utc), utc(monthly)
+    assert utc(next_occurrence(CheckinRule("u", "monthly", 4, 18, 30), monthly)) == \
+        datetime(2025, 2, 7, 18, 30, tzinfo=timezone.utc)
+    december = next_occurrence(CheckinRule("u", "monthly", 0, 9), datetime(2025, 12, 2, tzinfo=timezone.utc).timestamp())
+    assert utc(december) == datetime(2026, 1, 5, 9, tzinfo=timezone.utc), utc(december)
+
+
+async def check_agent_command() -> None:
+    from agent import HealthWellnessAgent
+    from context import UserSessionContext
+    from tools import scheduler
+
+    clock = FakeClock()
+    scheduler.checkin_scheduler = CheckinScheduler(":memory:", clock=clock)
+    agent = HealthWellnessAgent()
+    context = UserSessionContext(uid=7)
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = await agent.handle_message("schedule my check-in", context)
+        changed = await agent.handle_message("/schedule biweekly", context)
+        moved = await agent.handle_message("/schedule monthly on friday at 7pm", context)
+    assert "Every Monday at 09:00 UTC" in first, first
+    assert "Every other Monday" in changed, changed
+    assert "First Friday of every month at 19:00 UTC" in moved, moved
+    rule = scheduler.checkin_scheduler.rule("7")
+    assert (rule.cadence, rule.weekday, rule.hour) == ("monthly", 4, 19), rule
+
+
+async def check_firing(path: str) -> None:
+    clock = FakeClock()
+    delivered = []
+
+    async def deliver(rules):
+        delivered.extend(rules)
+
+    scheduler = CheckinScheduler(path, clock=clock, deliver=deliver, batch_size=2)
+    for uid in ("a", "b", "c"):
+        scheduler.set_rule(uid, "weekly", 0, 9)
+    scheduler.set_rule("d", "biweekly", 2, 12)  # Wednesday noon: later today
+    assert await scheduler.fire_due() == 0
+
+    clock.now = START + 12 * 3600
+    assert await scheduler.fire_due() == 1 and delivered[-1].uid == "d"
+    clock.now = START + 5 * DAY + 9 * 3600  # Monday 09:00
+    assert await scheduler.fire_due() == 3  # two batches of two
+    assert sorted(rule.uid for rule in delivered[1:]) == ["a", "b", "c"]
+    assert await scheduler.fire_due() == 0
+    assert scheduler.rule("a").next_due == clock.now + 7 * DAY
+
+    clock.now += 30 * DAY  # down for a month: one reminder each, then back on schedule
+    assert await scheduler.fire_due() == 4
+    assert scheduler.rule("a").next_due > clock.now
+    assert len(scheduler.reminders("a")) == 2
+
+    scheduler.cancel("b")
+    restarted = CheckinScheduler(path, clock=clock)
+    assert len(restarted.queue) == 0 and restarted.rule("a") is not None
+    clock.now = scheduler.rule("a").next_due
+    assert await restarted.fire_due() == 2  # "a" and "c" (same weekday); "b" was cancelled
+    assert await scheduler.fire_due() == 0  # already claimed by the other process
+    restarted.close()
+    scheduler.close()
+
+
+async def check_changed_while_firing(path: str) -> None:
+    clock = FakeClock()
+    monday = START + 5 * DAY + 9 * 3600
+    other = CheckinScheduler(path, clock=lambda: clock.now - 3 * 3600)  # a worker whose clock lags
+
+    async def deliver(rules):
+        if not changed:
+            changed.append(other.set_rule("b", "weekly", 0, 8))  # now due Monday 08:00, already past
+            other.set_rule("c", "weekly", 0, 9)
+
+    changed = []
+    scheduler = CheckinScheduler(path, clock=clock, deliver=deliver, batch_size=1)
+    scheduler.set_rule("a", "weekly", 0, 9)
+    scheduler.set_rule("b", "weekly", 0, 9)
+    clock.now = monday + 3600
+    assert await scheduler.fire_due() == 2  # "a", then "b" at its new (past) due time
+    assert changed[0].next_due == monday - 3600
+    assert await scheduler.fire_due() == 1  # "c", written after this worker's claims
+    assert await scheduler.fire_due() == 0
+    other.close()
+    scheduler.close()
+
+
+async def check_background_task() -> None:
+    clock = FakeClock()
+    fired = asyncio.Event()
+
+    async def deliver(rules):
+        fired.set()
+
+    scheduler = CheckinScheduler(":memory:", clock=clock, deliver=deliver, idle_seconds=3600)
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    rule = scheduler.set_rule("u", "weekly", 0, 9)
+    clock.now = rule.next_due
+    scheduler.wake()
+    await asyncio.wait_for(fired.wait(), 1.0)
+    await scheduler.stop()
+    scheduler.close()
+
+
+def queue_costs(users: int) -> dict:
+    rng = random.Random(3)
+    dues = [START + rng.random() * 7 * DAY for _ in range(users)]
+    queue = DueQueue()
+    start = time.perf_counter()
+    for uid, due in enumerate(dues):
+        queue.push(str(uid), due)
+    push_us = (time.perf_counter() - start) / users * 1e6
+    start = time.perf_counter()
+    for _ in range(10000):
+        queue.peek()
+    peek_us = (time.perf_counter() - start) / 10000 * 1e6
+    start = time.perf_counter()
+    popped = sum(len(queue.pop_due(START + 7 * DAY, 500)) for _ in range(users // 500 + 1))
+    pop_us = (time.perf_counter() - start) / users * 1e6
+    assert popped == users
+    return {"push": push_us, "peek": peek_us, "pop": pop_us}
+
+
+async def scale(users: int, batch: int, path: str) -> dict:
+    clock = FakeClock()
+    scheduler = CheckinScheduler(path, clock=clock, batch_size=batch)
+    rng = random.Random(5)
+    rows = []
+    for uid in range(users):
+        rule = CheckinRule(str(uid), rng.choice(("weekly", "weekly", "biweekly", "monthly")),
+                           rng.randrange(7), rng.randrange(24), rng.choice((0, 30)))
+        rows.append((*rule._replace(next_due=next_occurrence(rule, START)), START))
+    conn = scheduler._connection()
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO checkin_rules VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("COMMIT")
+
+    start = time.perf_counter()
+    scheduler._ensure_loaded()
+    load_ms = (time.perf_counter() - start) * 1000
+    expected = sum(1 for row in rows if row[5] <= START + 7 * DAY)
+    clock.now = START + 7 * DAY
+    start = time.perf_counter()
+    fired = await scheduler.fire_due()
+    fire_s = time.perf_counter() - start
+    assert fired == expected, (fired, expected)
+    start = time.perf_counter()
+    assert await scheduler.fire_due() == 0  # syncs the rows just claimed
+    resync_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    assert await scheduler.fire_due() == 0
+    idle_ms = (time.perf_counter() - start) * 1000
+    scheduler.close()
+    return {"load_ms": load_ms, "fired": fired, "fire_s": fire_s, "resync_ms": resync_ms, "idle_ms": idle_ms}
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as state_dir:
+        check_occurrences()
+        await check_agent_command()
+        await check_firing(os.path.join(state_dir, "checks.db"))
+        await check_changed_while_firing(os.path.join(state_dir, "changes.db"))
+        await check_background_task()
+        print("fake-clock checks passed: occurrences, /schedule command, firing, restart, "
+              "multi-process claim, concurrent changes, background task")
+
+        costs = queue_costs(args.users)
+        print(f"due-queue with {args.users} users: push {costs['push']:.2f} µs, peek {costs['peek']:.2f} µs, "
+              f"pop {costs['pop']:.2f} µs")
+        result = await scale(args.users, args.batch, os.path.join(state_dir, "scale.db"))
+        print(f"startup: queue rebuilt from SQLite in {result['load_ms']:.0f} ms")
+        print(f"one week of reminders: {result['fired']} fired in {result['fire_s']:.2f} s "
+              f"({result['fired'] / result['fire_s']:.0f}/s, batches of {args.batch}); "
+              f"next tick {result['resync_ms']:.0f} ms (re-reads the claimed rules), idle tick {result['idle_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
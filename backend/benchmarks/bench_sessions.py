@@ -0,0 +1,70 @@
+"""
+Load test: 10k distinct sessions against /query, in-process over ASGI.
+Prints traced memory and latency per window; both should stay flat once
+the store is at capacity.
+
+Run from the backend directory:
+    python benchmarks/bench_sessions.py [--backend memory|sqlite] [--sessions 10000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+
+QUERIES = ["beginner workout plan", "keto meal ideas", "how to build muscle", "show my progress"]
+
+
+async def run(backend: str, total: int, window: int, max_sessions: int):
+    os.environ["SESSION_BACKEND"] = backend
+    os.environ["SESSION_MAX_COUNT"] = str(max_sessions)
+    if backend == "sqlite":
+        os.environ["SESSION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "sessions.db")
+
+    import fast_api
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    transport = httpx.ASGITransport(app=fast_api.app)
+    tracemalloc.start()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"backend={backend} sessions={total} store_cap={max_sessions}")
+        print(f"{'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'traced MiB':>11}")
+        latencies = []
+        for i in range(total):
+            start = time.perf_counter()
+            response = await client.post(
+                "/query",
+                params={"user_input": QUERIES[i % len(QUERIES)]},
+                headers={"X-Session-ID": f"bench-{i}"}
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            if (i + 1) % window == 0:
+                current, _ = tracemalloc.get_traced_memory()
+                latencies.sort()
+                print(f"{i + 1:>9} {statistics.median(latencies):>8.2f} "
+                      f"{latencies[int(len(latencies) * 0.95)]:>8.2f} {current / 2**20:>11.2f}")
+                latencies = []
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="memory", choices=["memory", "sqlite"])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--window", type=int, default=1000)
+    parser.add_argument("--store-cap", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.backend, args.sessions, args.window, args.store_cap))
+
+
+if __name__ == "__main__":
+    main()
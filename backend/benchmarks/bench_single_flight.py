@@ -0,0 +1,82 @@
+"""
+Request coalescing under concurrency against a local fake OpenAI server.
+Fires bursts of identical (and a few distinct) fallback questions at
+fast_api.answer_with_fallback at the same moment and reports how many
+upstream calls were made with and without single-flight.
+
+Run from the backend directory:
+    python benchmarks/bench_single_flight.py [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from openai_client import UpstreamClient
+
+from fake_openai import FakeOpenAIServer
+from single_flight import SingleFlight
+
+QUESTIONS = ["how much water should I drink", "How much water should I drink?", "is coffee healthy"]
+
+
+class NoFlight:
+    """Baseline: every caller goes upstream"""
+
+    async def do(self, key, fn):
+        return await fn()
+
+
+async def burst(fast_api, server, flights, concurrency: int) -> dict:
+    from fallback_cache import FallbackCache
+
+    fast_api.upstream = UpstreamClient(api_key="sk-fake", base_url=server.base_url)
+    fast_api.fallback_cache = FallbackCache(similarity_threshold=None)
+    fast_api.openai_flights = flights
+    server.requests = 0
+
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(concurrency)]
+    start = time.perf_counter()
+    answers = await asyncio.gather(*(fast_api.answer_with_fallback(q) for q in questions))
+    elapsed = time.perf_counter() - start
+    await fast_api.upstream.close()
+
+    if isinstance(flights, SingleFlight):
+        # Coalesced callers must see the same answer as the leader
+        by_key = {}
+        for question, (content, _, _) in zip(questions, answers):
+            assert by_key.setdefault(fast_api.flight_key(question), content) == content
+    return {"upstream": server.requests, "wall_ms": elapsed * 1000}
+
+
+async def main_async(concurrency: int, latency: float):
+    import fast_api
+    from rate_limit import FallbackLimiter
+    fast_api.limiter = FallbackLimiter.unlimited()  # measured without budgets
+
+    with FakeOpenAIServer(latency=latency) as server:
+        print(f"{concurrency} concurrent fallback requests, {len(QUESTIONS)} phrasings "
+              f"(2 normalize to the same key), upstream latency {latency * 1000:.0f} ms")
+        baseline = await burst(fast_api, server, NoFlight(), concurrency)
+        flights = SingleFlight()
+        coalesced = await burst(fast_api, server, flights, concurrency)
+    print(f"{'mode':<14} {'upstream':>9} {'wall ms':>9}")
+    print(f"{'no coalescing':<14} {baseline['upstream']:>9} {baseline['wall_ms']:>9.1f}")
+    print(f"{'single-flight':<14} {coalesced['upstream']:>9} {coalesced['wall_ms']:>9.1f}")
+    print(f"single-flight stats: {flights.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.concurrency, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Cold start: import cost of the API server and the CLI, measured with
+`python -X importtime` in fresh interpreters (best of --runs, which is
+the least noisy figure for startup work).
+
+- fast_api: total import time, and the share that is ours: fast_api's
+  own cumulative figure in an interpreter that has already imported
+  FastAPI and the rest of the web stack (which any FastAPI app pays);
+- main: import time of the CLI module;
+- the CLI: wall time from launching `python main.py` to the first
+  prompt, and to the first answer (which waits for the background load);
+- the OpenAI SDK and NumPy must not be imported by either module.
+
+Exits with status 1 when a figure is over its target, so it can run as
+a regression check:
+    python benchmarks/bench_startup.py --target fast_api_own=80 main=100 cli_prompt=400
+
+Run from the backend directory:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV = {
+    **os.environ,
+    "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark"),
+    "ACTIVITY_DB_PATH": ":memory:",
+    "CHECKIN_DB_PATH": ":memory:",
+    "PYTHONDONTWRITEBYTECODE": "1"
+}
+# Loaded on first use (or in the background), never at import
+DEFERRED = ("openai", "numpy")
+# What fast_api imports from its web stack; any FastAPI app pays for these
+FRAMEWORK = "fastapi, fastapi.middleware.cors, fastapi.responses, pydantic, dotenv"
+TARGETS_MS = {"fast_api_own": 80.0, "main": 100.0, "cli_prompt": 400.0}
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(modules: str) -> dict:
+    """{module name: cumulative µs} for the imports in `modules` (not site), plus every module imported"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modules}"],
+                            cwd=BACKEND, env=ENV, capture_output=True, text=True, check=True)
+    cumulative, names = {}, set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            names.add(match.group(4))
+            if len(match.group(3)) == 1 and match.group(4) != "site":  # imported by the -c statement
+                cumulative[match.group(4)] = int(match.group(2))
+    return {"cumulative": cumulative, "modules": names}
+
+
+def best_import_ms(modules: str, runs: int) -> tuple:
+    """Best import time of `modules` (ms) and every module they imported"""
+    totals, names = [], set()
+    for _ in range(runs):
+        profile = import_profile(modules)
+        totals.append(sum(profile["cumulative"].values()) / 1000)
+        names |= profile["modules"]
+    return min(totals), names
+
+
+def best_own_import_ms(module: str, preloaded: str, runs: int) -> float:
+    """Best cumulative import time of `module` (ms) once `preloaded` is imported, in the same interpreter"""
+    return min(import_profile(f"{preloaded}; import {module}")["cumulative"][module] for _ in range(runs)) / 1000
+
+
+def cli_times(runs: int) -> tuple:
+    """Best (ms to the first prompt, ms to the first answer) for `python main.py`"""
+    prompts, answers = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-u", "main.py"], cwd=BACKEND, env=ENV,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True, bufsize=0)
+        output = ""
+        while "You:" not in output:
+            output += process.stdout.read(1)
+        prompts.append((time.perf_counter() - start) * 1000)
+        sent = time.perf_counter()
+        process.stdin.write("beginner workout plan\n")
+        process.stdin.flush()
+        while "Assistant:" not in output:
+            output += process.stdout.read(1)
+        answers.append((time.perf_counter() - start) * 1000)
+        assert sent - start < answers[-1] / 1000
+        process.stdin.write("exit\n")
+        process.stdin.flush()
+        process.communicate(timeout=10)
+    return min(prompts), min(answers)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", nargs="*", default=[], metavar="NAME=MS",
+                        help=f"override targets (defaults: {TARGETS_MS})")
+    args = parser.parse_args()
+    targets = dict(TARGETS_MS)
+    for item in args.target:
+        name, value = item.split("=")
+        targets[name] = float(value)
+
+    api_total, api_modules = best_import_ms("fast_api", args.runs)
+    api_own = best_own_import_ms("fast_api", FRAMEWORK, args.runs)
+    cli_total, cli_modules = best_import_ms("main", args.runs)
+    prompt_ms, answer_ms = cli_times(args.runs)
+    figures = {"fast_api_own": api_own, "main": cli_total, "cli_prompt": prompt_ms}
+
+    print(f"import fast_api   {api_total:7.1f} ms  (ours, after FastAPI: {api_own:.1f} ms)")
+    print(f"import main       {cli_total:7.1f} ms")
+    print(f"CLI first prompt  {prompt_ms:7.1f} ms  (first answer at {answer_ms:.1f} ms, incl. background load)")
+    failures = []
+    for name in DEFERRED:
+        for module, modules in (("fast_api", api_modules), ("main", cli_modules)):
+            if name in modules:
+                failures.append(f"{module} imports {name} at startup")
+    for name, target in targets.items():
+        if figures[name] > target:
+            failures.append(f"{name}: {figures[name]:.1f} ms over the {target:.0f} ms target")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"startup targets met ({', '.join(f'{k} <= {v:.0f} ms' for k, v in targets.items())}); "
+          f"{' and '.join(DEFERRED)} deferred")
+
+
+if __name__ == "__main__":
+    main()
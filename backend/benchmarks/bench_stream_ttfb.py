@@ -0,0 +1,88 @@
+"""
+Time-to-first-byte: blocking /query vs streaming /query/stream for
+fallback answers, over real HTTP (uvicorn on a local port) against a
+local fake OpenAI server that streams tokens.
+
+The local router answers every question itself, so this script forces the
+fallback path by overriding fast_api.needs_openai_fallback. The fallback
+cache is cleared before every request so each one goes upstream.
+
+Run from the backend directory:
+    python benchmarks/bench_stream_ttfb.py [--latency 0.2 --token-interval 0.02 --port 8765]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+import uvicorn
+from openai_client import UpstreamClient
+
+from fake_openai import FakeOpenAIServer
+
+
+async def timed(client: httpx.AsyncClient, path: str, question: str):
+    """Return (ttfb_ms, total_ms) for one request"""
+    start = time.perf_counter()
+    ttfb = None
+    async with client.stream("POST", path, params={"user_input": question}) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_bytes():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+    return ttfb * 1000, (time.perf_counter() - start) * 1000
+
+
+async def main_async(requests: int, latency: float, token_interval: float, tokens: int, port: int):
+    import fast_api
+    from rate_limit import FallbackLimiter
+    fast_api.limiter = FallbackLimiter.unlimited()  # measured without budgets
+    from fallback_cache import FallbackCache
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    fast_api.needs_openai_fallback = lambda response: True
+
+    # The ASGI test transport buffers whole bodies, so serve over a socket
+    server = uvicorn.Server(uvicorn.Config(fast_api.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    with FakeOpenAIServer(latency=latency, token_interval=token_interval,
+                          completion_tokens=tokens) as upstream:
+        fast_api.upstream = UpstreamClient(api_key="sk-fake", base_url=upstream.base_url)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            print(f"upstream: first token {latency * 1000:.0f} ms, "
+                  f"{tokens} tokens every {token_interval * 1000:.0f} ms")
+            print(f"{'endpoint':<14} {'ttfb p50 ms':>12} {'total p50 ms':>13}")
+            for path in ("/query", "/query/stream"):
+                samples = []
+                for i in range(requests):
+                    fast_api.fallback_cache = FallbackCache()
+                    samples.append(await timed(client, path, f"what is a healthy snack {i}"))
+                print(f"{path:<14} {statistics.median(s[0] for s in samples):>12.1f} "
+                      f"{statistics.median(s[1] for s in samples):>13.1f}")
+        await fast_api.upstream.close()
+    server.should_exit = True
+    await serving
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.latency, args.token_interval, args.tokens, args.port))
+
+
+if __name__ == "__main__":
+    main()
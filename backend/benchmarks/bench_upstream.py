@@ -0,0 +1,171 @@
+"""
+Shared OpenAI client against a fake server with injected latency and
+errors: keep-alive reuse, retries on 503/429, per-call deadlines, the
+circuit breaker failing fast (and recovering) and the lazy health check.
+Ends with /query answering the local "unavailable" notice while the
+circuit is open. Every scenario asserts its expected outcome.
+
+Run from the backend directory:
+    python benchmarks/bench_upstream.py [--calls 200]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+from openai import AsyncOpenAI
+
+from fake_openai import FakeOpenAIServer
+from openai_client import CircuitBreaker, UpstreamClient, UpstreamUnavailable
+
+MESSAGES = [{"role": "user", "content": "how much water per day"}]
+
+
+async def call(client: UpstreamClient, **kwargs) -> str:
+    try:
+        await client.complete(MESSAGES, model="gpt-3.5-turbo", max_tokens=5, **kwargs)
+        return "ok"
+    except UpstreamUnavailable:
+        return "unavailable"
+    except Exception as e:
+        return type(e).__name__
+
+
+async def keep_alive(server: FakeOpenAIServer, calls: int) -> None:
+    start = server.connections
+    for _ in range(calls // 4):
+        fresh = AsyncOpenAI(api_key="sk-fake", base_url=server.base_url, max_retries=0)
+        await fresh.chat.completions.create(messages=MESSAGES, model="gpt-3.5-turbo")
+        await fresh.close()
+    per_call = server.connections - start
+
+    client = UpstreamClient(api_key="sk-fake", base_url=server.base_url,
+                            max_connections=10, max_keepalive=10)
+    start = server.connections
+    for _ in range(calls // 4):
+        await call(client)
+    sequential = server.connections - start
+    start = server.connections
+    await asyncio.gather(*(call(client) for _ in range(calls // 4)))
+    concurrent = server.connections - start
+    await client.close()
+    print(f"keep-alive    {calls // 4} calls: new client per call opened {per_call} connections; "
+          f"shared pool opened {sequential} sequentially, {concurrent} more for a concurrent burst (cap 10)")
+    assert sequential <= 1 and concurrent <= 10
+
+
+async def retries(server: FakeOpenAIServer, calls: int, status: int) -> None:
+    server.error_rate, server.error_status = 0.3, status
+    results = {}
+    for max_retries in (0, 3):
+        client = UpstreamClient(api_key="sk-fake", base_url=server.base_url, max_retries=max_retries,
+                                backoff_base=0.005, breaker=CircuitBreaker(failure_threshold=1000))
+        outcomes = await asyncio.gather(*(call(client) for _ in range(calls)))
+        results[max_retries] = outcomes.count("ok") / calls
+        await client.close()
+    server.error_rate = 0.0
+    print(f"retry {status}     30% injected errors: success {results[0]:.0%} without retries, "
+          f"{results[3]:.0%} with 3 jittered retries")
+    assert results[3] > results[0] and results[3] > 0.95
+
+
+async def deadline(server: FakeOpenAIServer) -> None:
+    server.latency = 1.0
+    client = UpstreamClient(api_key="sk-fake", base_url=server.base_url)
+    start = time.perf_counter()
+    outcome = await call(client, timeout=0.3)
+    elapsed = time.perf_counter() - start
+    server.latency = 0.01
+    await client.close()
+    print(f"deadline      1 s upstream, 0.3 s deadline: {outcome} after {elapsed * 1000:.0f} ms")
+    assert outcome == "unavailable" and elapsed < 0.5
+
+
+async def breaker(server: FakeOpenAIServer) -> None:
+    server.error_rate, server.error_status = 1.0, 503
+    client = UpstreamClient(api_key="sk-fake", base_url=server.base_url, max_retries=0,
+                            breaker=CircuitBreaker(failure_threshold=5, reset_seconds=0.5))
+    before = server.requests
+    outcomes = [await call(client) for _ in range(5)]
+    start = time.perf_counter()
+    fast = [await call(client) for _ in range(100)]
+    fail_fast_us = (time.perf_counter() - start) / 100 * 1e6
+    reached = server.requests - before
+    health = await client.health()
+    print(f"breaker       outage: {outcomes.count('unavailable')} failed calls opened the circuit; "
+          f"{fast.count('unavailable')} calls failed fast in {fail_fast_us:.0f} us each; "
+          f"upstream saw {reached} requests; health={health['status']}")
+    assert reached == 5 and outcomes.count("unavailable") == 5 and fast.count("unavailable") == 100 and health["status"] == "unavailable"
+
+    server.error_rate = 0.0
+    await asyncio.sleep(0.5)
+    trial = await call(client)
+    print(f"              after reset window: trial call {trial}, circuit {client.breaker.state}")
+    assert trial == "ok" and client.breaker.state == CircuitBreaker.CLOSED
+    await client.close()
+
+
+async def health(server: FakeOpenAIServer) -> None:
+    client = UpstreamClient(api_key="sk-fake", base_url=server.base_url)
+    before = server.requests
+    status = await client.health()
+    await call(client)
+    cached = await client.health()
+    await client.close()
+    print(f"health        lazy probe: {status['status']}, no completions sent "
+          f"({server.requests - before - 1} extra); after a call: {cached['status']} without probing")
+    assert status["status"] == "ok" and server.requests - before == 1
+
+
+async def unavailable_answer(server: FakeOpenAIServer) -> None:
+    import fast_api
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("openai_client").setLevel(logging.ERROR)
+    server.error_rate = 1.0
+    fast_api.upstream = UpstreamClient(api_key="sk-fake", base_url=server.base_url, max_retries=0,
+                                       breaker=CircuitBreaker(failure_threshold=1, reset_seconds=60))
+    fast_api.needs_openai_fallback = lambda response: True
+    transport = httpx.ASGITransport(app=fast_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = await client.post("/query", params={"user_input": "is coffee bad before cardio"})
+            start = time.perf_counter()
+            second = await client.post("/query", params={"user_input": "are eggs healthy"})
+            elapsed = time.perf_counter() - start
+    await fast_api.upstream.close()
+    server.error_rate = 0.0
+    print(f"/query        outage: HTTP {first.status_code} source={first.json()['source']}, "
+          f"then circuit open: source={second.json()['source']} in {elapsed * 1000:.1f} ms")
+    assert first.json()["source"] == second.json()["source"] == "unavailable"
+
+
+async def main_async(calls: int) -> None:
+    logging.getLogger("openai_client").setLevel(logging.ERROR)
+    with FakeOpenAIServer(latency=0.01, completion_tokens=5, token_interval=0.0) as server:
+        await keep_alive(server, calls)
+        await retries(server, calls, 503)
+        await retries(server, calls, 429)
+        await deadline(server)
+        await breaker(server)
+        await health(server)
+        await unavailable_answer(server)
+    print("all upstream scenarios passed")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.calls))
+
+
+if __name__ == "__main__":
+    main()
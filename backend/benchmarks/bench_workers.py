@@ -0,0 +1,157 @@
+"""
+Multi-worker load test: starts `fast_api.py --prod --workers N` for each
+worker count and drives the local routes from several client processes
+for a fixed time. Reports throughput and latency per worker count. Then
+checks the shared state on the last server:
+- one session used over fresh connections (so different workers serve it)
+  keeps every request's hook events;
+- /metrics on any worker counts the requests served by all of them.
+
+Throughput can only scale up to the number of cores available.
+
+Run from the backend directory:
+    python benchmarks/bench_workers.py [--workers 1 2 4] [--seconds 10]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+import httpx
+
+from bench_local_latency import ROUTE_QUERIES
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, state_dir: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "sk-benchmark"),
+        SESSION_DB_PATH=os.path.join(state_dir, "sessions.db"),
+        FALLBACK_CACHE_DB_PATH=os.path.join(state_dir, "fallback_cache.db"),
+        FALLBACK_LIMIT_DB_PATH=os.path.join(state_dir, "fallback_limits.db"),
+        METRICS_DB_PATH=os.path.join(state_dir, "metrics.db"),
+        ACTIVITY_DB_PATH=os.path.join(state_dir, "activity.db"),
+        CHECKIN_DB_PATH=os.path.join(state_dir, "checkins.db"),
+        METRICS_PUBLISH_SECONDS="0.5",
+        AGENT_HOOKS="on"
+    )
+    server = subprocess.Popen(
+        [sys.executable, "fast_api.py", "--prod", "--workers", str(workers), "--port", str(port)],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                time.sleep(1.0)  # let the remaining workers finish booting
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit("server did not start")
+
+
+async def drive(port: int, seconds: float, concurrency: int, client_id: int) -> list:
+    queries = list(ROUTE_QUERIES.values())
+    latencies = []
+    stop = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+        async def worker(n: int) -> None:
+            i = n
+            session = f"load-{client_id}-{n}"
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                response = await client.post("/query", params={"user_input": queries[i % len(queries)]},
+                                             headers={"X-Session-ID": session})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                i += 1
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return latencies
+
+
+def client_process(args) -> list:
+    return asyncio.run(drive(*args))
+
+
+def percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+def check_shared_state(port: int, state_dir: str, sent: int) -> None:
+    session = "shared-state-check"
+    for query in ROUTE_QUERIES.values():
+        # a fresh connection each time, so the kernel may pick any worker
+        httpx.post(f"http://127.0.0.1:{port}/query", params={"user_input": query},
+                   headers={"X-Session-ID": session}).raise_for_status()
+    with sqlite3.connect(os.path.join(state_dir, "sessions.db")) as conn:
+        data = json.loads(conn.execute(
+            "SELECT data FROM sessions WHERE session_id = ?", (session,)
+        ).fetchone()[0])
+    starts = sum(1 for row in data["progress_logs"] if row[1] == "agent_start" and row[2] == "HealthWellnessAgent")
+    print(f"session continuity: {starts}/{len(ROUTE_QUERIES)} requests recorded in one session")
+    assert starts == len(ROUTE_QUERIES)
+
+    time.sleep(1.0)  # every worker publishes its metrics within METRICS_PUBLISH_SECONDS
+    scrape = httpx.get(f"http://127.0.0.1:{port}/metrics").text
+    counted = sum(
+        float(line.rsplit(" ", 1)[1]) for line in scrape.splitlines()
+        if line.startswith('health_queries_total{endpoint="/query"')
+    )
+    expected = sent + len(ROUTE_QUERIES)
+    print(f"shared metrics: {counted:.0f} /query requests counted, {expected} sent")
+    assert counted == expected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client process")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes x {args.concurrency} connections, "
+          f"{args.seconds:.0f} s per run")
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for i, workers in enumerate(args.workers):
+        with tempfile.TemporaryDirectory() as state_dir:
+            port = free_port()
+            server = start_server(workers, port, state_dir)
+            try:
+                with multiprocessing.Pool(args.clients) as pool:
+                    results = pool.map(client_process, [
+                        (port, args.seconds, args.concurrency, client) for client in range(args.clients)
+                    ])
+                latencies = [sample for result in results for sample in result]
+                print(f"{workers:>7} {len(latencies) / args.seconds:>9.0f} "
+                      f"{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.99):>8.2f}")
+                if i == len(args.workers) - 1:
+                    check_shared_state(port, state_dir, len(latencies))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Offline routing evaluation against a hand-labelled query set
+(benchmarks/data/labelled_queries.json). For each pair of routing
+thresholds it reports routing precision/recall per route (a message below
+the fallback threshold is predicted "fallback"), how many messages land in
+the cached band, and the average OpenAI cost per query. Only fallback
+decisions cost anything: their tokens are estimated like the limiter's
+reservation and priced per 1k tokens.
+
+Run from the backend directory:
+    python benchmarks/eval_routing.py [--price-per-1k 0.002]
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agent import HealthWellnessAgent, ROUTE_FALLBACK_THRESHOLD, ROUTE_LOCAL_THRESHOLD
+from fast_api import fallback_reserve
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "labelled_queries.json")
+SWEEP = (0.0, 0.05, 0.1, 0.15, 0.2, 0.3)
+
+
+def load_queries(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [(item["text"], item["label"]) for item in json.load(f)["queries"]]
+
+
+def evaluate(queries: list, fallback_threshold: float, local_threshold: float, price_per_1k: float) -> dict:
+    agent = HealthWellnessAgent(fallback_threshold=fallback_threshold, local_threshold=local_threshold)
+    true_pos, predicted, actual = Counter(), Counter(), Counter()
+    decisions, tokens, wrong = Counter(), 0, []
+    for text, label in queries:
+        intent = agent.classify(text)
+        decision = agent.decide(intent)
+        guess = "fallback" if decision == "fallback" else intent.route
+        decisions[decision] += 1
+        predicted[guess] += 1
+        actual[label] += 1
+        if guess == label:
+            true_pos[label] += 1
+        else:
+            wrong.append((text, label, guess, intent.score))
+        if decision == "fallback":
+            tokens += fallback_reserve(text)
+
+    routes = {}
+    for label in sorted(set(actual) | set(predicted)):
+        routes[label] = {
+            "precision": true_pos[label] / predicted[label] if predicted[label] else 0.0,
+            "recall": true_pos[label] / actual[label] if actual[label] else 0.0,
+            "support": actual[label]
+        }
+    labelled = [r for label, r in routes.items() if r["support"]]
+    return {
+        "fallback_threshold": fallback_threshold,
+        "local_threshold": local_threshold,
+        "accuracy": sum(true_pos.values()) / len(queries),
+        "macro_precision": sum(r["precision"] for r in labelled) / len(labelled),
+        "macro_recall": sum(r["recall"] for r in labelled) / len(labelled),
+        "decisions": dict(decisions),
+        "cost_per_query": tokens / 1000 * price_per_1k / len(queries),
+        "tokens_per_query": tokens / len(queries),
+        "routes": routes,
+        "wrong": wrong
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=DATA)
+    parser.add_argument("--price-per-1k", type=float, default=0.002, help="USD per 1k fallback tokens")
+    parser.add_argument("--fallback-threshold", type=float, default=ROUTE_FALLBACK_THRESHOLD)
+    parser.add_argument("--local-threshold", type=float, default=ROUTE_LOCAL_THRESHOLD)
+    parser.add_argument("--json", help="write the report for the configured thresholds to this file")
+    args = parser.parse_args()
+    queries = load_queries(args.data)
+    print(f"{len(queries)} labelled queries, {args.price_per_1k} USD per 1k tokens\n")
+
+    print(f"{'fallback <':>10} {'accuracy':>9} {'macro P':>8} {'macro R':>8} {'fb P':>6} {'fb R':>6} "
+          f"{'local':>6} {'cached':>7} {'openai':>7} {'USD/query':>10}")
+    for threshold in sorted(set(SWEEP) | {args.fallback_threshold}):
+        report = evaluate(queries, threshold, max(threshold, args.local_threshold), args.price_per_1k)
+        fallback = report["routes"].get("fallback", {"precision": 0.0, "recall": 0.0})
+        decisions = report["decisions"]
+        marker = " *" if threshold == args.fallback_threshold else ""
+        print(f"{threshold:>10.2f} {report['accuracy']:>9.1%} {report['macro_precision']:>8.1%} "
+              f"{report['macro_recall']:>8.1%} {fallback['precision']:>6.0%} {fallback['recall']:>6.0%} "
+              f"{decisions.get('local', 0):>6} {decisions.get('cached', 0):>7} {decisions.get('fallback', 0):>7} "
+              f"{report['cost_per_query']:>10.6f}{marker}")
+
+    report = evaluate(queries, args.fallback_threshold, args.local_threshold, args.price_per_1k)
+    print(f"\nper route at fallback < {args.fallback_threshold}, local >= {args.local_threshold} "
+          f"({report['tokens_per_query']:.0f} fallback tokens per query):")
+    print(f"{'route':>11} {'precision':>10} {'recall':>7} {'support':>8}")
+    for label, scores in report["routes"].items():
+        print(f"{label:>11} {scores['precision']:>10.0%} {scores['recall']:>7.0%} {scores['support']:>8}")
+    print("\nmisrouted:")
+    for text, label, guess, score in report["wrong"]:
+        print(f"  {label:>10} -> {guess:<10} score {score:.2f}  {text!r}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Offline stand-ins for the OpenAI API used by the benchmarks.
+
+- StubOpenAIClient mimics the slice of AsyncOpenAI the backend uses
+  (`client.chat.completions.create(...)`) in-process.
+- FakeOpenAIServer is a local HTTP server speaking enough of
+  POST /v1/chat/completions for the real AsyncOpenAI client to talk to it.
+"""
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+class StubOpenAIClient:
+    def __init__(self, latency: float = 0.2, completion_tokens: int = 40):
+        self.latency = latency
+        self.completion_tokens = completion_tokens
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model: str, messages: list, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        question = messages[-1]["content"]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"[stub:{model}] answer to: {question}"))],
+            usage=SimpleNamespace(
+                prompt_tokens=len(question.split()),
+                completion_tokens=self.completion_tokens,
+                total_tokens=len(question.split()) + self.completion_tokens
+            )
+        )
+
+
+def completion_body(model: str, question: str, completion_tokens: int) -> dict:
+    prompt_tokens = len(question.split())
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": f"[fake:{model}] answer to: {question}"},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 1024  # bursts of concurrent connects
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # client gave up (deadline)
+            super().handle_error(request, client_address)
+
+
+def chunk_body(model: str, delta: dict, usage: dict = None) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": None}] if delta else [],
+        "usage": usage
+    }
+
+
+class FakeOpenAIServer:
+    """
+    Threaded local server. The first token is ready after `latency`
+    seconds and each following token `token_interval` seconds later;
+    blocking completions answer once the last token is ready, streaming
+    ones (`stream: true`) send each token as it is produced.
+    Use as a context manager and point AsyncOpenAI at `base_url`.
+
+    Faults can be injected (and changed while running): `error_rate` of
+    completions fail with `error_status` after the latency. `connections`
+    counts the TCP connections accepted, to show keep-alive reuse.
+    GET /v1/models answers immediately and is never failed.
+    """
+
+    def __init__(self, latency: float = 0.2, completion_tokens: int = 40,
+                 token_interval: float = 0.02, error_rate: float = 0.0, error_status: int = 503):
+        self.latency = latency
+        self.completion_tokens = completion_tokens
+        self.token_interval = token_interval
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_GET(self):
+                self._send_json(200, {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model"}]})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with fake._lock:
+                    fake.requests += 1
+                time.sleep(fake.latency)
+                if random.random() < fake.error_rate:
+                    with fake._lock:
+                        fake.errors += 1
+                    return self._send_json(fake.error_status, {"error": {
+                        "message": "injected failure", "type": "server_error", "code": None
+                    }})
+                if payload.get("stream"):
+                    return self._stream(payload)
+                time.sleep(fake.token_interval * (fake.completion_tokens - 1))
+                self._send_json(200, completion_body(
+                    payload["model"], payload["messages"][-1]["content"], fake.completion_tokens
+                ))
+
+            def _send_json(self, status: int, data: dict):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, payload: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                model = payload["model"]
+                words = f"[fake:{model}] answer to: {payload['messages'][-1]['content']}".split(" ")
+                for i in range(fake.completion_tokens):
+                    if i:
+                        time.sleep(fake.token_interval)
+                    word = words[i % len(words)]
+                    self._send_event(chunk_body(model, {"content": word if i == 0 else " " + word}))
+                if payload.get("stream_options", {}).get("include_usage"):
+                    prompt_tokens = len(payload["messages"][-1]["content"].split())
+                    self._send_event(chunk_body(model, None, {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": fake.completion_tokens,
+                        "total_tokens": prompt_tokens + fake.completion_tokens
+                    }))
+                self._send_chunk(b"data: [DONE]\n\n")
+                self._send_chunk(b"")
+
+            def _send_event(self, data: dict):
+                self._send_chunk(f"data: {json.dumps(data)}\n\n".encode())
+
+            def _send_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,360 @@
+"""
+Load test for the FastAPI service, in-process (ASGI transport) and over
+real HTTP (uvicorn in a subprocess), against the local fake OpenAI server.
+
+Queries are generated from the agent's own keyword tables (handoff
+triggers, sub-agent keywords, commands, workout levels, diets, goals)
+plus off-topic questions for the fallback, and are kept only when the
+router really sends them to the intended route. The mix is configurable,
+e.g. `--mix workout=3,meal=2,fallback=1`.
+
+Reports throughput, p50/p95/p99 latency per route and the resident memory
+growth of the serving process, and saves everything as JSON (by default
+benchmarks/results/<commit>.json) so runs can be compared between commits
+with `--compare`.
+
+Run from the backend directory:
+    python benchmarks/load_suite.py [--modes asgi http] [--requests 2000]
+        [--concurrency 16] [--openai-latency 0.2] [--compare old.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ACTIVITY_DB_PATH", ":memory:")  # tracking queries log activities
+os.environ.setdefault("CHECKIN_DB_PATH", ":memory:")  # schedule queries store check-in rules
+
+import httpx
+
+from agent import HealthWellnessAgent
+from fake_openai import FakeOpenAIServer
+from tools.goal_analyzer import GOAL_KEYWORDS
+from tools.meal_planner import DIET_PLANS
+from tools.workout_recommender import WORKOUT_PLANS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+TEMPLATES = ["{}", "{} please", "can you help with {}", "i want {}", "{} this week", "what about {}"]
+OFF_TOPIC = [
+    "what's the capital of france", "tell me a joke", "how many calories in an egg",
+    "is coffee bad before cardio", "what is creatine", "how do i meditate",
+    "what are electrolytes", "can stress cause headaches", "what time is it",
+    "translate hello into spanish", "what does bmi mean", "is sparkling water as good as still"
+]
+DEFAULT_MIX = "escalation=1,injury=1,nutrition=1,schedule=1,tracking=1,progress=1,workout=1,meal=1,goal=1,fallback=1"
+
+
+def route_phrases(agent: HealthWellnessAgent) -> Dict[str, List[str]]:
+    """Candidate phrases per route, built from the keyword tables the router is compiled from"""
+    handoff = agent.handoff_triggers
+    commands = {name: keywords for name, (keywords, _) in agent.command_handlers.items()}
+    body_parts = [part for parts in agent.injury_support_agent.INJURY_KEYWORDS.values() for part in parts]
+    conditions = [kw for kws in agent.nutrition_expert_agent.CONDITION_KEYWORDS.values() for kw in kws]
+    return {
+        "escalation": list(handoff["escalation"]) + [f"{kw} please" for kw in agent.escalation_agent.ESCALATION_KEYWORDS],
+        "injury": [f"{trigger} in my {part}" for trigger in handoff["injury"] for part in body_parts],
+        "nutrition": [f"{trigger} and {condition}" for trigger in handoff["nutrition"] for condition in conditions],
+        "schedule": list(commands["schedule"]),
+        "tracking": [f"{kw.strip()} {thing}" for kw in commands["tracking"]
+                     for thing in ("5km run", "my weight 72kg", "30 minutes of yoga", "workout done")],
+        "progress": list(commands["progress"]),
+        "workout": [f"{level} {kw}" for level in WORKOUT_PLANS for kw in commands["workout"]],
+        "meal": [f"{diet} {kw}" for diet in DIET_PLANS for kw in commands["meal"]],
+        "goal": [kw for kws in GOAL_KEYWORDS.values() for kw in kws],
+        "fallback": OFF_TOPIC
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        route, _, weight = part.partition("=")
+        weights[route.strip()] = float(weight or 1)
+    return weights
+
+
+def build_queries(agent: HealthWellnessAgent, mix: Dict[str, float], count: int,
+                  seed: int = 11) -> List[Tuple[str, str]]:
+    """`count` (route, query) pairs in the given mix; every query routes where its label says"""
+    rng = random.Random(seed)
+    pools = {}
+    for route, phrases in route_phrases(agent).items():
+        if mix.get(route):
+            pool = []
+            for phrase in phrases:
+                for template in TEMPLATES:
+                    query = template.format(phrase)
+                    intent = agent.classify(query)
+                    routed = "fallback" if agent.decide(intent) == "fallback" else intent.route
+                    if routed == route and 2 <= len(query) <= 200:
+                        pool.append(query)
+            if not pool:
+                raise SystemExit(f"no generated query routes to {route!r}")
+            pools[route] = pool
+    unknown = set(mix) - set(pools) - {route for route, weight in mix.items() if not weight}
+    if unknown:
+        raise SystemExit(f"unknown routes in --mix: {sorted(unknown)}")
+
+    routes = list(pools)
+    weights = [mix[route] for route in routes]
+    queries = []
+    for i in range(count):
+        route = rng.choices(routes, weights)[0]
+        query = rng.choice(pools[route])
+        if route == "fallback":
+            query = f"{query} (case {i})"  # distinct questions, so each one costs an upstream call
+        queries.append((route, query))
+    return queries
+
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """Resident set size of a process (this one by default) in MB"""
+    with open(f"/proc/{pid or 'self'}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+def summarize(samples: List[float]) -> dict:
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3)
+    }
+
+
+async def drive(client: httpx.AsyncClient, queries: List[Tuple[str, str]], concurrency: int,
+                sessions: int) -> Tuple[dict, float]:
+    """Closed loop: `concurrency` workers send the queries in order; returns samples per route and wall time"""
+    samples: Dict[str, List[float]] = {}
+    sources: Dict[str, Counter] = {}
+    errors = Counter()
+    position = 0
+
+    async def worker() -> None:
+        nonlocal position
+        while position < len(queries):
+            i, position = position, position + 1
+            route, query = queries[i]
+            start = time.perf_counter()
+            try:
+                response = await client.post("/query", params={"user_input": query},
+                                             headers={"X-Session-ID": f"load-{i % sessions}"})
+                elapsed = (time.perf_counter() - start) * 1000
+                if response.status_code != 200:
+                    errors[f"http_{response.status_code}"] += 1
+                    continue
+                source = response.json()["source"]
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                continue
+            samples.setdefault(route, []).append(elapsed)
+            sources.setdefault(route, Counter())[source] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    return {"samples": samples, "sources": sources, "errors": errors}, wall
+
+
+def report(mode: str, result: dict, wall: float, rss_start: float, rss_end: float) -> dict:
+    samples = result["samples"]
+    done = sum(len(s) for s in samples.values())
+    return {
+        "mode": mode,
+        "requests": done,
+        "errors": dict(result["errors"]),
+        "seconds": round(wall, 3),
+        "throughput_rps": round(done / wall, 1),
+        "rss_start_mb": round(rss_start, 1),
+        "rss_end_mb": round(rss_end, 1),
+        "rss_growth_mb": round(rss_end - rss_start, 1),
+        "overall": summarize([x for s in samples.values() for x in s]),
+        "routes": {
+            route: {**summarize(samples[route]), "sources": dict(result["sources"][route])}
+            for route in sorted(samples)
+        }
+    }
+
+
+async def run_asgi(queries, warmup, concurrency: int, sessions: int, server: FakeOpenAIServer) -> dict:
+    import fast_api
+    from fallback_cache import FallbackCache
+    from openai_client import UpstreamClient
+    from rate_limit import FallbackLimiter
+    fast_api.upstream = UpstreamClient(api_key="sk-fake", base_url=server.base_url)
+    fast_api.limiter = FallbackLimiter.unlimited()
+    fast_api.fallback_cache = FallbackCache(similarity_threshold=None)
+
+    transport = httpx.ASGITransport(app=fast_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        with contextlib.redirect_stdout(io.StringIO()):  # the nutrition agent prints
+            await drive(client, warmup, concurrency, sessions)
+            rss_start = rss_mb()
+            result, wall = await drive(client, queries, concurrency, sessions)
+            rss_end = rss_mb()
+    await fast_api.upstream.close()
+    return report("asgi", result, wall, rss_start, rss_end)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_http(queries, warmup, concurrency: int, sessions: int, server: FakeOpenAIServer) -> dict:
+    port = free_port()
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=server.base_url,
+        FALLBACK_CACHE_SIMILARITY="off",
+        FALLBACK_SESSION_RPS="0", FALLBACK_GLOBAL_RPS="0",
+        FALLBACK_SESSION_TOKENS_PER_DAY="0", FALLBACK_GLOBAL_TOKENS_PER_DAY="0"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "fast_api:app", "--port", str(port),
+         "--no-access-log", "--log-level", "warning"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/").raise_for_status()
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise SystemExit("uvicorn did not start")
+                time.sleep(0.2)
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            await drive(client, warmup, concurrency, sessions)
+            rss_start = rss_mb(process.pid)
+            result, wall = await drive(client, queries, concurrency, sessions)
+            rss_end = rss_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return report("http", result, wall, rss_start, rss_end)
+
+
+RUNNERS = {"asgi": run_asgi, "http": run_http}
+
+
+def print_run(run: dict) -> None:
+    print(f"\n[{run['mode']}] {run['requests']} requests in {run['seconds']:.2f} s -> "
+          f"{run['throughput_rps']:.0f} req/s, errors {run['errors'] or 0}, "
+          f"RSS {run['rss_start_mb']:.1f} -> {run['rss_end_mb']:.1f} MB ({run['rss_growth_mb']:+.1f})")
+    print(f"{'route':<11} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  sources")
+    for route, stats in list(run["routes"].items()) + [("all", run["overall"])]:
+        sources = " ".join(f"{k}={v}" for k, v in sorted(stats.get("sources", {}).items()))
+        print(f"{route:<11} {stats['count']:>6} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+              f"{stats['p99_ms']:>8.2f}  {sources}")
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Throughput and p99 changes against an earlier results file"""
+    print(f"\ncompared with {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+    for mode, run in current["runs"].items():
+        old = baseline.get("runs", {}).get(mode)
+        if old is None:
+            continue
+        change = (run["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+        print(f"[{mode}] throughput {old['throughput_rps']:.0f} -> {run['throughput_rps']:.0f} req/s ({change:+.1f}%), "
+              f"RSS growth {old['rss_growth_mb']:+.1f} -> {run['rss_growth_mb']:+.1f} MB")
+        for route, stats in run["routes"].items():
+            before = old["routes"].get(route)
+            if before and before["p99_ms"]:
+                delta = (stats["p99_ms"] / before["p99_ms"] - 1) * 100
+                print(f"    {route:<11} p99 {before['p99_ms']:>8.2f} -> {stats['p99_ms']:>8.2f} ms ({delta:+.1f}%)")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main_async(args) -> dict:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    agent = HealthWellnessAgent()
+    mix = parse_mix(args.mix)
+    queries = build_queries(agent, mix, args.requests)
+    warmup = build_queries(agent, mix, args.warmup, seed=3)
+    print(f"{args.requests} requests (+{args.warmup} warm-up), concurrency {args.concurrency}, "
+          f"{args.sessions} sessions, fake OpenAI {args.openai_latency * 1000:.0f} ms; "
+          f"mix {dict(Counter(route for route, _ in queries))}")
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "requests": args.requests, "warmup": args.warmup, "concurrency": args.concurrency,
+            "sessions": args.sessions, "openai_latency": args.openai_latency, "mix": mix
+        },
+        "runs": {}
+    }
+    with FakeOpenAIServer(latency=args.openai_latency, token_interval=0) as server:
+        for mode in args.modes:
+            run = await RUNNERS[mode](queries, warmup, args.concurrency, args.sessions, server)
+            results["runs"][mode] = run
+            print_run(run)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", choices=sorted(RUNNERS), default=["asgi", "http"])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sessions", type=int, default=100, help="distinct X-Session-ID values")
+    parser.add_argument("--openai-latency", type=float, default=0.2, help="fake upstream latency in seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight pairs")
+    parser.add_argument("--out", help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    out = args.out or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults saved to {out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Run every benchmark and evaluation script as a subprocess, with small
+arguments so the whole suite takes a few minutes, and fail if any of them
+fails: each script asserts its own checks and gates (latency targets,
+import budgets, routing accuracy) and exits non-zero when one is missed.
+`--full` runs them with their default (full-size) arguments instead.
+
+Run from the backend directory:
+    python benchmarks/run_all.py [--full] [--only hooks scheduler ...] [--verbose]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(BENCHMARKS)
+
+# (script, quick arguments, arguments for every run); a script may appear more than once
+SUITE = [
+    ("bench_activity_store.py", ["--entries", "20000", "--users", "200", "--batch", "5000"], []),
+    ("bench_batch.py", ["--prompts", "20"], []),
+    ("bench_deadlines.py", ["--repeat", "200"], []),
+    ("bench_event_log.py", ["--events", "50000"], []),
+    ("bench_fallback_cache.py", ["--requests", "50"], []),
+    ("bench_goal_plans.py", ["--sessions", "20", "--turns", "10"], []),
+    ("bench_guardrails.py", ["--messages", "5000"], []),
+    ("bench_hooks.py", ["--rounds", "200", "--repeat", "1"], []),
+    ("bench_local_latency.py", ["--rounds", "50"], []),
+    ("bench_metrics.py", ["--rounds", "10"], []),
+    ("bench_plan_catalog.py", ["--plans", "500", "--repeat", "500"], []),
+    ("bench_plan_search.py", ["--items", "5000", "--repeat", "50"], []),
+    ("bench_progress_analytics.py", ["--years", "1"], []),
+    ("bench_rate_limit.py", [], []),
+    ("bench_response_cache.py", ["--calls", "2000"], []),
+    ("bench_router.py", [], []),
+    ("bench_scheduler.py", ["--users", "5000"], []),
+    ("bench_sessions.py", ["--sessions", "2000"], []),
+    ("bench_sessions.py", ["--sessions", "2000"], ["--backend", "sqlite"]),
+    ("bench_single_flight.py", ["--concurrency", "10", "--latency", "0.05"], []),
+    ("bench_startup.py", ["--runs", "3"], []),
+    ("bench_stream_ttfb.py", ["--requests", "3", "--latency", "0.05", "--tokens", "10"], []),
+    ("bench_upstream.py", ["--calls", "50"], []),
+    ("bench_workers.py", ["--workers", "1", "2", "--seconds", "2", "--clients", "1"], []),
+    ("eval_routing.py", [], []),
+    ("load_suite.py", ["--requests", "200", "--warmup", "20"], []),
+]
+
+
+def name_of(script: str) -> str:
+    """bench_hooks.py -> hooks, eval_routing.py -> eval_routing"""
+    stem = script[:-len(".py")]
+    return stem[len("bench_"):] if stem.startswith("bench_") else stem
+
+
+def run(script: str, arguments: list, timeout: float, verbose: bool) -> tuple:
+    """(exit code, seconds, output) of one script run from the backend directory"""
+    start = time.perf_counter()
+    try:
+        process = subprocess.run([sys.executable, os.path.join(BENCHMARKS, script), *arguments], cwd=BACKEND,
+                                 stdin=subprocess.DEVNULL, stdout=None if verbose else subprocess.PIPE,
+                                 stderr=subprocess.STDOUT, text=True, timeout=timeout)
+        code, output = process.returncode, process.stdout or ""
+    except subprocess.TimeoutExpired as e:
+        code, output = "timeout", e.stdout or ""
+        if isinstance(output, bytes):
+            output = output.decode(errors="replace")
+    return code, time.perf_counter() - start, output
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="default (full-size) arguments instead of quick ones")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="e.g. hooks scheduler eval_routing")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds per script")
+    parser.add_argument("--verbose", action="store_true", help="show every script's output as it runs")
+    args = parser.parse_args()
+
+    suite = [(script, [*fixed] if args.full else [*quick, *fixed])
+             for script, quick, fixed in SUITE if not args.only or name_of(script) in args.only]
+    unknown = set(args.only or ()) - {name_of(script) for script, _, _ in SUITE}
+    if unknown:
+        raise SystemExit(f"unknown benchmarks: {sorted(unknown)}")
+
+    failed = []
+    with tempfile.TemporaryDirectory(prefix="bench-results-") as results:
+        for script, arguments in suite:
+            if script == "load_suite.py":  # keep results files out of the tree
+                arguments = [*arguments, "--out", os.path.join(results, "load_suite.json")]
+            label = " ".join([script, *arguments])
+            code, seconds, output = run(script, arguments, args.timeout, args.verbose)
+            print(f"{'ok' if code == 0 else 'FAILED':<7} {seconds:>6.1f} s  {label}", flush=True)
+            if code != 0:
+                failed.append(label)
+                if not args.verbose:
+                    print("        " + "\n        ".join(output.rstrip().splitlines()[-15:]), flush=True)
+
+    print(f"{len(suite) - len(failed)} of {len(suite)} passed")
+    if failed:
+        raise SystemExit(f"failed: {'; '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
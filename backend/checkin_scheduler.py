@@ -0,0 +1,355 @@
+# health_wellness_agent2/checkin_scheduler.py
+import asyncio
+import calendar
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from data_dir import data_path
+
+logger = logging.getLogger(__name__)
+
+CADENCES = ("weekly", "biweekly", "monthly")
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class CheckinRule(NamedTuple):
+    """A user's recurring check-in: cadence, weekday (0 = Monday) and UTC time of day"""
+    uid: str
+    cadence: str = "weekly"
+    weekday: int = 0
+    hour: int = 9
+    minute: int = 0
+    next_due: float = 0.0
+
+
+def next_occurrence(rule: CheckinRule, after: float) -> float:
+    """
+    First check-in strictly after `after`. Weekly and biweekly rules fall
+    on the rule's weekday; monthly ones on that weekday's first occurrence
+    in the month. Biweekly counts from the rule's previous due time, so
+    the fortnight rhythm survives restarts.
+    """
+    moment = datetime.fromtimestamp(after, timezone.utc)
+    if rule.cadence == "monthly":
+        year, month = moment.year, moment.month
+        while True:
+            first = datetime(year, month, 1, rule.hour, rule.minute, tzinfo=timezone.utc)
+            due = first + timedelta(days=(rule.weekday - first.weekday()) % 7)
+            if due.timestamp() > after:
+                return due.timestamp()
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    step = 14 if rule.cadence == "biweekly" else 7
+    if rule.cadence == "biweekly" and rule.next_due:
+        due = rule.next_due
+        if due <= after:
+            periods = int((after - due) // (step * 86400)) + 1
+            due += periods * step * 86400
+        return due
+    day = moment.replace(hour=rule.hour, minute=rule.minute, second=0, microsecond=0)
+    due = day + timedelta(days=(rule.weekday - day.weekday()) % 7)
+    if due.timestamp() <= after:
+        due += timedelta(days=7)
+    return due.timestamp()
+
+
+def describe(rule: CheckinRule) -> str:
+    """"Every other Monday at 09:00 UTC" style description"""
+    weekday = calendar.day_name[rule.weekday]
+    when = f"{rule.hour:02d}:{rule.minute:02d} UTC"
+    if rule.cadence == "monthly":
+        return f"First {weekday} of every month at {when}"
+    if rule.cadence == "biweekly":
+        return f"Every other {weekday} at {when}"
+    return f"Every {weekday} at {when}"
+
+
+class DueQueue:
+    """
+    Min-heap of (due time, uid) with lazy invalidation: rescheduling a
+    uid pushes a new entry and bumps its version, older entries are
+    skipped when they surface. Push and pop are O(log n); finding the
+    next due time is O(1) (amortized over skipped entries).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        self._versions: Dict[str, int] = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def push(self, uid: str, due: float) -> None:
+        self._counter += 1
+        self._versions[uid] = self._counter
+        heapq.heappush(self._heap, (due, self._counter, uid))
+
+    def remove(self, uid: str) -> None:
+        self._versions.pop(uid, None)
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and self._versions.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+    def peek(self) -> Optional[float]:
+        """Earliest due time, or None when empty"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float, limit: int) -> List[Tuple[str, float]]:
+        """Remove and return up to `limit` (uid, due) entries due at or before `now`"""
+        batch = []
+        while len(batch) < limit:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            due, _, uid = heapq.heappop(self._heap)
+            del self._versions[uid]
+            batch.append((uid, due))
+        return batch
+
+    def rebuild(self, entries: List[Tuple[str, float]]) -> None:
+        """Replace the contents in O(n)"""
+        self._versions = {}
+        heap = []
+        for uid, due in entries:
+            self._counter += 1
+            self._versions[uid] = self._counter
+            heap.append((due, self._counter, uid))
+        heapq.heapify(heap)
+        self._heap = heap
+
+
+Deliver = Callable[[List[CheckinRule]], Awaitable[None]]
+
+
+class CheckinScheduler:
+    """
+    Recurring check-in reminders for many users.
+    Rules live in SQLite (checkin_rules, indexed on next_due and
+    updated_at) and an in-memory DueQueue orders them by due time. The
+    background task pops due rules in batches, claims each one in SQLite
+    (an UPDATE conditioned on the due time it saw, so several worker
+    processes never fire the same occurrence twice), records the
+    reminders in the checkin_reminders outbox, hands the batch to
+    `deliver`, and pushes the rules back with their next occurrence.
+    Rules changed by other workers are picked up through updated_at.
+    The clock and the wait between ticks are injectable for tests.
+    """
+
+    def __init__(self, path: str = "checkins.db", clock: Callable[[], float] = time.time,
+                 deliver: Optional[Deliver] = None, batch_size: int = 500, idle_seconds: float = 60.0):
+        self.path = path
+        self.clock = clock
+        self.deliver = deliver
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self.queue = DueQueue()
+        self.fired = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self._synced_at = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkin_rules (uid TEXT PRIMARY KEY, cadence TEXT NOT NULL, "
+                "weekday INTEGER NOT NULL, hour INTEGER NOT NULL, minute INTEGER NOT NULL, "
+                "next_due REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS checkin_rules_next_due ON checkin_rules(next_due)")
+            conn.execute("CREATE INDEX IF NOT EXISTS checkin_rules_updated_at ON checkin_rules(updated_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkin_reminders (id INTEGER PRIMARY KEY, uid TEXT NOT NULL, "
+                "due_at REAL NOT NULL, fired_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS checkin_reminders_uid ON checkin_reminders(uid, due_at)")
+            self._conn = conn
+        return self._conn
+
+    def _ensure_loaded(self) -> None:
+        """Fill the queue from SQLite on first use (O(n) heapify)"""
+        if not self._loaded:
+            with self._lock:
+                rows = self._connection().execute("SELECT uid, next_due, updated_at FROM checkin_rules").fetchall()
+            self.queue.rebuild([(uid, due) for uid, due, _ in rows])
+            self._synced_at = max((updated for _, _, updated in rows), default=0.0)
+            self._loaded = True
+
+    def _sync(self) -> None:
+        """Pick up rules other processes added or changed since the last sync"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT uid, next_due, updated_at FROM checkin_rules WHERE updated_at > ?", (self._synced_at,)
+            ).fetchall()
+        for uid, due, updated in rows:
+            self.queue.push(uid, due)
+            self._synced_at = max(self._synced_at, updated)
+
+    def set_rule(self, uid: str, cadence: str = "weekly", weekday: int = 0,
+                 hour: int = 9, minute: int = 0) -> CheckinRule:
+        """Create or change a user's rule; the next check-in is the first occurrence from now"""
+        if cadence not in CADENCES:
+            raise ValueError(f"unknown cadence: {cadence!r}")
+        self._ensure_loaded()
+        now = self.clock()
+        rule = CheckinRule(uid, cadence, weekday, hour, minute)
+        rule = rule._replace(next_due=next_occurrence(rule, now))
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO checkin_rules (uid, cadence, weekday, hour, minute, next_due, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (*rule, now)
+            )
+        self.queue.push(uid, rule.next_due)
+        self.wake()
+        return rule
+
+    def rule(self, uid: str) -> Optional[CheckinRule]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT uid, cadence, weekday, hour, minute, next_due FROM checkin_rules WHERE uid = ?", (uid,)
+            ).fetchone()
+        return CheckinRule(*row) if row else None
+
+    def cancel(self, uid: str) -> bool:
+        self._ensure_loaded()
+        with self._lock:
+            removed = self._connection().execute("DELETE FROM checkin_rules WHERE uid = ?", (uid,)).rowcount
+        self.queue.remove(uid)
+        return bool(removed)
+
+    def reminders(self, uid: str, limit: int = 10) -> List[Tuple[float, float]]:
+        """Most recent (due_at, fired_at) reminders of a user"""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT due_at, fired_at FROM checkin_reminders WHERE uid = ? ORDER BY due_at DESC LIMIT ?",
+                (uid, limit)
+            ).fetchall()
+
+    def _claim(self, batch: List[Tuple[str, float]], now: float) -> List[CheckinRule]:
+        """
+        Advance each popped rule to its next occurrence, keeping only the
+        ones whose due time still matches the database (not fired or
+        changed elsewhere), and record their reminders; one transaction.
+        A rule whose due time changed goes back on the queue with the
+        stored one, which fires in this round if it is already due. The
+        sync watermark is left alone: only _sync reads other workers' rows.
+        """
+        claimed = []
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = {
+                    row[0]: CheckinRule(*row) for row in conn.execute(
+                        "SELECT uid, cadence, weekday, hour, minute, next_due FROM checkin_rules "
+                        f"WHERE uid IN ({', '.join('?' * len(batch))})", [uid for uid, _ in batch]
+                    )
+                }
+                updates = []
+                for uid, due in batch:
+                    rule = current.get(uid)
+                    if rule is None:
+                        continue  # cancelled
+                    if rule.next_due != due:
+                        self.queue.push(uid, rule.next_due)  # changed or fired by another worker
+                        continue
+                    upcoming = next_occurrence(rule, now)
+                    updates.append((upcoming, now, uid))
+                    claimed.append(rule)
+                    self.queue.push(uid, upcoming)
+                conn.executemany("UPDATE checkin_rules SET next_due = ?, updated_at = ? WHERE uid = ?", updates)
+                conn.executemany(
+                    "INSERT INTO checkin_reminders (uid, due_at, fired_at) VALUES (?, ?, ?)",
+                    [(rule.uid, rule.next_due, now) for rule in claimed]
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    async def fire_due(self) -> int:
+        """Fire everything due now, batch by batch; returns how many reminders fired"""
+        self._ensure_loaded()
+        await asyncio.to_thread(self._sync)
+        fired = 0
+        now = self.clock()
+        while True:
+            batch = self.queue.pop_due(now, self.batch_size)
+            if not batch:
+                return fired
+            claimed = await asyncio.to_thread(self._claim, batch, now)
+            if claimed and self.deliver is not None:
+                try:
+                    await self.deliver(claimed)
+                except Exception:
+                    logger.exception("🔴 Check-in reminder delivery failed")
+            fired += len(claimed)
+            self.fired += len(claimed)
+
+    def wake(self) -> None:
+        """Re-plan the wait, e.g. after a rule was added"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        """Background loop: fire due batches, then wait until the next due time (or a wake-up)"""
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                fired = await self.fire_due()
+                if fired:
+                    logger.info("🔔 Fired %d check-in reminders", fired)
+            except Exception:
+                logger.exception("🔴 Check-in scheduler tick failed")
+            upcoming = self.queue.peek()
+            delay = self.idle_seconds if upcoming is None else min(self.idle_seconds, upcoming - self.clock())
+            self._wakeup.clear()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_checkin_scheduler() -> CheckinScheduler:
+    """Build the scheduler from CHECKIN_* environment variables"""
+    return CheckinScheduler(
+        os.getenv("CHECKIN_DB_PATH") or data_path("checkins.db"),
+        batch_size=int(os.getenv("CHECKIN_BATCH_SIZE", "500")),
+        idle_seconds=float(os.getenv("CHECKIN_IDLE_SECONDS", "60"))
+    )
@@ -1,30 +1,53 @@
-from typing import Optional, List, Dict
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from event_log import EventLog
+
+# Timeframe units in weeks
+WEEKS_PER = {"days": 1 / 7, "weeks": 1.0, "months": 52 / 12, "years": 52.0}
+
+class Goal(BaseModel):
+    """A parsed goal: "lose 5kg in 2 months" -> lose, 5.0, "kg", 2, "months" """
+    model_config = ConfigDict(frozen=True)
+
+    action: str
+    amount: float = Field(gt=0)
+    unit: Optional[str] = None
+    timeframe: int = Field(gt=0)
+    timeframe_unit: str
+
+    @property
+    def weeks(self) -> float:
+        return max(self.timeframe * WEEKS_PER[self.timeframe_unit], 1 / 7)
+
+    @property
+    def weekly_rate(self) -> float:
+        return self.amount / self.weeks
+
+    def describe(self) -> str:
+        amount = f"{self.amount:g}" + ("%" if self.unit == "%" else f" {self.unit}" if self.unit else "")
+        return f"{self.action} {amount} in {self.timeframe} {self.timeframe_unit}"
 
 class UserSessionContext(BaseModel):
     """
     Shared context class for tracking user session data across all tools and agents.
     Includes personal details, goals, plans, and interaction history.
+    Interaction history is kept in bounded EventLog ring buffers.
     """
     name: str = "Anonymous"
     uid: int = 0
-    goal: Optional[dict] = None
+    goal: Optional[Goal] = None
     diet_preferences: Optional[str] = None
+    # Derived from the goal by tools/plan_builder.py and reused until it changes
     workout_plan: Optional[dict] = None
-    meal_plan: Optional[List[str]] = None
+    meal_plan: Optional[dict] = None
     injury_notes: Optional[str] = None
-    handoff_logs: List[str] = []
-    progress_logs: List[Dict[str, str]] = []
+    handoff_logs: EventLog = Field(default_factory=EventLog)
+    progress_logs: EventLog = Field(default_factory=EventLog)
 
     def update_progress(self, update: str):
         """Log progress updates with timestamp"""
-        from datetime import datetime
-        self.progress_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "update": update
-        })
+        self.progress_logs.record("update", detail=update)
 
     def log_handoff(self, agent_name: str):
         """Record handoff events"""
-        from datetime import datetime
-        self.handoff_logs.append(f"{datetime.now().isoformat()} - Handoff to {agent_name}")
\ No newline at end of file
+        self.handoff_logs.record("handoff", detail=agent_name)
@@ -0,0 +1,11 @@
+# health_wellness_agent2/data_dir.py
+import os
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def data_path(filename: str) -> str:
+    """Path of a state file (SQLite database) in DATA_DIR, default backend/data/, created on first use"""
+    directory = os.getenv("DATA_DIR") or DEFAULT_DATA_DIR
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
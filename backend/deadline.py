@@ -0,0 +1,97 @@
+# health_wellness_agent2/deadline.py
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+TIMEOUT_ANSWER = (
+    "⌛ That took longer than expected, so here is a short answer instead.\n"
+    "💡 Please try again in a moment, or ask about workouts, meal plans, "
+    "injuries or progress tracking."
+)
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before an answer was ready"""
+
+
+class ClientDisconnected(Exception):
+    """The client went away before an answer was ready"""
+
+
+class Deadline:
+    """Absolute point in time (monotonic clock) by which a request must be answered"""
+
+    __slots__ = ("at",)
+
+    def __init__(self, seconds: float):
+        self.at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.at
+
+
+# The deadline of the request being handled, visible to everything it awaits
+# (agent, sub-agents, tools, the OpenAI client) without passing it around
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining(default: float) -> float:
+    """Seconds left for a call: `default`, capped by the current deadline"""
+    deadline = _current.get()
+    return default if deadline is None else min(default, deadline.remaining())
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded when the current deadline has already passed"""
+    deadline = _current.get()
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded("deadline passed before the step started")
+
+
+async def _scoped(deadline: Deadline, work: Awaitable[T]) -> T:
+    _current.set(deadline)  # the task runs in its own copy of the context
+    return await work
+
+
+async def run_with_deadline(work: Awaitable[T], deadline: Deadline,
+                            disconnected: Optional[Awaitable[Any]] = None) -> T:
+    """
+    Run `work` as a task with `deadline` as the current deadline. Raises
+    DeadlineExceeded when it passes and ClientDisconnected when
+    `disconnected` (e.g. wait_for_disconnect) finishes first. In every
+    case the work is cancelled and awaited before this returns, so nothing
+    started for the request outlives it.
+    """
+    task = asyncio.ensure_future(_scoped(deadline, work))
+    watcher = asyncio.ensure_future(disconnected) if disconnected is not None else None
+    waiting = {task} if watcher is None else {task, watcher}
+    try:
+        done, _ = await asyncio.wait(waiting, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            return task.result()
+        if watcher is not None and watcher in done:
+            raise ClientDisconnected()
+        raise DeadlineExceeded("no answer within the deadline")
+    finally:
+        for pending in waiting:
+            pending.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+
+
+async def wait_for_disconnect(receive) -> None:
+    """Return once the ASGI client disconnects (the request body must already be read)"""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
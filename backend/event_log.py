@@ -0,0 +1,148 @@
+# health_wellness_agent2/event_log.py
+import time
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+# Wall-clock anchor for the monotonic clock: timestamps never go backwards
+# within a process but still convert to real dates.
+_WALL_ANCHOR = time.time()
+_MONO_ANCHOR = time.monotonic()
+
+# Event names are stored as small integer codes
+_EVENT_NAMES: List[str] = []
+_EVENT_CODES: Dict[str, int] = {}
+
+# How the subject/detail columns are named when a record is read back
+_FIELD_NAMES = {
+    "agent_start": ("agent", None),
+    "agent_end": ("agent", None),
+    "tool_start": ("tool", None),
+    "tool_end": ("tool", None),
+    "handoff": ("from", "to"),
+    "update": (None, "update")
+}
+
+
+def now() -> float:
+    """Seconds since the epoch, derived from the monotonic clock"""
+    return _WALL_ANCHOR + (time.monotonic() - _MONO_ANCHOR)
+
+
+def _event_code(event: str) -> int:
+    code = _EVENT_CODES.get(event)
+    if code is None:
+        code = _EVENT_CODES[event] = len(_EVENT_NAMES)
+        _EVENT_NAMES.append(event)
+    return code
+
+
+class EventLog:
+    """
+    Fixed-capacity ring buffer of (timestamp, event, subject, detail)
+    records. Timestamps are floats in an array and event names are
+    integer codes; both are only turned into strings/dicts when read.
+    Once full, each new record overwrites the oldest one.
+    """
+
+    __slots__ = ("capacity", "_times", "_events", "_subjects", "_details", "_start", "_size")
+
+    DEFAULT_CAPACITY = 100
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = max(1, capacity)
+        self._times = array("d", bytes(8 * self.capacity))
+        self._events = array("H", bytes(2 * self.capacity))
+        self._subjects: List[Optional[str]] = [None] * self.capacity
+        self._details: List[Optional[str]] = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def record(self, event: str, subject: Optional[str] = None, detail: Optional[str] = None,
+               timestamp: Optional[float] = None) -> None:
+        """Append a record, overwriting the oldest when full"""
+        if self._size < self.capacity:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._times[slot] = now() if timestamp is None else timestamp
+        self._events[slot] = _event_code(event)
+        self._subjects[slot] = subject
+        self._details[slot] = detail
+
+    def _slots(self) -> Iterator[int]:
+        for i in range(self._size):
+            yield (self._start + i) % self.capacity
+
+    def rows(self) -> List[list]:
+        """Raw [timestamp, event, subject, detail] rows, oldest first"""
+        return [
+            [self._times[s], _EVENT_NAMES[self._events[s]], self._subjects[s], self._details[s]]
+            for s in self._slots()
+        ]
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        """Records as dicts with ISO timestamps, oldest first"""
+        for timestamp, event, subject, detail in self.rows():
+            subject_key, detail_key = _FIELD_NAMES.get(event, ("subject", "detail"))
+            entry = {"timestamp": datetime.fromtimestamp(timestamp).isoformat()}
+            if event != "update":
+                entry["event"] = event
+            if subject is not None:
+                entry[subject_key or "subject"] = subject
+            if detail is not None:
+                entry[detail_key or "detail"] = detail
+            yield entry
+
+    def to_list(self) -> List[Dict[str, str]]:
+        return list(self)
+
+    def truncate(self, limit: int) -> None:
+        """Drop all but the newest `limit` records"""
+        while self._size > max(0, limit):
+            slot = self._start
+            self._subjects[slot] = self._details[slot] = None
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+
+    @classmethod
+    def from_rows(cls, rows: List[Any], capacity: int = DEFAULT_CAPACITY) -> "EventLog":
+        """
+        Rebuild from serialized rows. Also accepts the older list-of-dicts
+        form with ISO "timestamp" strings.
+        """
+        log = cls(max(capacity, len(rows)))
+        for row in rows:
+            if isinstance(row, dict):
+                row = dict(row)
+                timestamp = datetime.fromisoformat(row.pop("timestamp")).timestamp()
+                event = row.pop("event", "update")
+                subject_key, detail_key = _FIELD_NAMES.get(event, ("subject", "detail"))
+                log.record(event, row.get(subject_key), row.get(detail_key), timestamp)
+            elif isinstance(row, str):
+                log.record("note", None, row)
+            else:
+                timestamp, event, subject, detail = row
+                log.record(event, subject, detail, timestamp)
+        return log
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any):
+        from pydantic_core import core_schema
+
+        def validate(value: Any) -> "EventLog":
+            if isinstance(value, cls):
+                return value
+            if isinstance(value, (list, tuple)):
+                return cls.from_rows(list(value))
+            raise ValueError("EventLog expects a list of records")
+
+        return core_schema.no_info_plain_validator_function(
+            validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda log: log.rows())
+        )
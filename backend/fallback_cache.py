@@ -0,0 +1,224 @@
+# health_wellness_agent2/fallback_cache.py
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Set, Tuple
+from data_dir import data_path
+
+_NON_WORD = re.compile(r"[^a-z0-9%]+")
+
+# Words that do not change what a question asks; negations ("not", "t" from
+# "don't") and question words are not among them
+FILLER_WORDS = frozenset("""
+a an the i i'm me my you your please is are am be it its this that to of
+for do does can could would will should just
+""".split())
+
+# Lowest accepted similarity: a looser match serves the wrong advice
+MIN_SIMILARITY = 0.9
+
+
+def content_words(key: str) -> FrozenSet[str]:
+    """The words of a normalized query that carry its meaning"""
+    return frozenset(word for word in key.split() if word not in FILLER_WORDS)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+class FallbackCache:
+    """
+    TTL + LRU cache for OpenAI fallback answers keyed on normalized query
+    text. Similarity matching is off by default. When enabled, a miss on
+    the exact key falls back to a cached query with exactly the same
+    content words (so "lose"/"gain", "safe"/"unsafe" or an added "not"
+    never match) whose cosine over hashed word and character n-grams is
+    at least the threshold (never below MIN_SIMILARITY).
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400.0,
+                 similarity_threshold: Optional[float] = None, buckets: int = 1 << 20):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.buckets = buckets
+        self._entries: "OrderedDict[str, Tuple[float, Any, FrozenSet[int]]]" = OrderedDict()
+        self._index: Dict[FrozenSet[str], Set[str]] = {}
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _features(self, key: str) -> FrozenSet[int]:
+        words = key.split()
+        grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        padded = f" {key} "
+        grams += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return frozenset(zlib.crc32(gram.encode()) % self.buckets for gram in grams)
+
+    def get(self, query: str, similarity_threshold: Optional[float] = None) -> Optional[Any]:
+        """
+        Cached value for the query (or a similar one), counting hits and
+        misses. `similarity_threshold` overrides the configured threshold
+        for this lookup, e.g. to accept looser matches when OpenAI is off limits.
+        """
+        key = normalize_query(query)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        threshold = self.similarity_threshold if similarity_threshold is None else similarity_threshold
+        if threshold is not None:
+            match = self._most_similar(key, now, max(threshold, MIN_SIMILARITY))
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.similar_hits += 1
+                return self._entries[match][1]
+
+        self.misses += 1
+        return None
+
+    def _most_similar(self, query_key: str, now: float, threshold: float) -> Optional[str]:
+        candidates = self._index.get(content_words(query_key))
+        if not candidates:
+            return None
+        features = self._features(query_key)
+        best_key, best_score = None, threshold
+        for key in candidates:
+            expires, _, other = self._entries[key]
+            score = len(features & other) / math.sqrt(len(features) * len(other))
+            if score >= best_score and expires > now:
+                best_key, best_score = key, score
+        return best_key
+
+    def put(self, query: str, value: Any) -> None:
+        key = normalize_query(query)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, self._features(key))
+        self._index.setdefault(content_words(key), set()).add(key)
+        self._evict()
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key)
+        words = content_words(key)
+        keys = self._index[words]
+        keys.discard(key)
+        if not keys:
+            del self._index[words]
+
+    def _evict(self) -> None:
+        """Drop expired entries from the cold end, then enforce the size cap"""
+        now = time.monotonic()
+        while self._entries:
+            key, (expires, _, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            self._remove(key)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.similar_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+class SharedFallbackCache(FallbackCache):
+    """
+    FallbackCache backed by a SQLite (WAL) table shared by every worker
+    process. Lookups try this worker's in-memory cache first (including
+    similar-query matches), then the shared table by exact normalized key;
+    answers fetched by any worker are written through to the table.
+    Shared lookups are primary-key reads on local disk and run inline.
+    """
+
+    PURGE_EVERY = 1000  # puts between expired-row sweeps
+
+    def __init__(self, path: str = "fallback_cache.db", **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.shared_hits = 0
+        self._puts = 0
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fallback_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, query: str, similarity_threshold: Optional[float] = None) -> Optional[Any]:
+        value = super().get(query, similarity_threshold)
+        if value is not None:
+            return value
+        row = self._connection().execute(
+            "SELECT value FROM fallback_cache WHERE key = ? AND expires_at > ?",
+            (normalize_query(query), time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        self.misses -= 1  # counted by the in-memory lookup, but answered here
+        self.shared_hits += 1
+        super().put(query, value)
+        return value
+
+    def put(self, query: str, value: Any) -> None:
+        super().put(query, value)
+        self._puts += 1
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fallback_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (normalize_query(query), json.dumps(value), now + self.ttl_seconds)
+            )
+            if self._puts % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM fallback_cache WHERE expires_at <= ?", (now,))
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        lookups = self.hits + self.similar_hits + self.shared_hits + self.misses
+        stats["shared_hits"] = self.shared_hits
+        stats["hit_rate"] = round((lookups - self.misses) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def create_fallback_cache() -> FallbackCache:
+    """Build the cache from FALLBACK_CACHE_* environment variables"""
+    similarity = os.getenv("FALLBACK_CACHE_SIMILARITY", "off").strip().lower()
+    options = dict(
+        max_entries=int(os.getenv("FALLBACK_CACHE_SIZE", "1000")),
+        ttl_seconds=float(os.getenv("FALLBACK_CACHE_TTL_SECONDS", "86400")),
+        similarity_threshold=None if similarity in ("", "off", "none") else float(similarity)
+    )
+    if os.getenv("FALLBACK_CACHE_BACKEND", "memory").lower() == "sqlite":
+        return SharedFallbackCache(os.getenv("FALLBACK_CACHE_DB_PATH") or data_path("fallback_cache.db"), **options)
+    return FallbackCache(**options)
@@ -1,12 +1,27 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from main import HealthWellnessAgent, UserSessionContext
-from openai import AsyncOpenAI
+from fastapi.responses import StreamingResponse
+from agent import HealthWellnessAgent
+from hooks import HookRegistry, RunHooks, StreamingHooks
+from fallback_cache import create_fallback_cache, normalize_query
+from deadline import (TIMEOUT_ANSWER, ClientDisconnected, Deadline, DeadlineExceeded, run_with_deadline,
+                      wait_for_disconnect)
+from latency import LatencyBudget
+from metrics import MetricsRegistry, create_metrics_store
+from sessions import SESSION_COOKIE, SESSION_HEADER, create_session_store, new_session_id, session_uid
+from single_flight import SingleFlight
+from openai_client import SERVICE_UNAVAILABLE_ANSWER, UpstreamUnavailable, create_upstream_client
+from plan_catalog import catalog
+from rate_limit import RATE_LIMITED_ANSWER, create_fallback_limiter, estimate_tokens
+from tools.scheduler import checkin_scheduler
 import os
+import json
+import asyncio
+import time
 from dotenv import load_dotenv, find_dotenv
-from typing import Optional
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Tuple
 import logging
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +31,16 @@ def needs_openai_fallback(response: str) -> bool:
     """Check if we need OpenAI fallback"""
     return "__FALLBACK__" in response
 
+QUERY_ERROR_DETAIL = (
+    "❌ Something went wrong while processing your query.\n"
+    "🔍 Possible causes:\n"
+    "1. Missing or incorrect OPENAI_API_KEY in your .env file.\n"
+    "2. Network or timeout issue connecting to OpenAI servers.\n"
+    "3. Malformed or invalid request payload.\n"
+    "4. OpenAI API limit or service outage.\n"
+    "📋 Check server logs for full error trace."
+)
+
 # Initialize FastAPI
 app = FastAPI(
     title="Health Assistant API",
@@ -25,9 +50,58 @@ app = FastAPI(
 
 # Load environment
 load_dotenv(find_dotenv())
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-agent = HealthWellnessAgent()
-context = UserSessionContext()
+upstream = create_upstream_client()
+agent_hooks = HookRegistry()
+if os.getenv("AGENT_HOOKS", "off").lower() in ("1", "on", "true"):
+    agent_hooks.subscribe(RunHooks.deliver)
+agent = HealthWellnessAgent(hooks=agent_hooks)
+sessions = create_session_store()
+fallback_cache = create_fallback_cache()
+openai_flights = SingleFlight()
+limiter = create_fallback_limiter()
+# Similar cached answers accepted in place of OpenAI once a budget is exhausted
+# (off: the cache's own setting, exact matches by default)
+_limited_similarity = os.getenv("FALLBACK_LIMITED_SIMILARITY", "off").strip().lower()
+LIMITED_SIMILARITY = None if _limited_similarity in ("", "off", "none") else float(_limited_similarity)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Longest a query may take end to end (agent, sub-agents and the OpenAI fallback);
+# `timeout_ms` on a request can only shorten it
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "15"))
+
+# Metrics (per worker process, scraped from /metrics)
+metrics_registry = MetricsRegistry()
+query_count = metrics_registry.counter(
+    "health_queries_total", "Queries answered", ("endpoint", "route", "source", "status"))
+query_latency = metrics_registry.histogram(
+    "health_query_duration_seconds", "Query latency", ("endpoint", "route", "source", "status"))
+inflight_requests = metrics_registry.gauge(
+    "health_inflight_requests", "Requests currently being processed", ("endpoint",))
+openai_tokens = metrics_registry.counter(
+    "health_openai_tokens_total", "OpenAI token usage", ("kind",))
+openai_latency = metrics_registry.histogram(
+    "health_openai_request_duration_seconds", "OpenAI completion latency", ("status",))
+fallback_limited = metrics_registry.counter(
+    "health_fallback_limited_total", "OpenAI fallbacks refused by a rate or token budget", ("budget",))
+checkin_reminders = metrics_registry.counter(
+    "health_checkin_reminders_total", "Check-in reminders fired", ("cadence",))
+# With several workers each one publishes snapshots here and /metrics sums them
+metrics_store = create_metrics_store()
+METRICS_PUBLISH_SECONDS = float(os.getenv("METRICS_PUBLISH_SECONDS", "5"))
+# Load the OpenAI SDK, NumPy and the routing tables in the background after
+# startup (off: on first use only, e.g. for short-lived processes)
+PREWARM = os.getenv("PREWARM", "on").lower() in ("1", "on", "true")
+# Fire recurring check-in reminders from this process (off for API-less tooling)
+CHECKIN_SCHEDULER = os.getenv("CHECKIN_SCHEDULER", "on").lower() in ("1", "on", "true")
+WORKER_ID = str(os.getpid())
+
+# Environment applied by `python fast_api.py --prod` before the workers start,
+# so every worker shares sessions, fallback answers, fallback budgets and metrics through SQLite
+PRODUCTION_ENV = {
+    "SESSION_BACKEND": "sqlite",
+    "FALLBACK_CACHE_BACKEND": "sqlite",
+    "FALLBACK_LIMIT_BACKEND": "sqlite",
+    "METRICS_BACKEND": "sqlite"
+}
 
 # CORS setup
 app.add_middleware(
@@ -35,12 +109,157 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[SESSION_HEADER],
 )
 
+def record_query(endpoint: str, route: str, source: str, status: str, started: float) -> None:
+    """Count a finished query and observe its latency since `started` (perf_counter)"""
+    query_count.inc(endpoint, route, source, status)
+    query_latency.observe(time.perf_counter() - started, endpoint, route, source, status)
+
+def record_usage(usage) -> None:
+    """Export token counts from an OpenAI usage block"""
+    if usage is not None:
+        openai_tokens.inc("prompt", amount=usage.prompt_tokens)
+        openai_tokens.inc("completion", amount=usage.completion_tokens)
+
+def get_session_id(request: Request) -> str:
+    """Session ID from the X-Session-ID header or session cookie, or a new one"""
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if session_id and len(session_id) <= 128:
+        return session_id
+    return new_session_id()
+
 class QueryResponse(BaseModel):
     response: str
     source: str
     tokens_used: Optional[int] = None
+    timings_ms: Optional[Dict[str, float]] = None
+    budget_ms: Optional[float] = None
+    budget_exceeded: Optional[bool] = None
+
+class BatchQueryRequest(BaseModel):
+    inputs: List[Annotated[str, Field(min_length=2, max_length=200)]] = Field(..., min_length=1, max_length=100)
+
+class BatchItem(BaseModel):
+    response: Optional[str] = None
+    source: Optional[str] = None
+    tokens_used: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchItem]
+
+SYSTEM_PROMPT = """You are a certified health assistant. Follow these rules:
+            1. For factual queries: Provide concise 1-2 sentence answers
+            2. For instructional content: Use bullet points
+            3. For controversial topics: State "Consult your doctor"
+            4. Never make medical diagnoses
+            5. Format numbers clearly (e.g. "8-12 reps")
+            6. Use metric units by default"""
+
+COMPLETION_PARAMS = {
+    "model": "gpt-3.5-turbo",
+    "max_tokens": 120,  # Slightly increased for better formatting
+    "temperature": 0.5,  # Balanced between creativity and accuracy
+    "top_p": 0.9,
+    "frequency_penalty": 0.2,  # Reduces repetition
+    "presence_penalty": 0.1    # Encourages topic focus
+}
+
+async def ask_openai(user_input: str) -> Tuple[str, Any]:
+    """Fallback completion; returns the answer text and the usage block"""
+    started = time.perf_counter()
+    try:
+        ai_response = await upstream.complete(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_input}
+            ],
+            **COMPLETION_PARAMS
+        )
+    except Exception:
+        openai_latency.observe(time.perf_counter() - started, "error")
+        raise
+    openai_latency.observe(time.perf_counter() - started, "ok")
+    record_usage(ai_response.usage)
+    return ai_response.choices[0].message.content, ai_response.usage
+
+def flight_key(user_input: str) -> tuple:
+    """Identical in-flight requests share one upstream call"""
+    return normalize_query(user_input), tuple(sorted(COMPLETION_PARAMS.items()))
+
+class FallbackLimited(Exception):
+    """A rate or token budget refused the OpenAI call"""
+
+def fallback_reserve(user_input: str) -> int:
+    """Tokens reserved against the budgets before a call (prompt estimate + max completion)"""
+    return estimate_tokens(SYSTEM_PROMPT, user_input, max_completion=COMPLETION_PARAMS["max_tokens"])
+
+def acquire_fallback(session_id: Optional[str], reserve: int) -> None:
+    """Take one call and `reserve` tokens from the budgets, or raise FallbackLimited"""
+    reason = limiter.acquire(session_id, reserve)
+    if reason is not None:
+        fallback_limited.inc(reason)
+        raise FallbackLimited(reason)
+
+def degraded_answer(user_input: str, notice: str = RATE_LIMITED_ANSWER,
+                    source: str = "rate_limited") -> Tuple[str, Optional[int], str]:
+    """Answer without OpenAI: a cached answer (FALLBACK_LIMITED_SIMILARITY), else a local notice"""
+    cached = fallback_cache.get(user_input, LIMITED_SIMILARITY)
+    if cached is not None:
+        return cached, None, "cache"
+    return notice, None, source
+
+def request_deadline(timeout_ms: Optional[float] = None) -> Deadline:
+    """Deadline for a request: QUERY_TIMEOUT_SECONDS, or sooner when the client asks"""
+    seconds = QUERY_TIMEOUT_SECONDS if timeout_ms is None else min(QUERY_TIMEOUT_SECONDS, timeout_ms / 1000)
+    return Deadline(seconds)
+
+async def answer_locally(user_input: str, context, intent) -> Tuple[str, str]:
+    """
+    Local answer for a classified message, as (response, source). Weak
+    keyword matches (between the routing thresholds) prefer a cached
+    fallback answer when one exists; the response is "__FALLBACK__" when
+    the match is too weak to answer locally at all.
+    """
+    if agent.decide(intent) == "cached":
+        cached = fallback_cache.get(user_input)
+        if cached is not None:
+            return cached, "cache"
+    return await agent.handle_message(user_input, context, intent), "local"
+
+async def answer_with_fallback(user_input: str, session_id: Optional[str] = None) -> Tuple[str, Optional[int], str]:
+    """
+    Serve a fallback answer from the cache when possible; returns
+    (answer, tokens, source). While OpenAI is unavailable the answer is a
+    local notice with source "unavailable"; once the session's or the
+    global budget is spent it is a degraded answer (see degraded_answer).
+    """
+    cached = fallback_cache.get(user_input)
+    if cached is not None:
+        return cached, None, "cache"
+
+    async def fetch() -> Tuple[str, int]:
+        reserve = fallback_reserve(user_input)
+        acquire_fallback(session_id, reserve)
+        usage = None
+        try:
+            content, usage = await ask_openai(user_input)
+        finally:
+            limiter.settle(session_id, reserve, usage.total_tokens if usage else None)
+        fallback_cache.put(user_input, content)
+        return content, usage.completion_tokens
+
+    try:
+        content, tokens_used = await openai_flights.do(flight_key(user_input), fetch)
+    except UpstreamUnavailable as e:
+        logger.warning("🔌 OpenAI unavailable: %s", e)
+        return SERVICE_UNAVAILABLE_ANSWER, None, "unavailable"
+    except FallbackLimited as e:
+        logger.info("⏳ Fallback budget exhausted (%s)", e)
+        return degraded_answer(user_input)
+    return content, tokens_used, "openai"
 
 @app.get("/")
 async def health_check():
@@ -49,74 +268,404 @@ async def health_check():
         "docs": "http://127.0.0.1:8000/docs"
     }
 
+async def publish_metrics() -> None:
+    snapshot = metrics_registry.snapshot()
+    await asyncio.to_thread(metrics_store.publish, WORKER_ID, snapshot)
+
+async def publish_metrics_forever() -> None:
+    while True:
+        await asyncio.sleep(METRICS_PUBLISH_SECONDS)
+        try:
+            await publish_metrics()
+        except Exception:
+            logger.exception("🔴 Failed to publish worker metrics")
+
+def warm_up() -> None:
+    """Build the router, sub-agents and plan search index, and import the OpenAI SDK and NumPy"""
+    agent.warm_up()
+    upstream.warm_up()
+    from tools.plan_search import current_index
+    from tools.tracker import load_analytics
+
+    load_analytics()  # NumPy, for progress trends
+
+    current_index()  # the plan search index, built from the loaded catalog
+
+@app.on_event("startup")
+async def start_warm_up():
+    # The worker accepts requests right away; the rest loads in a thread
+    if PREWARM:
+        app.state.warm_up = asyncio.create_task(asyncio.to_thread(warm_up))
+
+@app.on_event("startup")
+async def start_metrics_publisher():
+    if metrics_store is not None:
+        app.state.metrics_publisher = asyncio.create_task(publish_metrics_forever())
+
+@app.on_event("startup")
+async def start_catalog_refresh():
+    # Catalog files are checked for changes here, not on every request
+    app.state.catalog_refresh = asyncio.create_task(catalog.refresh_forever())
+
+async def deliver_checkins(rules) -> None:
+    """Reminders are kept in the scheduler's outbox (GET /checkins); count them here"""
+    for rule in rules:
+        checkin_reminders.inc(rule.cadence)
+
+@app.on_event("startup")
+async def start_checkin_scheduler():
+    if CHECKIN_SCHEDULER:
+        checkin_scheduler.deliver = deliver_checkins
+        app.state.checkin_scheduler = checkin_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_checkin_scheduler():
+    await checkin_scheduler.stop()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    # The startup tasks above; the check-in scheduler stops itself
+    tasks = [getattr(app.state, name, None) for name in ("warm_up", "metrics_publisher", "catalog_refresh")]
+    tasks = [task for task in tasks if task is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus text exposition. With a shared metrics store the series of
+    every worker are summed; otherwise this worker's own are returned.
+    """
+    if metrics_store is None:
+        return Response(metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+    await publish_metrics()
+    snapshots = await asyncio.to_thread(metrics_store.collect)
+    return Response(metrics_registry.merged(snapshots).render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
+@app.get("/health/openai")
+async def openai_health():
+    """Upstream status; probes OpenAI only when nothing succeeded recently"""
+    return {**await upstream.health(), **upstream.stats()}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {**fallback_cache.stats(), "single_flight": openai_flights.stats(), "limits": limiter.stats()}
+
+@app.get("/checkins")
+async def checkins(request: Request):
+    """The session's check-in rule and its most recent fired reminders"""
+    uid = session_uid(get_session_id(request))
+    rule = await asyncio.to_thread(checkin_scheduler.rule, uid)
+    reminders = await asyncio.to_thread(checkin_scheduler.reminders, uid)
+    return {
+        "rule": rule._asdict() if rule else None,
+        "reminders": [{"due_at": due_at, "fired_at": fired_at} for due_at, fired_at in reminders]
+    }
+
 @app.post("/query", response_model=QueryResponse)
-async def handle_query(user_input: str = Query(..., min_length=2, max_length=200)):
-    try:
+async def handle_query(
+    request: Request,
+    response: Response,
+    user_input: str = Query(..., min_length=2, max_length=200),
+    budget_ms: Optional[float] = Query(None, gt=0, description="Latency budget; adds per-stage timings to the response"),
+    timeout_ms: Optional[float] = Query(None, gt=0, description="Answer within this time (capped by the server's limit)")
+):
+    """
+    Answer one query within the request deadline. The work is cancelled
+    when the client disconnects; on timeout the answer is a cached one
+    for a similar question or a short notice (source "timeout").
+    """
+    session_id = get_session_id(request)
+    response.headers[SESSION_HEADER] = session_id
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    budget = LatencyBudget(budget_ms)
+    started = time.perf_counter()
+    inflight_requests.inc("/query")
+    route, source, status = "unknown", "local", "error"
+
+    async def answer() -> dict:
+        nonlocal route, source
+        with budget.stage("session_load"):
+            context = await sessions.load(session_id)
         # Try local response first
-        local_response = await agent.handle_message(user_input, context)
-        
+        with budget.stage("local"):
+            screened = agent.screen(user_input, context)
+            intent = agent.classify(screened.text, screened.goal)
+            route = intent.route
+            if screened.rejection is not None:
+                source = "guardrail"
+                return {"response": screened.rejection, "source": source}
+            local_response, source = await answer_locally(screened.text, context, intent)
+        with budget.stage("session_save"):
+            await sessions.save(session_id, context)
+
         if not needs_openai_fallback(local_response):
-            return {"response": local_response, "source": "local"}
-            
-        # Fallback to OpenAI
-        ai_response = await client.chat.completions.create(
-    model="gpt-3.5-turbo",
-    messages=[
-        {
-            "role": "system",
-            "content": """You are a certified health assistant. Follow these rules:
-            1. For factual queries: Provide concise 1-2 sentence answers
-            2. For instructional content: Use bullet points
-            3. For controversial topics: State "Consult your doctor"
-            4. Never make medical diagnoses
-            5. Format numbers clearly (e.g. "8-12 reps")
-            6. Use metric units by default"""
-        },
-        {
-            "role": "user",
-            "content": user_input
-        }
-    ],
-    max_tokens=120,  # Slightly increased for better formatting
-    temperature=0.5,  # Balanced between creativity and accuracy
-    top_p=0.9,
-    frequency_penalty=0.2,  # Reduces repetition
-    presence_penalty=0.1    # Encourages topic focus
-)
-        
-        return {
-            "response": ai_response.choices[0].message.content,
-            "source": "openai",
-            "tokens_used": ai_response.usage.completion_tokens
-        }
+            return {"response": local_response, "source": source}
+        # Fallback to OpenAI (or a cached answer to a similar question)
+        source = "openai"
+        with budget.stage("fallback"):
+            content, tokens_used, source = await answer_with_fallback(screened.text, session_id)
+        return {"response": content, "source": source, "tokens_used": tokens_used}
+
+    try:
+        try:
+            result = await run_with_deadline(answer(), request_deadline(timeout_ms),
+                                             wait_for_disconnect(request.receive))
+        except DeadlineExceeded:
+            logger.warning("⌛ Query timed out on route %s (%s)", route, source)
+            content, _, source = degraded_answer(user_input, TIMEOUT_ANSWER, "timeout")
+            result = {"response": content, "source": source}
+        except ClientDisconnected:
+            logger.info("🔌 Client disconnected, query cancelled")
+            status = "cancelled"
+            return Response(status_code=499)
+
+        if budget_ms is not None:
+            result.update(budget.report())
+            if result["budget_exceeded"]:
+                logger.warning("⏱️ Latency budget exceeded: %s", result["timings_ms"])
+        status = "ok"
+        return result
         
     except Exception :
         logger.exception("🔴 Exception during OpenAI query processing")  # logs full traceback
+    finally:
+        inflight_requests.dec("/query")
+        record_query("/query", route, source, status, started)
+
+    raise HTTPException(status_code=500, detail=QUERY_ERROR_DETAIL)
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def handle_query_batch(request: Request, response: Response, batch: BatchQueryRequest):
+    """
+    Answer many prompts in one call. Local answers are resolved in-process;
+    the rest go to the OpenAI fallback concurrently, at most
+    BATCH_CONCURRENCY at a time. Results keep the input order and a failed
+    item reports its error without failing the batch.
+    """
+    session_id = get_session_id(request)
+    response.headers[SESSION_HEADER] = session_id
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+
+    inflight_requests.inc("/query/batch")
+    results: List[Optional[dict]] = [None] * len(batch.inputs)
+    try:
+        await run_with_deadline(answer_batch(session_id, batch, results), request_deadline(),
+                                wait_for_disconnect(request.receive))
+    except DeadlineExceeded:
+        # keep what was answered; the rest get a degraded answer
+        unanswered = [i for i, result in enumerate(results) if result is None]
+        logger.warning("⌛ Batch timed out with %d of %d unanswered", len(unanswered), len(results))
+        for i in unanswered:
+            content, _, source = degraded_answer(batch.inputs[i], TIMEOUT_ANSWER, "timeout")
+            results[i] = {"response": content, "source": source}
+    except ClientDisconnected:
+        logger.info("🔌 Client disconnected, batch cancelled")
+        return Response(status_code=499)
+    finally:
+        inflight_requests.dec("/query/batch")
+    return {"results": results}
+
+async def answer_batch(session_id: str, batch: BatchQueryRequest, results: List[Optional[dict]]) -> None:
+    """Resolve every prompt of a batch against one session, filling `results` in input order"""
+    context = await sessions.load(session_id)
+    screened = agent.screen_batch(batch.inputs, context)
+    texts = [result.text for result in screened]
+    routes: List[str] = []
+    pending = []
+    for i, user_input in enumerate(texts):
+        started = time.perf_counter()
+        intent = agent.classify(user_input, screened[i].goal)
+        routes.append(intent.route)
+        if screened[i].rejection is not None:
+            results[i] = {"response": screened[i].rejection, "source": "guardrail"}
+            record_query("/query/batch", intent.route, "guardrail", "ok", started)
+            continue
+        local_response, source = await answer_locally(user_input, context, intent)
+        if needs_openai_fallback(local_response):
+            pending.append(i)
+        else:
+            results[i] = {"response": local_response, "source": source}
+            record_query("/query/batch", intent.route, source, "ok", started)
+    await sessions.save(session_id, context)
 
-    raise HTTPException(
-        status_code=500,
-        detail=(
-            "❌ Something went wrong while processing your query.\n"
-            "🔍 Possible causes:\n"
-            "1. Missing or incorrect OPENAI_API_KEY in your .env file.\n"
-            "2. Network or timeout issue connecting to OpenAI servers.\n"
-            "3. Malformed or invalid request payload.\n"
-            "4. OpenAI API limit or service outage.\n"
-            "📋 Check server logs for full error trace."
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def resolve(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                content, tokens_used, source = await answer_with_fallback(texts[i], session_id)
+                results[i] = {"response": content, "source": source, "tokens_used": tokens_used}
+                record_query("/query/batch", routes[i], source, "ok", started)
+            except DeadlineExceeded:
+                raise  # the batch's deadline: unanswered items get the timeout answer
+            except Exception as e:
+                logger.exception("🔴 Exception during batch fallback for item %d", i)
+                results[i] = {"error": f"{type(e).__name__}: {e}"}
+                record_query("/query/batch", routes[i], "openai", "error", started)
+
+    await asyncio.gather(*(resolve(i) for i in pending))
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+async def stream_openai(user_input: str, usage: dict, timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """Yield completion text deltas as they arrive; fills usage["completion_tokens"] and ["total_tokens"]"""
+    started, status = time.perf_counter(), "error"
+    try:
+        stream = await upstream.stream(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_input}
+            ],
+            timeout=timeout,
+            stream_options={"include_usage": True},
+            **COMPLETION_PARAMS
         )
+        async for chunk in stream:
+            if chunk.usage:
+                usage["completion_tokens"] = chunk.usage.completion_tokens
+                usage["total_tokens"] = chunk.usage.total_tokens
+                record_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        status = "ok"
+    finally:
+        openai_latency.observe(time.perf_counter() - started, status)
+
+@app.post("/query/stream")
+async def handle_query_stream(
+    request: Request,
+    user_input: str = Query(..., min_length=2, max_length=200),
+    timeout_ms: Optional[float] = Query(None, gt=0, description="Answer within this time (capped by the server's limit)")
+):
+    """
+    Server-Sent Events version of /query. Local and cached answers arrive
+    as a single `data` event; OpenAI answers are streamed token by token.
+    A final `end` event carries the source and token usage. The request
+    deadline covers the local answer and opening the OpenAI stream.
+    """
+    session_id = get_session_id(request)
+    started = time.perf_counter()
+    deadline = request_deadline(timeout_ms)
+    try:
+        context = await sessions.load(session_id)
+        screened = agent.screen(user_input, context)
+        user_input = screened.text
+        intent = agent.classify(user_input, screened.goal)
+        if screened.rejection is not None:
+            local_response, local_source = screened.rejection, "guardrail"
+        else:
+            local_response, local_source = await run_with_deadline(
+                answer_locally(user_input, context, intent), deadline, wait_for_disconnect(request.receive))
+    except DeadlineExceeded:
+        logger.warning("⌛ Streaming query timed out on route %s", intent.route)
+        local_response, _, local_source = degraded_answer(user_input, TIMEOUT_ANSWER, "timeout")
+    except ClientDisconnected:
+        logger.info("🔌 Client disconnected, query cancelled")
+        record_query("/query/stream", intent.route, "local", "cancelled", started)
+        return Response(status_code=499)
+    except Exception:
+        logger.exception("🔴 Exception during streaming query processing")
+        record_query("/query/stream", "unknown", "local", "error", started)
+        raise HTTPException(status_code=500, detail=QUERY_ERROR_DETAIL)
+
+    async def events() -> AsyncIterator[str]:
+        usage = {"completion_tokens": None, "total_tokens": None}
+        source, status = "local", "error"
+        inflight_requests.inc("/query/stream")
+        await StreamingHooks.on_stream_start(context)
+        try:
+            if not needs_openai_fallback(local_response):
+                source, answer = local_source, local_response
+            else:
+                source, answer = "cache", fallback_cache.get(user_input)
+
+            if answer is not None:
+                await StreamingHooks.on_stream_chunk(answer, context)
+                yield sse_event({"content": answer})
+            else:
+                source, parts = "openai", []
+                reserve = fallback_reserve(user_input)
+                try:
+                    acquire_fallback(session_id, reserve)
+                except FallbackLimited as e:
+                    logger.info("⏳ Fallback budget exhausted (%s)", e)
+                    answer, _, source = degraded_answer(user_input)
+                    yield sse_event({"content": answer})
+                else:
+                    try:
+                        async for content in stream_openai(user_input, usage, deadline.remaining()):
+                            parts.append(content)
+                            await StreamingHooks.on_stream_chunk(content, context)
+                            yield sse_event({"content": content})
+                        fallback_cache.put(user_input, "".join(parts))
+                    except UpstreamUnavailable as e:
+                        logger.warning("🔌 OpenAI unavailable: %s", e)
+                        source = "timeout" if deadline.expired else "unavailable"
+                        yield sse_event({"content": TIMEOUT_ANSWER if deadline.expired else SERVICE_UNAVAILABLE_ANSWER})
+                    finally:
+                        limiter.settle(session_id, reserve, usage["total_tokens"])
+
+            status = "ok"
+            yield sse_event({"source": source, "tokens_used": usage["completion_tokens"]}, event="end")
+        except Exception:
+            logger.exception("🔴 Exception during OpenAI streaming")
+            yield sse_event({"detail": QUERY_ERROR_DETAIL}, event="error")
+        finally:
+            inflight_requests.dec("/query/stream")
+            record_query("/query/stream", intent.route, source, status, started)
+            await StreamingHooks.on_stream_end(context)
+            await sessions.save(session_id, context)
+
+    response = StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={SESSION_HEADER: session_id, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    return response
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
+
+    parser = argparse.ArgumentParser(description="Health & Wellness API server")
+    parser.add_argument("--prod", action="store_true",
+                        help="production mode: several workers, no reload, state shared through SQLite")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="worker processes in production mode (default: CPU count)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
     logger.info("\n🚀 Server starting...")
-    logger.info("📚 API Docs: http://127.0.0.1:8000/docs")
-    logger.info("⚡ Interactive: http://127.0.0.1:8000/redoc\n")
-    
-    # Corrected uvicorn.run() call
-    uvicorn.run(
-        "fast_api:app",  # Changed to import string format
-        host="127.0.0.1",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    logger.info("📚 API Docs: http://%s:%d/docs", args.host, args.port)
+    logger.info("⚡ Interactive: http://%s:%d/redoc\n", args.host, args.port)
+
+    if args.prod:
+        for name, value in PRODUCTION_ENV.items():
+            os.environ.setdefault(name, value)
+        logger.info("🏭 Production mode: %d workers", args.workers)
+        uvicorn.run(
+            "fast_api:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            reload=False,
+            access_log=False,
+            log_level="info"
+        )
+    else:
+        # Corrected uvicorn.run() call
+        uvicorn.run(
+            "fast_api:app",  # Changed to import string format
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level="info"
+        )
\ No newline at end of file
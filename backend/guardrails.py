@@ -1,6 +1,51 @@
-from pydantic import BaseModel, validator
-from typing import Optional, Dict, List
+# health_wellness_agent2/guardrails.py
+import os
 import re
+from typing import Annotated, Dict, List, NamedTuple, Optional, Tuple
+from pydantic import BaseModel, StringConstraints, TypeAdapter, ValidationError, field_validator
+from context import Goal
+
+# Compiled once; the validators below run on every message
+GOAL_PATTERN = re.compile(
+    r"(?P<action>lose|gain|build|improve)\s+(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>kg|lbs|%|pounds)?"
+    r"\s*(?:in|within|for)\s+(?P<timeframe>\d+)\s*(?P<timeframe_unit>week|month|day|year)s?\b",
+    re.IGNORECASE
+)
+_UNITS = {"kg": "kg", "lbs": "lbs", "pounds": "lbs", "%": "%"}
+DIETARY_OPTIONS = ("vegetarian", "vegan", "gluten-free", "dairy-free", "keto", "paleo", "mediterranean", "none")
+_DIETARY_SET = frozenset(DIETARY_OPTIONS)
+# "my diet is keto", "diet: vegan", "dietary preference: paleo"; only the known
+# options count, so "my diet is bad, how can I improve it?" is just a question
+DIET_STATEMENT = re.compile(
+    r"\b(?:my diet(?:ary preference)? is|diet(?:ary preference)?\s*[:=])\s*"
+    rf"({'|'.join(re.escape(option) for option in DIETARY_OPTIONS)})(?![a-z-])"
+)
+# C0/C1 control characters other than whitespace (whitespace is collapsed separately)
+_CONTROL = re.compile(r"[\x00-\x08\x0e-\x1f\x7f-\x9f]")
+
+def _goal_from_match(match: re.Match) -> Goal:
+    unit = match.group("unit")
+    return Goal(
+        action=match.group("action").lower(),
+        amount=float(match.group("amount")),
+        unit=_UNITS[unit.lower()] if unit else None,
+        timeframe=int(match.group("timeframe")),
+        timeframe_unit=match.group("timeframe_unit").lower() + "s"
+    )
+
+def _find_goal(text: str) -> Tuple[Optional[re.Match], bool]:
+    """(first goal match with a positive amount and timeframe, whether any goal was stated)"""
+    match = GOAL_PATTERN.search(text)
+    if match is None:
+        return None, False
+    while match is not None and not (float(match["amount"]) and int(match["timeframe"])):
+        match = GOAL_PATTERN.search(text, match.end())
+    return match, True
+
+def parse_goal(text: str) -> Optional[Goal]:
+    """The first goal stated in `text` ("... lose 5kg in 2 months ..."), if any"""
+    match = _find_goal(text)[0]
+    return _goal_from_match(match) if match is not None else None
 
 class GoalInput(BaseModel):
     """
@@ -8,27 +53,33 @@ class GoalInput(BaseModel):
     Example valid input: "lose 5kg in 2 months"
     """
     description: str
-    
-    @validator('description')
-    def validate_goal_format(cls, v):
-        pattern = r"(lose|gain|build|improve)\s+\d+\s*(kg|lbs|%|pounds)?\s*(in|within|for)\s+\d+\s*(weeks|months|days|years)"
-        if not re.search(pattern, v, re.IGNORECASE):
+
+    @field_validator("description")
+    @classmethod
+    def validate_goal_format(cls, v: str) -> str:
+        match, stated = _find_goal(v)
+        if not stated:
             raise ValueError("Goal must be in format: [action] [amount] [unit] in [timeframe]. Example: 'lose 5kg in 2 months'")
+        if match is None:
+            raise ValueError("Goal amount and timeframe must be greater than zero. Example: 'lose 5kg in 2 months'")
         return v
 
+    def parse(self) -> Goal:
+        return parse_goal(self.description)
+
 class DietaryInput(BaseModel):
     """
     Input guardrail for dietary preferences
     """
     preference: str
-    
-    @validator('preference')
-    def validate_dietary(cls, v):
-        valid_options = ["vegetarian", "vegan", "gluten-free", "dairy-free", 
-                        "keto", "paleo", "mediterranean", "none"]
-        if v.lower() not in valid_options:
-            raise ValueError(f"Dietary preference must be one of: {', '.join(valid_options)}")
-        return v.lower()
+
+    @field_validator("preference")
+    @classmethod
+    def validate_preference(cls, v: str) -> str:
+        preference = v.lower()
+        if preference not in _DIETARY_SET:
+            raise ValueError(f"Dietary preference must be one of: {', '.join(DIETARY_OPTIONS)}")
+        return preference
 
 class WorkoutOutput(BaseModel):
     """
@@ -38,4 +89,87 @@ class WorkoutOutput(BaseModel):
     days: Dict[str, List[str]]
     equipment_needed: List[str]
     duration_weeks: int
-    difficulty: str
\ No newline at end of file
+    difficulty: str
+
+class GuardrailResult(NamedTuple):
+    """
+    Outcome of screening one message: the cleaned text, or a rejection to
+    answer with instead. goal/diet are set when the message states a valid
+    one ("lose 5kg in 2 months", "my diet is vegan").
+    """
+    text: str
+    rejection: Optional[str] = None
+    goal: Optional[Goal] = None
+    diet: Optional[DietaryInput] = None
+
+class InputGuardrails:
+    """
+    Screening stage in front of the agent. Strips control characters and
+    collapses whitespace, enforces the message length, and validates goal
+    and dietary statements with the models above. The length check runs
+    through TypeAdapters built here once, one for single messages and one
+    that validates a whole batch in a single call.
+    """
+
+    def __init__(self, enabled: bool = True, min_length: int = 2, max_length: int = 500):
+        self.enabled = enabled
+        self.max_length = max_length
+        message = Annotated[str, StringConstraints(min_length=min_length, max_length=max_length)]
+        self._message = TypeAdapter(message)
+        self._messages = TypeAdapter(List[message])
+        self.too_short = "✋ Please type a question (a few words is enough)."
+        self.too_long = f"✋ That message is too long; please keep it under {max_length} characters."
+        self.empty_goal = "✋ A goal needs an amount and a timeframe above zero, e.g. 'lose 5kg in 2 months'."
+
+    @staticmethod
+    def clean(text: str) -> str:
+        if not text.isprintable():
+            text = _CONTROL.sub("", text)
+        return " ".join(text.split())
+
+    def _length_rejection(self, error: ValidationError) -> str:
+        return self.too_short if error.errors()[0]["type"] == "string_too_short" else self.too_long
+
+    def _statements(self, text: str) -> GuardrailResult:
+        """Validate goal and diet statements in an already length-checked message"""
+        goal, stated = _find_goal(text)
+        if stated and goal is None:  # "lose 5kg in 0 days"
+            return GuardrailResult(text, self.empty_goal)
+        match = DIET_STATEMENT.search(text.lower())
+        diet = DietaryInput(preference=match.group(1)) if match is not None else None
+        return GuardrailResult(text, None, goal and _goal_from_match(goal), diet)
+
+    def check(self, text: str) -> GuardrailResult:
+        if not self.enabled:
+            return GuardrailResult(text)
+        text = self.clean(text)
+        try:
+            self._message.validate_python(text)
+        except ValidationError as e:
+            return GuardrailResult(text, self._length_rejection(e))
+        return self._statements(text)
+
+    def check_batch(self, texts: List[str]) -> List[GuardrailResult]:
+        """Same as check() for every message; lengths are validated in one pass"""
+        if not self.enabled:
+            return [GuardrailResult(text) for text in texts]
+        cleaned = [self.clean(text) for text in texts]
+        rejected: Dict[int, str] = {}
+        try:
+            self._messages.validate_python(cleaned)
+        except ValidationError as e:
+            for detail in e.errors():
+                index = detail["loc"][0]
+                if index not in rejected:
+                    rejected[index] = self.too_short if detail["type"] == "string_too_short" else self.too_long
+        return [
+            GuardrailResult(text, rejected[i]) if i in rejected else self._statements(text)
+            for i, text in enumerate(cleaned)
+        ]
+
+def create_input_guardrails() -> InputGuardrails:
+    """Build the screening stage from GUARDRAILS (on/off) and GUARDRAIL_MAX_LENGTH"""
+    return InputGuardrails(
+        enabled=os.getenv("GUARDRAILS", "on").lower() in ("1", "on", "true"),
+        max_length=int(os.getenv("GUARDRAIL_MAX_LENGTH", "500"))
+    )
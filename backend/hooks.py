@@ -1,71 +1,131 @@
-from typing import Any, Dict, Optional, Awaitable
-from openai.types.chat import ChatCompletion
-from .context import UserSessionContext
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+from context import UserSessionContext
+from event_log import now
 import logging
-from datetime import datetime
-import asyncio
 
 logger = logging.getLogger(__name__)
 
+class HookEvent(NamedTuple):
+    """
+    One lifecycle event emitted by the dispatcher.
+    agent_start/agent_end: agent is the agent, detail the input text.
+    tool_start/tool_end: agent is the caller, target the tool.
+    handoff: agent is the source, target the receiving agent.
+    """
+    event: str
+    agent: str
+    target: Optional[str]
+    detail: Optional[str]
+    context: UserSessionContext
+    timestamp: float
+
+Subscriber = Callable[[List[HookEvent]], Awaitable[None]]
+
+# Events of the dispatch running in the current task; each handle_message
+# opens its own list, so concurrent requests never share or flush a batch
+_batch: ContextVar[Optional[List[HookEvent]]] = ContextVar("hook_batch", default=None)
+
+class HookRegistry:
+    """
+    Fan-out point between the dispatcher and hook subscribers.
+    Callers check `enabled` before emitting, so with no subscribers the
+    dispatch path does no awaits and allocates nothing. Events emitted
+    between `open()` and `flush(token)` are queued for that dispatch only
+    and handed to every subscriber as one batch.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._subscribers: List[Subscriber] = []
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.append(subscriber)
+        self.enabled = True
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.remove(subscriber)
+        self.enabled = bool(self._subscribers)
+
+    def open(self) -> Token:
+        """Start collecting the events of one dispatch; pass the token to flush()"""
+        return _batch.set([])
+
+    def emit(self, event: str, agent: str, context: UserSessionContext,
+             target: Optional[str] = None, detail: Optional[str] = None) -> None:
+        """Queue an event on the current dispatch (synchronous; no await)"""
+        batch = _batch.get()
+        if batch is None:
+            logger.warning("Hook event %s emitted outside a dispatch; dropped", event)
+            return
+        batch.append(HookEvent(event, agent, target, detail, context, now()))
+
+    async def flush(self, token: Token) -> None:
+        """Close the dispatch opened with `token` and deliver its events to each subscriber"""
+        batch = _batch.get()
+        _batch.reset(token)
+        if not batch:
+            return
+        for subscriber in self._subscribers:
+            try:
+                await subscriber(batch)
+            except Exception:
+                logger.exception("Hook subscriber %r failed", subscriber)
+
 class RunHooks:
     """
     Global lifecycle hooks for tracking agent and tool execution
     """
     
     @staticmethod
-    async def on_agent_start(agent_name: str, input: str, context: UserSessionContext) -> Awaitable[None]:
+    async def on_agent_start(agent_name: str, input: str, context: UserSessionContext,
+                             timestamp: Optional[float] = None) -> Awaitable[None]:
         """Log when an agent starts processing (async)"""
-        await asyncio.sleep(0)  # Yield control to event loop
         logger.info("Agent %s started processing", agent_name)
-        context.progress_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "event": "agent_start",
-            "agent": agent_name
-        })
+        context.progress_logs.record("agent_start", agent_name, timestamp=timestamp)
 
     @staticmethod
-    async def on_agent_end(agent_name: str, context: UserSessionContext) -> Awaitable[None]:
+    async def on_agent_end(agent_name: str, context: UserSessionContext,
+                           timestamp: Optional[float] = None) -> Awaitable[None]:
         """Log when an agent finishes processing (async)"""
-        await asyncio.sleep(0)
         logger.info("Agent %s completed processing", agent_name)
-        context.progress_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "event": "agent_end",
-            "agent": agent_name
-        })
+        context.progress_logs.record("agent_end", agent_name, timestamp=timestamp)
 
     @staticmethod
-    async def on_tool_start(tool_name: str, context: UserSessionContext) -> Awaitable[None]:
+    async def on_tool_start(tool_name: str, context: UserSessionContext,
+                            timestamp: Optional[float] = None) -> Awaitable[None]:
         """Log when a tool starts execution (async)"""
-        await asyncio.sleep(0)
         logger.info("Tool %s started", tool_name)
-        context.progress_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "event": "tool_start",
-            "tool": tool_name
-        })
+        context.progress_logs.record("tool_start", tool_name, timestamp=timestamp)
 
     @staticmethod
-    async def on_tool_end(tool_name: str, context: UserSessionContext) -> Awaitable[None]:
+    async def on_tool_end(tool_name: str, context: UserSessionContext,
+                          timestamp: Optional[float] = None) -> Awaitable[None]:
         """Log when a tool completes execution (async)"""
-        await asyncio.sleep(0)
         logger.info("Tool %s completed execution", tool_name)
-        context.progress_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "event": "tool_end",
-            "tool": tool_name
-        })
+        context.progress_logs.record("tool_end", tool_name, timestamp=timestamp)
 
     @staticmethod
-    async def on_handoff(source_agent: str, target_agent: str, context: UserSessionContext) -> Awaitable[None]:
+    async def on_handoff(source_agent: str, target_agent: str, context: UserSessionContext,
+                         timestamp: Optional[float] = None) -> Awaitable[None]:
         """Log when handoff occurs between agents (async)"""
-        await asyncio.sleep(0)
         logger.info("Handoff from %s to %s", source_agent, target_agent)
-        context.handoff_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "from": source_agent,
-            "to": target_agent
-        })
+        context.handoff_logs.record("handoff", source_agent, target_agent, timestamp)
+
+    @staticmethod
+    async def deliver(events: List[HookEvent]) -> None:
+        """HookRegistry subscriber: replay a batch through the hooks above"""
+        for e in events:
+            if e.event == "agent_start":
+                await RunHooks.on_agent_start(e.agent, e.detail, e.context, e.timestamp)
+            elif e.event == "agent_end":
+                await RunHooks.on_agent_end(e.agent, e.context, e.timestamp)
+            elif e.event == "tool_start":
+                await RunHooks.on_tool_start(e.target, e.context, e.timestamp)
+            elif e.event == "tool_end":
+                await RunHooks.on_tool_end(e.target, e.context, e.timestamp)
+            elif e.event == "handoff":
+                await RunHooks.on_handoff(e.agent, e.target, e.context, e.timestamp)
 
 class AgentHooks:
     """
@@ -77,29 +137,40 @@ class AgentHooks:
 
     async def on_start(self, context: UserSessionContext) -> Awaitable[None]:
         """Agent-specific startup logic (async)"""
-        await asyncio.sleep(0)
         logger.debug("%s starting", self.agent_name)
 
     async def on_end(self, context: UserSessionContext) -> Awaitable[None]:
         """Agent-specific cleanup logic (async)"""
-        await asyncio.sleep(0)
         logger.debug("%s ending", self.agent_name)
 
     async def on_tool_start(self, tool_name: str, context: UserSessionContext) -> Awaitable[None]:
         """Agent-specific tool start logic (async)"""
-        await asyncio.sleep(0)
         logger.debug("%s starting tool %s", self.agent_name, tool_name)
 
     async def on_tool_end(self, tool_name: str, context: UserSessionContext) -> Awaitable[None]:
         """Agent-specific tool end logic (async)"""
-        await asyncio.sleep(0)
         logger.debug("%s completed tool %s", self.agent_name, tool_name)
 
     async def on_handoff(self, target_agent: str, context: UserSessionContext) -> Awaitable[None]:
         """Agent-specific handoff logic (async)"""
-        await asyncio.sleep(0)
         logger.info("%s handing off to %s", self.agent_name, target_agent)
 
+    async def deliver(self, events: List[HookEvent]) -> None:
+        """HookRegistry subscriber: handle the batch events emitted by this agent"""
+        for e in events:
+            if e.agent != self.agent_name:
+                continue
+            if e.event == "agent_start":
+                await self.on_start(e.context)
+            elif e.event == "agent_end":
+                await self.on_end(e.context)
+            elif e.event == "tool_start":
+                await self.on_tool_start(e.target, e.context)
+            elif e.event == "tool_end":
+                await self.on_tool_end(e.target, e.context)
+            elif e.event == "handoff":
+                await self.on_handoff(e.target, e.context)
+
 class StreamingHooks:
     """
     Hooks for handling streaming responses with proper async
@@ -108,25 +179,16 @@ class StreamingHooks:
     @staticmethod
     async def on_stream_start(context: UserSessionContext) -> Awaitable[None]:
         """Initialize streaming session (async)"""
-        await asyncio.sleep(0)
         logger.debug("Starting response streaming")
-        context.progress_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "event": "stream_start"
-        })
+        context.progress_logs.record("stream_start")
 
     @staticmethod
     async def on_stream_chunk(content: str, context: UserSessionContext) -> Awaitable[None]:
         """Process each streaming chunk (async)"""
-        await asyncio.sleep(0)
         logger.debug("Received stream chunk: %s", content)
 
     @staticmethod
     async def on_stream_end(context: UserSessionContext) -> Awaitable[None]:
         """Finalize streaming session (async)"""
-        await asyncio.sleep(0)
         logger.debug("Ending response streaming")
-        context.progress_logs.append({
-            "timestamp": datetime.now().isoformat(),
-            "event": "stream_end"
-        })
\ No newline at end of file
+        context.progress_logs.record("stream_end")
\ No newline at end of file
@@ -0,0 +1,39 @@
+# health_wellness_agent2/latency.py
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class LatencyBudget:
+    """
+    Per-request stage timer.
+    Each `with budget.stage(name)` block records its wall time in
+    milliseconds; `report()` says whether the total went over budget.
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self.stages: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed, 3)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._started) * 1000, 3)
+
+    def report(self) -> dict:
+        """Fields merged into the /query response when a budget was requested"""
+        total = self.elapsed_ms
+        return {
+            "timings_ms": {**self.stages, "total": total},
+            "budget_ms": self.budget_ms,
+            "budget_exceeded": total > self.budget_ms
+        }
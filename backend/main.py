@@ -1,10 +1,11 @@
 import asyncio
 import os
 import logging
+from typing import Optional
 from dotenv import load_dotenv, find_dotenv
-from openai import AsyncOpenAI
-from agent import HealthWellnessAgent
-from context import UserSessionContext
+from deadline import Deadline, DeadlineExceeded, run_with_deadline
+from openai_client import UpstreamUnavailable, create_upstream_client
+from rate_limit import create_fallback_limiter, estimate_tokens
 
 # Configure logging
 logging.basicConfig(
@@ -14,15 +15,30 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class Assistant:
+    """
+    Interactive CLI. The agent (pydantic, routing tables, tools) and the
+    OpenAI SDK load in a background thread while the first prompt is
+    already waiting for input; the first answer waits for them if needed.
+    """
+
     def __init__(self):
         self.client = None
-        self.agent = HealthWellnessAgent()
-        self.context = UserSessionContext()
+        self.agent = None
+        self.context = None
+        self._loading: Optional[asyncio.Future] = None
+        self._client_loading: Optional[asyncio.Future] = None
+        self._catalog_refresh: Optional[asyncio.Future] = None
         self.running = False
         self.token_count = 0  # Track token usage
+        self.limiter = create_fallback_limiter()  # requests/sec and tokens/day budgets
+        self.timeout = float(os.getenv("QUERY_TIMEOUT_SECONDS", "15"))  # per answer, fallback included
 
     async def initialize_openai(self):
-        """Initialize OpenAI client with token-efficient settings"""
+        """
+        Initialize the shared OpenAI client. No test completion is sent:
+        the client's health is checked lazily by the first real request,
+        and the SDK itself is imported in the background (start_loading).
+        """
         try:
             load_dotenv(find_dotenv())
             openai_key = os.getenv("OPENAI_API_KEY", "").strip()
@@ -31,26 +47,58 @@ class Assistant:
                 logger.warning("OpenAI disabled - missing/invalid key")
                 return False
 
-            self.client = AsyncOpenAI(
-                api_key=openai_key,
-                timeout=10.0
-            )
-
-            # Minimal connection test
-            test = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "ping"}],
-                max_tokens=5
-            )
-            self.token_count += test.usage.total_tokens
-            logger.info(f"OpenAI ready | Test used {test.usage.total_tokens} tokens")
+            self.client = create_upstream_client(openai_key)
+            logger.info("OpenAI ready | health checked on first use")
             return True
 
         except Exception as e:
             logger.error(f"OpenAI init failed: {str(e)}")
             return False
 
+    def _build_agent(self):
+        from agent import HealthWellnessAgent
+        from context import UserSessionContext
+
+        agent = HealthWellnessAgent()
+        agent.warm_up()
+        self.agent, self.context = agent, UserSessionContext()
+
+    async def _load(self):
+        """
+        Build the agent in a thread, then import the OpenAI SDK without
+        holding up answers; plan catalog changes are picked up in the background
+        """
+        await asyncio.to_thread(self._build_agent)
+        from plan_catalog import catalog
+
+        self._catalog_refresh = asyncio.ensure_future(catalog.refresh_forever())
+        if self.client is not None:
+            self._client_loading = asyncio.ensure_future(asyncio.to_thread(self.client.warm_up))
+
+    async def close(self):
+        """Cancel the background tasks started by start_loading (catalog refresh, SDK import)"""
+        tasks = [task for task in (self._catalog_refresh, self._client_loading) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._catalog_refresh = self._client_loading = None
+
+    def start_loading(self) -> asyncio.Future:
+        """Start loading (once); awaiting the result means the agent is ready"""
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+        return self._loading
+
     async def get_response(self, user_input: str) -> str:
+        """Answer within the timeout; the agent and the OpenAI call share its deadline"""
+        await self.start_loading()
+        try:
+            return await run_with_deadline(self._respond(user_input), Deadline(self.timeout))
+        except DeadlineExceeded:
+            logger.warning("Response timed out after %.1fs", self.timeout)
+            return "I couldn't retrieve an answer in time. [Timed out, please try again]"
+
+    async def _respond(self, user_input: str) -> str:
         """Get response with token-efficient fallback"""
         local_response = await self.agent.handle_message(user_input, self.context)
         
@@ -60,9 +108,16 @@ class Assistant:
         if not self.client:
             return "I need more information to answer that. [AI service unavailable]"
 
+        reserve = estimate_tokens(user_input, max_completion=50)
+        limited = self.limiter.acquire(None, reserve)
+        if limited:
+            logger.info(f"OpenAI budget exhausted ({limited})")
+            return "I need more information to answer that. [AI budget reached, try again later]"
+
+        used = None
         try:
             logger.info("Using OpenAI fallback...")
-            response = await self.client.chat.completions.create(
+            response = await self.client.complete(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
@@ -78,13 +133,21 @@ class Assistant:
                 max_tokens=50,    # Strict limit
                 top_p=0.5         # Reduce randomness
             )
-            self.token_count += response.usage.total_tokens
+            used = response.usage.total_tokens
+            self.token_count += used
             logger.info(f"Used {response.usage.total_tokens} tokens (Total: {self.token_count})")
             return response.choices[0].message.content
-            
+
+        except UpstreamUnavailable as e:
+            logger.warning(f"OpenAI unavailable: {str(e)}")
+            return "I couldn't retrieve an answer. [AI service unavailable]"
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"OpenAI error: {str(e)}")
             return "I couldn't retrieve an answer. [Service error]"
+        finally:
+            self.limiter.settle(None, reserve, used)
 
     async def run(self):
         print("\n🌿 Health & Wellness Assistant 🌿")
@@ -92,6 +155,7 @@ class Assistant:
         
         if not await self.initialize_openai():
             print("Note: Advanced AI features disabled")
+        self.start_loading()
 
         self.running = True
         while self.running:
@@ -112,6 +176,7 @@ class Assistant:
                 print("\nEnding session...")
                 self.running = False
                 
+        await self.close()
         print(f"\nSession ended | Total tokens used: {self.token_count}")
 
 if __name__ == "__main__":
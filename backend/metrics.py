@@ -0,0 +1,242 @@
+# health_wellness_agent2/metrics.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+from data_dir import data_path
+
+# Latency buckets in seconds: sub-millisecond local answers up to slow OpenAI calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """
+    Base for metrics keyed by a tuple of label values.
+    Updates are plain dict/list operations with no await in between, so
+    everything recorded from the event loop needs no lock; each worker
+    process keeps its own series.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def snapshot(self) -> list:
+        """JSON-friendly copy of every series"""
+        raise NotImplementedError
+
+    def merge(self, series: list) -> None:
+        """Add a snapshot (usually another worker's) into this metric"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def snapshot(self) -> list:
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+    def merge(self, series: list) -> None:
+        for labels, value in series:
+            self.inc(*labels, amount=value)
+
+    def render(self) -> List[str]:
+        return self._header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. Observations are counted in their own bucket
+    (one bisect and one increment) and only made cumulative on render.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def snapshot(self) -> list:
+        return [[list(labels), list(counts), self._sums[labels]] for labels, counts in self._counts.items()]
+
+    def merge(self, series: list) -> None:
+        for labels, counts, total in series:
+            labels = tuple(labels)
+            mine = self._counts.setdefault(labels, [0] * (len(self.buckets) + 1))
+            for i, count in enumerate(counts):
+                mine[i] += count
+            self._sums[labels] = self._sums.get(labels, 0.0) + total
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else _number(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(self._sums[labels])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered in the Prometheus text format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, list]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def merged(self, snapshots: List[Dict[str, list]]) -> "MetricsRegistry":
+        """A fresh registry with the same metrics holding the sum of the snapshots"""
+        total = MetricsRegistry()
+        for metric in self._metrics.values():
+            if isinstance(metric, Histogram):
+                copy = Histogram(metric.name, metric.help, metric.labelnames, metric.buckets)
+            else:
+                copy = type(metric)(metric.name, metric.help, metric.labelnames)
+            total._add(copy)
+            for snapshot in snapshots:
+                copy.merge(snapshot.get(metric.name, []))
+        return total
+
+
+class SharedMetricsStore:
+    """
+    Per-worker aggregation for multi-process deployments: each worker
+    keeps recording into its own registry and periodically publishes a
+    snapshot to SQLite (one row per worker). A scrape on any worker sums
+    the rows of every worker seen within `stale_seconds`.
+    """
+
+    def __init__(self, path: str = "metrics.db", stale_seconds: float = 3600.0):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS worker_metrics ("
+                "worker TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, worker: str, snapshot: Dict[str, list]) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO worker_metrics (worker, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(worker) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (worker, json.dumps(snapshot), time.time())
+            )
+
+    def collect(self) -> List[Dict[str, list]]:
+        rows = self._connection().execute(
+            "SELECT data FROM worker_metrics WHERE updated_at >= ?",
+            (time.time() - self.stale_seconds,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+
+def create_metrics_store() -> Optional[SharedMetricsStore]:
+    """SharedMetricsStore when METRICS_BACKEND=sqlite, else None (single process)"""
+    if os.getenv("METRICS_BACKEND", "memory").lower() != "sqlite":
+        return None
+    return SharedMetricsStore(os.getenv("METRICS_DB_PATH") or data_path("metrics.db"))
@@ -0,0 +1,257 @@
+# health_wellness_agent2/openai_client.py
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Optional
+
+from deadline import DeadlineExceeded, remaining as request_remaining
+
+logger = logging.getLogger(__name__)
+
+SERVICE_UNAVAILABLE_ANSWER = (
+    "⚠️ Our AI assistant is temporarily unavailable.\n"
+    "💡 Try asking about workouts, meal plans, injuries or progress tracking, "
+    "or try again in a minute."
+)
+
+
+class UpstreamUnavailable(Exception):
+    """OpenAI is not answering: the circuit is open, retries ran out or the deadline passed"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and
+    rejects calls for `reset_seconds`. Then one trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def release(self) -> None:
+        """The call ended without a verdict (cancelled, caller's deadline): free the trial slot"""
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failures >= self.failure_threshold:
+            if self.failures == self.failure_threshold:
+                logger.warning("🔌 OpenAI circuit opened after %d failures", self.failures)
+            self.opened_at = time.monotonic()
+
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx, timeouts and connection errors are worth another attempt"""
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(error, (APIConnectionError, APITimeoutError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+class UpstreamClient:
+    """
+    Shared OpenAI client for the API server and the CLI.
+    One pooled keep-alive HTTP client, a deadline per call that covers all
+    attempts, jittered exponential backoff on retryable errors, and a
+    circuit breaker that fails fast while the upstream is unhealthy.
+    The SDK's own retries are disabled so only this layer retries.
+    The SDK (about half a second to import) is only loaded when the
+    first call needs it, so servers and the CLI start without it.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: float = 10.0, max_retries: int = 2,
+                 backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 30.0,
+                 breaker: Optional[CircuitBreaker] = None, health_ttl: float = 60.0,
+                 client: Any = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.health_ttl = health_ttl
+        self.last_success = 0.0
+        self.attempts = 0
+        self.retries = 0
+        self._settings = dict(api_key=api_key, base_url=base_url, max_connections=max_connections,
+                              max_keepalive=max_keepalive, keepalive_expiry=keepalive_expiry)
+        self._client = client
+        self._build_lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._build_lock:  # warm_up may be building it in another thread
+                if self._client is None:
+                    self._client = self._build_client(**self._settings)
+        return self._client
+
+    @client.setter
+    def client(self, client: Any) -> None:
+        self._client = client
+
+    def _build_client(self, api_key: Optional[str], base_url: Optional[str], max_connections: int,
+                      max_keepalive: int, keepalive_expiry: float) -> Any:
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        return AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=self.timeout,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive,
+                    keepalive_expiry=keepalive_expiry
+                ),
+                timeout=self.timeout
+            )
+        )
+
+    def warm_up(self) -> None:
+        """Import the SDK and build the client ahead of the first call (e.g. in a thread)"""
+        self.client
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max, base * 2**attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _call(self, timeout: Optional[float], **params) -> Any:
+        # a request deadline (see deadline.py) caps the call's own timeout; running
+        # out of it is the caller's timeout, not an upstream failure
+        own_timeout = self.timeout if timeout is None else timeout
+        allowed = request_remaining(own_timeout)
+        deadline = time.monotonic() + allowed
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise UpstreamUnavailable("OpenAI circuit is open")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.breaker.release()
+                if allowed < own_timeout:
+                    raise DeadlineExceeded("request deadline passed before the OpenAI call")
+                raise UpstreamUnavailable("OpenAI deadline exceeded")
+            self.attempts += 1
+            try:
+                result = await asyncio.wait_for(self.client.chat.completions.create(**params), remaining)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and allowed < own_timeout:
+                    self.breaker.release()
+                    raise DeadlineExceeded("request deadline passed during the OpenAI call") from e
+                if not is_retryable(e):
+                    self.breaker.record_success()  # the upstream answered; the request was bad
+                    raise
+                self.breaker.record_failure()
+                pause = self.backoff(attempt)
+                if attempt >= self.max_retries or time.monotonic() + pause >= deadline:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise UpstreamUnavailable("OpenAI deadline exceeded") from e
+                    raise UpstreamUnavailable(f"OpenAI failed after {attempt + 1} attempts: {e}") from e
+                logger.warning("🔁 OpenAI %s, retrying in %.2fs", type(e).__name__, pause)
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(pause)
+                continue
+            self.breaker.record_success()
+            self.last_success = time.monotonic()
+            return result
+
+    async def complete(self, messages: list, timeout: Optional[float] = None, **params) -> Any:
+        """
+        Chat completion within `timeout` seconds (default: the client
+        timeout) across retries, and never past the current request deadline
+        """
+        return await self._call(timeout, messages=messages, **params)
+
+    async def stream(self, messages: list, timeout: Optional[float] = None, **params) -> Any:
+        """
+        Streaming chat completion. Retries and the deadline cover opening
+        the stream; once chunks flow, the HTTP read timeout applies.
+        """
+        return await self._call(timeout, messages=messages, stream=True, **params)
+
+    async def health(self) -> dict:
+        """
+        Lazy health check. A recent successful call or an open circuit
+        answers without touching the network; otherwise the free model
+        list endpoint is probed (no completion tokens are spent).
+        """
+        state = self.breaker.state
+        healthy = state == CircuitBreaker.CLOSED
+        if healthy and time.monotonic() - self.last_success > self.health_ttl:
+            try:
+                await asyncio.wait_for(self.client.models.list(), min(self.timeout, 5.0))
+                self.last_success = time.monotonic()
+            except Exception as e:
+                logger.warning("🩺 OpenAI health check failed: %s", e)
+                healthy = False
+        return {"status": "ok" if healthy else "unavailable", "circuit": state}
+
+    def stats(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "rejected": self.breaker.rejected
+        }
+
+    async def close(self) -> None:
+        if self._client is not None and hasattr(self._client, "close"):
+            await self._client.close()
+
+
+def create_upstream_client(api_key: Optional[str] = None) -> UpstreamClient:
+    """Build the client from OPENAI_* environment variables"""
+    return UpstreamClient(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "10")),
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+        max_keepalive=int(os.getenv("OPENAI_MAX_KEEPALIVE", "20")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("OPENAI_BREAKER_THRESHOLD", "5")),
+            reset_seconds=float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "30"))
+        )
+    )
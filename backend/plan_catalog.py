@@ -0,0 +1,245 @@
+# health_wellness_agent2/plan_catalog.py
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog")
+SUPPORTED_FORMATS = frozenset({1})
+
+# Every table the catalog serves, with the fields each entry must have
+# (None: an entry is a plain list of lines)
+TABLES = {
+    "workouts": None,
+    "diets": None,
+    "injuries": ("avoid", "alternatives", "tips"),
+    "nutrition": ("avoid", "recommend", "tips")
+}
+
+
+class CatalogError(Exception):
+    """A catalog file is missing, unreadable or not in a supported format"""
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of decoded JSON/msgpack: tuples, mapping proxies and interned strings"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({sys.intern(str(key)): freeze(item) for key, item in value.items()})
+    return value
+
+
+class CatalogTable(Mapping):
+    """
+    Read-only view of one catalog table. The object stays the same across
+    reloads (modules keep it as WORKOUT_PLANS etc.) while its content is
+    swapped in one assignment; `version` goes up with every swap, so
+    ResponseTables and stored plans built from it know to rebuild.
+    """
+
+    __slots__ = ("name", "version", "content_version", "_items")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.version = 0
+        self.content_version = None
+        self._items: Dict[str, Any] = {}
+
+    def replace(self, items: Mapping[str, Any], content_version: Any = None) -> None:
+        """Swap in new content (frozen and interned here)"""
+        self._items = {sys.intern(str(key)): freeze(entry) for key, entry in items.items()}
+        self.content_version = content_version
+        self.version += 1
+
+    # the mapping methods used per request go straight to the dict
+    def __getitem__(self, key: str) -> Any:
+        return self._items[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._items
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._items.get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def keys(self):
+        return self._items.keys()
+
+    def items(self):
+        return self._items.items()
+
+    def values(self):
+        return self._items.values()
+
+    def __repr__(self) -> str:
+        return f"CatalogTable({self.name!r}, {len(self._items)} entries, version {self.content_version!r})"
+
+
+class PlanCatalog:
+    """
+    Plans and advice tables loaded from versioned files in `directory`,
+    one per table: <name>.msgpack (needs the msgpack package) or
+    <name>.json, both shaped {"format": 1, "version": ..., "items": {...}}.
+
+    Loaded once per process. refresh() looks at the files' mtimes at most
+    every `check_seconds` (a clock read otherwise) and reloads what
+    changed, so a deploy can update plans without restarting workers;
+    refresh_forever() runs it in the background, off the request path.
+    A file that fails to load on reload is logged and the old content
+    kept.
+    """
+
+    def __init__(self, directory: str = CATALOG_DIR, check_seconds: float = 2.0):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self.reloads = 0
+        self.errors = 0
+        self._tables = {name: CatalogTable(name) for name in TABLES}
+        self._stamps: Dict[str, Tuple[str, int, int]] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        for name in TABLES:
+            self._load(name, self._stat(name))
+
+    def table(self, name: str) -> CatalogTable:
+        return self._tables[name]
+
+    def _stat(self, name: str) -> Tuple[str, int, int]:
+        """(path, mtime_ns, size) of the table's file, preferring msgpack"""
+        for extension in (".msgpack", ".json"):
+            path = os.path.join(self.directory, name + extension)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return path, stat.st_mtime_ns, stat.st_size
+        raise CatalogError(f"no catalog file for {name!r} in {self.directory}")
+
+    @staticmethod
+    def _read(path: str) -> Any:
+        if path.endswith(".msgpack"):
+            try:
+                import msgpack
+            except ImportError as e:
+                raise CatalogError(f"{path} needs the msgpack package (pip install msgpack)") from e
+            with open(path, "rb") as f:
+                return msgpack.unpackb(f.read(), raw=False)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _validate(name: str, path: str, document: Any) -> Dict[str, Any]:
+        format = document.get("format") if isinstance(document, dict) else None
+        if format not in SUPPORTED_FORMATS:
+            raise CatalogError(f"{path}: unsupported catalog format {format!r}")
+        items = document.get("items")
+        if not isinstance(items, dict):
+            raise CatalogError(f"{path}: 'items' must be an object")
+        fields = TABLES[name]
+        for key, entry in items.items():
+            if fields is None:
+                if not isinstance(entry, list) or not all(isinstance(line, str) for line in entry):
+                    raise CatalogError(f"{path}: {key!r} must be a list of strings")
+            elif not isinstance(entry, dict) or any(not isinstance(entry.get(field), list) for field in fields):
+                raise CatalogError(f"{path}: {key!r} needs list fields {', '.join(fields)}")
+        return items
+
+    def _load(self, name: str, stamp: Tuple[str, int, int]) -> None:
+        path = stamp[0]
+        try:
+            document = self._read(path)
+        except (OSError, ValueError) as e:
+            raise CatalogError(f"{path}: {e}") from e
+        items = self._validate(name, path, document)
+        self._tables[name].replace(items, document.get("version"))
+        self._stamps[name] = stamp
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload tables whose file changed (checked every check_seconds); True when any did"""
+        now = time.monotonic()
+        if not force and (self.check_seconds < 0 or now - self._checked < self.check_seconds):
+            return False
+        with self._lock:
+            self._checked = now
+            reloaded = False
+            for name in TABLES:
+                stamp = None
+                try:
+                    stamp = self._stat(name)
+                    if stamp == self._stamps.get(name):
+                        continue
+                    self._load(name, stamp)
+                except CatalogError as e:
+                    if stamp is not None:
+                        self._stamps[name] = stamp  # tried again once the file changes again
+                    self.errors += 1
+                    logger.error("📚 Plan catalog reload failed, keeping the loaded %s: %s", name, e)
+                    continue
+                reloaded = True
+                self.reloads += 1
+                table = self._tables[name]
+                logger.info("📚 Reloaded %s (version %s, %d entries)", name, table.content_version, len(table))
+            return reloaded
+
+    async def refresh_forever(self) -> None:
+        """Background task: refresh() in a thread every check_seconds (nothing when hot reload is off)"""
+        if self.check_seconds < 0:
+            return
+        while True:
+            await asyncio.sleep(max(self.check_seconds, 0.1))
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("📚 Plan catalog refresh failed")
+
+    def stats(self) -> dict:
+        return {
+            "tables": {name: {"entries": len(table), "version": table.content_version}
+                       for name, table in self._tables.items()},
+            "reloads": self.reloads,
+            "errors": self.errors
+        }
+
+
+def create_plan_catalog() -> PlanCatalog:
+    """Load the catalog from PLAN_CATALOG_DIR; PLAN_CATALOG_CHECK_SECONDS < 0 turns hot reload off"""
+    return PlanCatalog(
+        directory=os.getenv("PLAN_CATALOG_DIR", CATALOG_DIR),
+        check_seconds=float(os.getenv("PLAN_CATALOG_CHECK_SECONDS", "2"))
+    )
+
+
+# One catalog per process, shared by the tools and sub-agents
+catalog = create_plan_catalog()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the plan catalog, or convert it to msgpack")
+    parser.add_argument("--msgpack", action="store_true",
+                        help="write <name>.msgpack next to every <name>.json (loaded in preference to it)")
+    args = parser.parse_args()
+    if args.msgpack:
+        import msgpack
+
+        for name in TABLES:
+            source = os.path.join(catalog.directory, name + ".json")
+            with open(source, encoding="utf-8") as f, open(source[:-5] + ".msgpack", "wb") as out:
+                out.write(msgpack.packb(json.load(f), use_bin_type=True))
+    print(json.dumps(catalog.stats(), indent=2))
@@ -0,0 +1,333 @@
+# health_wellness_agent2/rate_limit.py
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from data_dir import data_path
+
+RATE_LIMITED_ANSWER = (
+    "⏳ You've reached the limit for AI-assisted answers for now.\n"
+    "💡 Local features still work: ask about workouts, meal plans, injuries "
+    "or progress tracking, or try again later."
+)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` units and refills at
+    `rate` units per second. Refill is computed lazily from the elapsed
+    time, so every operation is O(1). The level may go negative when a
+    charge turns out larger than what was reserved (debt is repaid by the
+    refill).
+    """
+
+    __slots__ = ("capacity", "rate", "level", "updated")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> float:
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+        return self.level
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class FallbackLimiter:
+    """
+    Request-rate and daily token budgets for the OpenAI fallback, enforced
+    per session and globally. `acquire` checks all four buckets before
+    taking from any, and reserves an estimate of the call's tokens;
+    `settle` replaces the reservation with the real usage. Neither awaits,
+    so concurrent requests on the event loop cannot interleave inside them
+    and the reservation keeps a burst from overshooting the budget.
+    A limit of 0 disables that bucket. Budgets are per process; see
+    SharedFallbackLimiter for budgets shared by several workers.
+    """
+
+    DAY = 86400.0
+
+    def __init__(self, session_rps: float = 1.0, session_burst: float = 5,
+                 global_rps: float = 20.0, global_burst: float = 40,
+                 session_tokens_per_day: float = 20000, global_tokens_per_day: float = 1000000,
+                 max_sessions: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.session_rps = session_rps
+        self.session_burst = session_burst
+        self.session_tokens_per_day = session_tokens_per_day
+        self.max_sessions = max_sessions
+        self.clock = clock
+        now = clock()
+        self.global_requests = TokenBucket(global_burst, global_rps, now) if global_rps else None
+        self.global_tokens = (
+            TokenBucket(global_tokens_per_day, global_tokens_per_day / self.DAY, now)
+            if global_tokens_per_day else None
+        )
+        self._sessions: "OrderedDict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]]" = OrderedDict()
+        self.rejected: Dict[str, int] = {}
+
+    @classmethod
+    def unlimited(cls) -> "FallbackLimiter":
+        """A limiter with every budget disabled"""
+        return cls(session_rps=0, global_rps=0, session_tokens_per_day=0, global_tokens_per_day=0)
+
+    def _session(self, session_id: str, now: float) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        buckets = self._sessions.get(session_id)
+        if buckets is None:
+            buckets = (
+                TokenBucket(self.session_burst, self.session_rps, now) if self.session_rps else None,
+                TokenBucket(self.session_tokens_per_day, self.session_tokens_per_day / self.DAY, now)
+                if self.session_tokens_per_day else None
+            )
+            self._sessions[session_id] = buckets
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return buckets
+
+    def acquire(self, session_id: Optional[str], reserve: float) -> Optional[str]:
+        """
+        Admit one fallback call reserving `reserve` tokens. Returns None
+        when admitted, otherwise the exhausted budget (e.g. "session_requests").
+        """
+        now = self.clock()
+        session_requests, session_tokens = (None, None) if session_id is None else self._session(session_id, now)
+        checks = (
+            ("session_requests", session_requests, 1),
+            ("global_requests", self.global_requests, 1),
+            ("session_tokens", session_tokens, reserve),
+            ("global_tokens", self.global_tokens, reserve)
+        )
+        for reason, bucket, amount in checks:
+            if bucket is not None and bucket.refill(now) < min(amount, bucket.capacity):
+                self.rejected[reason] = self.rejected.get(reason, 0) + 1
+                return reason
+        for _, bucket, amount in checks:
+            if bucket is not None:
+                bucket.take(amount)
+        return None
+
+    def settle(self, session_id: Optional[str], reserve: float, used: Optional[float]) -> None:
+        """Swap the reservation for the tokens actually used (None: the call failed, refund it)"""
+        delta = reserve - (used or 0)
+        buckets = [self.global_tokens]
+        if session_id is not None and session_id in self._sessions:
+            buckets.append(self._sessions[session_id][1])
+        for bucket in buckets:
+            if bucket is not None:
+                if delta >= 0:
+                    bucket.give(delta)
+                else:
+                    bucket.take(-delta)
+
+    def stats(self) -> dict:
+        now = self.clock()
+        return {
+            "sessions": len(self._sessions),
+            "global_requests_available": round(self.global_requests.refill(now), 2) if self.global_requests else None,
+            "global_tokens_available": round(self.global_tokens.refill(now)) if self.global_tokens else None,
+            "rejected": dict(self.rejected)
+        }
+
+
+class SharedFallbackLimiter(FallbackLimiter):
+    """
+    FallbackLimiter whose buckets live in a SQLite (WAL) table shared by
+    every worker process, so N workers enforce one set of budgets rather
+    than N. `acquire` and `settle` each run in one IMMEDIATE transaction
+    (primary-key reads and writes on local disk); the clock is wall time,
+    which every process shares. They run inline on the event loop, so the
+    write lock is waited for at most BUSY_TIMEOUT: an acquire that cannot
+    get it is refused as "contention", and a settle that cannot get it is
+    kept and applied by the next transaction that does. A missing row is a
+    full bucket, so refilled rows are swept now and then.
+    """
+
+    PURGE_EVERY = 1000  # acquires between sweeps of refilled buckets
+    BUSY_TIMEOUT = 0.01  # seconds to wait for another worker's write lock
+
+    def __init__(self, path: str = "fallback_limits.db", clock: Callable[[], float] = time.time, **kwargs):
+        super().__init__(clock=clock, **kwargs)
+        self.path = path
+        self._acquires = 0
+        self._unsettled: List[Tuple[Optional[str], float]] = []  # (session, delta) not yet written
+        self._local = threading.local()
+        conn = sqlite3.connect(path, timeout=5.0)  # setup may wait for the other workers starting up
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS fallback_limits ("
+                    "name TEXT PRIMARY KEY, session TEXT, level REAL NOT NULL, updated REAL NOT NULL, "
+                    "capacity REAL NOT NULL, rate REAL NOT NULL)"
+                )
+        finally:
+            conn.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock up front: no other worker reads stale levels
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _specs(self, session_id: Optional[str], reasons: Tuple[str, ...]) -> List[Tuple[str, str, float, float]]:
+        """(reason, row name, capacity, rate) of the enabled buckets among `reasons`, in that order"""
+        specs = []
+        for reason in reasons:
+            scope, kind = reason.split("_")
+            if scope == "session":
+                if session_id is None:
+                    continue
+                name = f"session:{session_id}:{kind}"
+                capacity, rate = ((self.session_burst, self.session_rps) if kind == "requests" else
+                                  (self.session_tokens_per_day, self.session_tokens_per_day / self.DAY))
+            else:
+                bucket = self.global_requests if kind == "requests" else self.global_tokens
+                name, capacity, rate = f"global:{kind}", (bucket.capacity if bucket else 0), (bucket.rate if bucket else 0)
+            if rate:
+                specs.append((reason, name, capacity, rate))
+        return specs
+
+    def _load(self, conn: sqlite3.Connection, specs: List[Tuple[str, str, float, float]],
+              now: float) -> List[TokenBucket]:
+        buckets = []
+        for _, name, capacity, rate in specs:
+            bucket = TokenBucket(capacity, rate, now)
+            row = conn.execute("SELECT level, updated FROM fallback_limits WHERE name = ?", (name,)).fetchone()
+            if row is not None:
+                bucket.level, bucket.updated = row
+                bucket.refill(now)
+            buckets.append(bucket)
+        return buckets
+
+    def _store(self, conn: sqlite3.Connection, session_id: Optional[str],
+               specs: List[Tuple[str, str, float, float]], buckets: List[TokenBucket]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO fallback_limits (name, session, level, updated, capacity, rate) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(name, session_id if reason.startswith("session") else None,
+              bucket.level, bucket.updated, bucket.capacity, bucket.rate)
+             for (reason, name, _, _), bucket in zip(specs, buckets)]
+        )
+
+    def _settle(self, conn: sqlite3.Connection, now: float) -> int:
+        """Write the pending settlements (inside a transaction); returns how many were written"""
+        unsettled = list(self._unsettled)
+        for session_id, delta in unsettled:
+            specs = self._specs(session_id, ("session_tokens", "global_tokens"))
+            buckets = self._load(conn, specs, now)
+            for bucket in buckets:
+                if delta >= 0:
+                    bucket.give(delta)
+                else:
+                    bucket.take(-delta)
+            self._store(conn, session_id, specs, buckets)
+        return len(unsettled)
+
+    def acquire(self, session_id: Optional[str], reserve: float) -> Optional[str]:
+        now = self.clock()
+        specs = self._specs(session_id, ("session_requests", "global_requests", "session_tokens", "global_tokens"))
+        self._acquires += 1
+        limited = None
+        try:
+            with self._transaction() as conn:
+                settled = self._settle(conn, now)
+                buckets = self._load(conn, specs, now)
+                for (reason, *_), bucket in zip(specs, buckets):
+                    if bucket.level < min(1 if reason.endswith("requests") else reserve, bucket.capacity):
+                        limited = reason
+                        break
+                else:
+                    for (reason, *_), bucket in zip(specs, buckets):
+                        bucket.take(1 if reason.endswith("requests") else reserve)
+                    self._store(conn, session_id, specs, buckets)
+                if self._acquires % self.PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM fallback_limits WHERE level + (? - updated) * rate >= capacity", (now,))
+        except sqlite3.OperationalError as e:
+            if not _locked(e):
+                raise
+            limited = "contention"
+        else:
+            del self._unsettled[:settled]
+        if limited is not None:
+            self.rejected[limited] = self.rejected.get(limited, 0) + 1
+        return limited
+
+    def settle(self, session_id: Optional[str], reserve: float, used: Optional[float]) -> None:
+        delta = reserve - (used or 0)
+        if not delta:
+            return
+        self._unsettled.append((session_id, delta))
+        try:
+            with self._transaction() as conn:
+                settled = self._settle(conn, self.clock())
+        except sqlite3.OperationalError as e:
+            if not _locked(e):
+                raise
+        else:
+            del self._unsettled[:settled]
+
+    def stats(self) -> dict:
+        conn = self._connection()
+        [sessions] = conn.execute("SELECT COUNT(DISTINCT session) FROM fallback_limits").fetchone()
+        specs = self._specs(None, ("global_requests", "global_tokens"))
+        available = {reason: bucket.level for (reason, *_), bucket in zip(specs, self._load(conn, specs, self.clock()))}
+        return {
+            "sessions": sessions,
+            "global_requests_available": round(available["global_requests"], 2) if "global_requests" in available else None,
+            "global_tokens_available": round(available["global_tokens"]) if "global_tokens" in available else None,
+            "rejected": dict(self.rejected)
+        }
+
+
+def _locked(error: sqlite3.OperationalError) -> bool:
+    """True when SQLite gave up waiting for another connection's lock"""
+    return "locked" in str(error) or "busy" in str(error)
+
+
+def estimate_tokens(*texts: str, max_completion: int = 0) -> int:
+    """Rough prompt size (about 4 characters per token) plus the completion cap"""
+    return sum(len(text) for text in texts) // 4 + 1 + max_completion
+
+
+def create_fallback_limiter() -> FallbackLimiter:
+    """
+    Build the limiter from FALLBACK_* environment variables (0 disables a
+    limit); FALLBACK_LIMIT_BACKEND=sqlite shares the budgets between workers.
+    """
+    options = dict(
+        session_rps=float(os.getenv("FALLBACK_SESSION_RPS", "1")),
+        session_burst=float(os.getenv("FALLBACK_SESSION_BURST", "5")),
+        global_rps=float(os.getenv("FALLBACK_GLOBAL_RPS", "20")),
+        global_burst=float(os.getenv("FALLBACK_GLOBAL_BURST", "40")),
+        session_tokens_per_day=float(os.getenv("FALLBACK_SESSION_TOKENS_PER_DAY", "20000")),
+        global_tokens_per_day=float(os.getenv("FALLBACK_GLOBAL_TOKENS_PER_DAY", "1000000"))
+    )
+    if os.getenv("FALLBACK_LIMIT_BACKEND", "memory").lower() == "sqlite":
+        return SharedFallbackLimiter(os.getenv("FALLBACK_LIMIT_DB_PATH") or data_path("fallback_limits.db"), **options)
+    return FallbackLimiter(**options)
@@ -0,0 +1,28 @@
+# health_wellness_agent2/response_cache.py
+from types import MappingProxyType
+from typing import Any, Callable, Hashable, Mapping, Optional
+
+
+class ResponseTable:
+    """
+    Every (key -> rendered response) of a source table, rendered once up
+    front into a read-only mapping and re-rendered only after the source's
+    version changes (a plan_catalog.CatalogTable).
+    """
+
+    def __init__(self, source: Mapping, render: Callable[[Hashable, Any], str]):
+        self.source = source
+        self.render = render
+        self._build()
+
+    def _build(self):
+        self._version = self.source.version
+        self._responses: Mapping[Hashable, str] = MappingProxyType(
+            {key: self.render(key, value) for key, value in self.source.items()}
+        )
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Rendered response for key, or None if the source has no such key"""
+        if self._version != self.source.version:
+            self._build()
+        return self._responses.get(key)
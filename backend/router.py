@@ -0,0 +1,147 @@
+# health_wellness_agent2/router.py
+import re
+from typing import Dict, FrozenSet, Hashable, List, Mapping, Sequence, Tuple
+
+KeywordTable = Mapping[Hashable, Sequence[str]]
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Words that carry no topic; they do not count against a match score
+STOPWORDS = frozenset("""
+a about am an and any are as at be can could do does for from get give got have
+help how i i'm im in is it it's me my of on or please some tell that the there
+this to up want what when where which who why will with would you your
+""".split())
+
+
+class RouterMatch:
+    """
+    Result of IntentRouter.match: the winning group per table plus where
+    keywords were found, so routes can be scored on demand.
+    """
+
+    __slots__ = ("winners", "_text", "_found", "_spans")
+
+    def __init__(self, winners: Dict[str, Hashable], text_lower: str, found: List[Tuple[int, str]],
+                 spans: Mapping[str, Tuple[Tuple[int, FrozenSet[str]], ...]]):
+        self.winners = winners
+        self._text = text_lower
+        self._found = found
+        self._spans = spans
+
+    def score(self, *tables: str) -> float:
+        """
+        Share of the message's topic characters (stopwords excluded)
+        covered by keywords of the given tables, in [0, 1]. Keywords glued
+        to a longer word ("lean" in "clean") count half.
+        """
+        text = self._text
+        length = len(text)
+        whole = partial = 0
+        for start, keyword in self._found:
+            # a keyword with letters right before or after it is a partial match
+            in_word = start > 0 and text[start - 1].isalnum() and text[start].isalnum()
+            for size, owners in self._spans[keyword]:
+                if not owners.isdisjoint(tables):
+                    end = start + size
+                    span = ((1 << size) - 1) << start
+                    if in_word or (end < length and text[end].isalnum() and text[end - 1].isalnum()):
+                        partial |= span
+                    else:
+                        whole |= span
+        if not whole | partial:
+            return 0.0
+
+        content = content_len = 0
+        for word in _WORD.finditer(text):
+            if word.group() not in STOPWORDS:
+                size = word.end() - word.start()
+                content |= ((1 << size) - 1) << word.start()
+                content_len += size
+        if not content_len:
+            return 0.0
+        partial &= ~whole
+        covered = (whole & content).bit_count() + 0.5 * (partial & content).bit_count()
+        return min(1.0, covered / content_len)
+
+
+class IntentRouter:
+    """
+    Single-pass keyword matcher compiled from ordered keyword tables.
+    Every table keeps its own priority: the first group (in table order)
+    with any keyword found in the text wins, exactly like a cascade of
+    `any(kw in text for kw in keywords)` checks.
+    """
+
+    def __init__(self, tables: Mapping[str, KeywordTable]):
+        self.groups: Dict[str, List[Hashable]] = {}
+        owners: Dict[str, List[Tuple[str, int]]] = {}
+
+        for table, groups in tables.items():
+            self.groups[table] = list(groups)
+            for rank, keywords in enumerate(groups.values()):
+                for keyword in keywords:
+                    owners.setdefault(keyword.lower(), []).append((table, rank))
+
+        # The matcher reports the longest keyword at each position, so every
+        # shorter keyword that is a prefix of it is credited as well. Prefixes
+        # are looked up, so building stays linear in the number of keywords.
+        prefixes = {
+            keyword: [keyword[:size] for size in range(1, len(keyword) + 1) if keyword[:size] in owners]
+            for keyword in owners
+        }
+        self._hits: Dict[str, Tuple[Tuple[str, int], ...]] = {
+            keyword: tuple(owner for other in prefixes[keyword] for owner in owners[other])
+            for keyword in owners
+        }
+        # Same crediting, as (keyword length, tables) pairs for match scoring
+        self._spans: Dict[str, Tuple[Tuple[int, FrozenSet[str]], ...]] = {
+            keyword: tuple(
+                (len(other), frozenset(table for table, _ in owners[other]))
+                for other in prefixes[keyword]
+            )
+            for keyword in owners
+        }
+        self._pattern = re.compile(f"(?=({self._build_trie_pattern(owners)}))")
+
+    @staticmethod
+    def _build_trie_pattern(keywords) -> str:
+        """Factor keywords into a trie-shaped regex so each position is checked in one step"""
+        trie: dict = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def emit(node: dict) -> str:
+            branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # Greedy optional suffix: the longest keyword at a position is tried first
+            return f"(?:{body})?" if "" in node else body
+
+        return emit(trie)
+
+    def match(self, text_lower: str) -> RouterMatch:
+        """Like scan, but also keeps where each keyword was found so routes can be scored"""
+        best: Dict[str, int] = {}
+        found: List[Tuple[int, str]] = []
+        for hit in self._pattern.finditer(text_lower):
+            keyword = hit.group(1)
+            found.append((hit.start(1), keyword))
+            for table, rank in self._hits[keyword]:
+                if rank < best.get(table, rank + 1):
+                    best[table] = rank
+        winners = {table: self.groups[table][rank] for table, rank in best.items()}
+        return RouterMatch(winners, text_lower, found, self._spans)
+
+    def scan(self, text_lower: str) -> Dict[str, Hashable]:
+        """Return the winning group of every table that has a match in the text"""
+        best: Dict[str, int] = {}
+        for keyword in self._pattern.findall(text_lower):
+            for table, rank in self._hits[keyword]:
+                if rank < best.get(table, rank + 1):
+                    best[table] = rank
+        return {table: self.groups[table][rank] for table, rank in best.items()}
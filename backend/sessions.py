@@ -0,0 +1,164 @@
+# health_wellness_agent2/sessions.py
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+from data_dir import data_path
+from context import UserSessionContext
+
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "session_id"
+
+
+def new_session_id() -> str:
+    """Generate an opaque session identifier"""
+    return uuid.uuid4().hex
+
+
+def session_uid(session_id: str) -> int:
+    """Stable numeric user id for a session, used to key per-user data such as the activity log"""
+    return int.from_bytes(hashlib.blake2b(session_id.encode(), digest_size=7).digest(), "big")
+
+
+class SessionStore:
+    """
+    Base class for per-session UserSessionContext storage.
+    Stores cap the event logs of every session they save so a single
+    chatty client cannot grow memory without bound.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600.0, max_log_entries: int = 100):
+        self.ttl_seconds = ttl_seconds
+        self.max_log_entries = max_log_entries
+
+    async def load(self, session_id: str) -> UserSessionContext:
+        """Return the stored context, or a fresh one for unknown/expired sessions"""
+        raise NotImplementedError
+
+    async def save(self, session_id: str, context: UserSessionContext) -> None:
+        """Persist the context for the session"""
+        raise NotImplementedError
+
+    def _fresh(self, session_id: str) -> UserSessionContext:
+        return UserSessionContext(uid=session_uid(session_id))
+
+    def _bound(self, context: UserSessionContext) -> UserSessionContext:
+        """Keep only the most recent log entries"""
+        context.progress_logs.truncate(self.max_log_entries)
+        context.handoff_logs.truncate(self.max_log_entries)
+        return context
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process LRU with TTL eviction.
+    Every operation runs without awaiting, so the event loop serializes
+    access and no lock is needed.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 3600.0,
+                 max_log_entries: int = 100):
+        super().__init__(ttl_seconds, max_log_entries)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Tuple[float, UserSessionContext]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def load(self, session_id: str) -> UserSessionContext:
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[0] < time.monotonic() - self.ttl_seconds:
+            return self._fresh(session_id)
+        self._sessions.move_to_end(session_id)
+        return entry[1]
+
+    async def save(self, session_id: str, context: UserSessionContext) -> None:
+        now = time.monotonic()
+        self._sessions[session_id] = (now, self._bound(context))
+        self._sessions.move_to_end(session_id)
+        self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired sessions from the cold end, then enforce the size cap"""
+        deadline = now - self.ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest[0] >= deadline and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed persistent store.
+    Queries run in worker threads, each with its own connection; WAL mode
+    lets readers proceed while a write is in progress.
+    """
+
+    PURGE_EVERY = 1000  # saves between expired-row sweeps
+
+    def __init__(self, path: str = "sessions.db", ttl_seconds: float = 3600.0,
+                 max_log_entries: int = 100):
+        super().__init__(ttl_seconds, max_log_entries)
+        self.path = path
+        self._local = threading.local()
+        self._saves = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions(updated_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, session_id: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND updated_at >= ?",
+            (session_id, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _save(self, session_id: str, data: str, purge: bool) -> None:
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (session_id, data, now)
+            )
+            if purge:
+                conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    async def load(self, session_id: str) -> UserSessionContext:
+        data = await asyncio.to_thread(self._load, session_id)
+        if data is None:
+            return self._fresh(session_id)
+        return UserSessionContext.model_validate_json(data)
+
+    async def save(self, session_id: str, context: UserSessionContext) -> None:
+        self._saves += 1
+        data = self._bound(context).model_dump_json()
+        await asyncio.to_thread(self._save, session_id, data, self._saves % self.PURGE_EVERY == 0)
+
+
+def create_session_store() -> SessionStore:
+    """Build the store selected by SESSION_BACKEND (memory | sqlite)"""
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    ttl = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    max_logs = int(os.getenv("SESSION_MAX_LOG_ENTRIES", "100"))
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH") or data_path("sessions.db"), ttl, max_logs)
+    return MemorySessionStore(int(os.getenv("SESSION_MAX_COUNT", "10000")), ttl, max_logs)
@@ -0,0 +1,74 @@
+# health_wellness_agent2/single_flight.py
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from deadline import DeadlineExceeded, current_deadline
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts
+    the work, later callers with the same key await the same task and get
+    its result (or exception). A caller that is cancelled does not cancel
+    the shared task for the others; when the last waiting caller is
+    cancelled (e.g. every client disconnected) the task is cancelled too.
+
+    The task runs in a fresh context, so it does not inherit the first
+    caller's request deadline (it keeps to its own timeouts); every caller
+    waits for it only until its own deadline.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = contextvars.Context().run(asyncio.ensure_future, fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        deadline = current_deadline()
+        try:
+            if deadline is None:
+                return await asyncio.shield(task)
+            return await asyncio.wait_for(asyncio.shield(task), deadline.remaining())
+        except asyncio.TimeoutError:
+            if task.done():  # the shared call's own error
+                raise
+            self._leave(task)
+            raise DeadlineExceeded("no shared answer within the deadline") from None
+        except asyncio.CancelledError:
+            self._leave(task)
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _leave(self, task: asyncio.Task) -> None:
+        """A caller stops waiting: the last one cancels the shared task"""
+        if self._waiters[task] == 1 and not task.done():
+            self.abandoned += 1
+            task.cancel()
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def stats(self) -> dict:
+        return {"upstream_calls": self.calls, "coalesced": self.coalesced, "abandoned": self.abandoned,
+                "inflight": self.inflight}
@@ -1,105 +1,122 @@
 # health_wellness_agent2/tools/goal_analyzer.py
 import asyncio
+from typing import Optional
 from context import UserSessionContext
+from tools.plan_builder import summarize_goal
 
-async def analyze_goal(input: str, context) -> str:
-    await asyncio.sleep(0)
-    input_lower = input.lower()
-    
+# Checked in order: the first goal type with a matching keyword wins
+GOAL_KEYWORDS = {
     # Weight Loss/Fat Reduction
-    if any(word in input_lower for word in [
+    "weight_loss": [
         "lose", "weight loss", "fat", "slim", "lean",
         "burn fat", "reduce weight", "cutting"
-    ]):
-        return (
-            "⚖️ **Weight Loss Plan**\n\n"
-            "1. 🏃 Cardio 3-5x weekly (walking/running)\n"
-            "2. 🍽 Moderate calorie deficit (300-500cal)\n"
-            "3. 🥩 High-protein meals (1.6-2.2g/kg)\n"
-            "4. 🏋️ Strength training to maintain muscle\n\n"
-            "💡 Pro Tip: Track measurements weekly, not just weight!"
-        )
-    
+    ],
     # Weight Gain
-    elif any(word in input_lower for word in [
-        "gain weight", "increase weight", "put on weight", 
+    "weight_gain": [
+        "gain weight", "increase weight", "put on weight",
         "weight gain", "bulk up", "add pounds"
-    ]):
-        return (
-            "📈 **Healthy Weight Gain**\n\n"
-            "1. 🍌 Calorie surplus (300-500cal above maintenance)\n"
-            "2. 🏋️ Strength training 3-4x weekly\n"
-            "3. 🍗 Protein-rich meals (1.6-2.2g/kg)\n"
-            "4. 🍠 Healthy carbs (rice, oats, potatoes)\n"
-            "5. 📊 Track progress weekly\n\n"
-            "💡 Pro Tip: Aim for 0.5-1lb gain per week"
-        )
-    
+    ],
     # Muscle Building
-    elif any(word in input_lower for word in [
+    "muscle_building": [
         "build", "muscle", "gain mass", "bulk",
         "get bigger", "hypertrophy"
-    ]):
-        return (
-            "💪 **Muscle Building**\n\n"
-            "1. 🔝 Progressive overload training\n"
-            "2. 🏋️ Compound lifts (squats, deadlifts)\n"
-            "3. 🥩 High-protein diet (1.6-2.2g/kg)\n"
-            "4. 🍚 Calorie surplus (200-500cal)\n"
-            "5. 😴 7-9 hours sleep nightly\n\n"
-            "💡 Pro Tip: Focus on 8-12 rep range for hypertrophy"
-        )
-    
+    ],
     # General Fitness
-    elif any(word in input_lower for word in [
+    "general_fitness": [
         "fitness", "tone", "endurance", "get fit",
         "in shape", "toned"
-    ]):
-        return (
-            "🌟 **General Fitness**\n\n"
-            "1. 🔀 Mix strength & cardio\n"
-            "2. 🏋️ Full-body workouts 3x weekly\n"
-            "3. 🥗 Balanced nutrition\n"
-            "4. 🧘 Include flexibility work\n\n"
-            "💡 Pro Tip: Try circuit training for efficiency"
-        )
-    
+    ],
     # Strength Training
-    elif any(word in input_lower for word in [
+    "strength": [
         "strength", "power", "get stronger",
         "lift more", "powerlifting"
-    ]):
-        return (
-            "🏆 **Strength Training**\n\n"
-            "1. 🏋️ Heavy compound lifts\n"
-            "2. 🔢 Low reps (3-6) with max weight\n"
-            "3. ⏳ Longer rest between sets (2-5min)\n"
-            "4. 👀 Focus on form first\n\n"
-            "💡 Pro Tip: Deload every 4-6 weeks"
-        )
-    
+    ],
     # Health/Wellness
-    elif any(word in input_lower for word in [
+    "health": [
         "health", "wellness", "healthy lifestyle",
         "wellbeing", "overall health"
-    ]):
-        return (
-            "🌿 **Holistic Health**\n\n"
-            "1. 🥗 Balanced whole-food diet\n"
-            "2. 🏃 150min exercise weekly\n"
-            "3. 😴 7-9 hours quality sleep\n"
-            "4. 🧘 Stress management\n\n"
-            "💡 Pro Tip: Morning sunlight boosts circadian rhythm"
-        )
-    
-    else:
-        return (
-            "❓ **Goal Analysis**\n\n"
-            "Common Goal Types:\n"
-            "• ⚖️ Weight Loss\n"
-            "• 📈 Weight Gain\n"
-            "• 💪 Muscle Building\n"
-            "• 🏆 Strength Training\n"
-            "• 🌿 General Health\n\n"
-            "💡 Try: 'How to lose weight?' or 'Best muscle building plan?'"
-        )
\ No newline at end of file
+    ]
+}
+
+GOAL_RESPONSES = {
+    "weight_loss": (
+        "⚖️ **Weight Loss Plan**\n\n"
+        "1. 🏃 Cardio 3-5x weekly (walking/running)\n"
+        "2. 🍽 Moderate calorie deficit (300-500cal)\n"
+        "3. 🥩 High-protein meals (1.6-2.2g/kg)\n"
+        "4. 🏋️ Strength training to maintain muscle\n\n"
+        "💡 Pro Tip: Track measurements weekly, not just weight!"
+    ),
+    "weight_gain": (
+        "📈 **Healthy Weight Gain**\n\n"
+        "1. 🍌 Calorie surplus (300-500cal above maintenance)\n"
+        "2. 🏋️ Strength training 3-4x weekly\n"
+        "3. 🍗 Protein-rich meals (1.6-2.2g/kg)\n"
+        "4. 🍠 Healthy carbs (rice, oats, potatoes)\n"
+        "5. 📊 Track progress weekly\n\n"
+        "💡 Pro Tip: Aim for 0.5-1lb gain per week"
+    ),
+    "muscle_building": (
+        "💪 **Muscle Building**\n\n"
+        "1. 🔝 Progressive overload training\n"
+        "2. 🏋️ Compound lifts (squats, deadlifts)\n"
+        "3. 🥩 High-protein diet (1.6-2.2g/kg)\n"
+        "4. 🍚 Calorie surplus (200-500cal)\n"
+        "5. 😴 7-9 hours sleep nightly\n\n"
+        "💡 Pro Tip: Focus on 8-12 rep range for hypertrophy"
+    ),
+    "general_fitness": (
+        "🌟 **General Fitness**\n\n"
+        "1. 🔀 Mix strength & cardio\n"
+        "2. 🏋️ Full-body workouts 3x weekly\n"
+        "3. 🥗 Balanced nutrition\n"
+        "4. 🧘 Include flexibility work\n\n"
+        "💡 Pro Tip: Try circuit training for efficiency"
+    ),
+    "strength": (
+        "🏆 **Strength Training**\n\n"
+        "1. 🏋️ Heavy compound lifts\n"
+        "2. 🔢 Low reps (3-6) with max weight\n"
+        "3. ⏳ Longer rest between sets (2-5min)\n"
+        "4. 👀 Focus on form first\n\n"
+        "💡 Pro Tip: Deload every 4-6 weeks"
+    ),
+    "health": (
+        "🌿 **Holistic Health**\n\n"
+        "1. 🥗 Balanced whole-food diet\n"
+        "2. 🏃 150min exercise weekly\n"
+        "3. 😴 7-9 hours quality sleep\n"
+        "4. 🧘 Stress management\n\n"
+        "💡 Pro Tip: Morning sunlight boosts circadian rhythm"
+    ),
+    "unknown": (
+        "❓ **Goal Analysis**\n\n"
+        "Common Goal Types:\n"
+        "• ⚖️ Weight Loss\n"
+        "• 📈 Weight Gain\n"
+        "• 💪 Muscle Building\n"
+        "• 🏆 Strength Training\n"
+        "• 🌿 General Health\n\n"
+        "💡 Try: 'How to lose weight?' or 'Best muscle building plan?'"
+    )
+}
+
+GOAL_PLANS_HINT = "🗂️ Your workout and meal plans are set for it: ask for 'my workout plan' or 'my meal plan'."
+
+def identify_goal_type(input: str) -> str:
+    """Identify goal type from message"""
+    input_lower = input.lower()
+    for goal_type, keywords in GOAL_KEYWORDS.items():
+        if any(word in input_lower for word in keywords):
+            return goal_type
+    return "unknown"
+
+async def analyze_goal(input: str, context, goal_type: Optional[str] = None) -> str:
+    """Answer a goal question; goal_type may be pre-resolved by the agent router"""
+    await asyncio.sleep(0)
+    if goal_type is None:
+        goal_type = identify_goal_type(input)
+    response = GOAL_RESPONSES.get(goal_type, GOAL_RESPONSES["unknown"])
+    if context is not None and context.goal is not None:
+        response += f"\n\n{summarize_goal(context.goal)}\n{GOAL_PLANS_HINT}"
+    return response
@@ -1,38 +1,32 @@
 # health_wellness_agent2/tools/meal_planner.py
 import asyncio
+from typing import Optional
 from context import UserSessionContext
+from plan_catalog import catalog
+from response_cache import ResponseTable
 
-async def generate_meal_plan(input: str, context) -> str:
+DIET_PLANS = catalog.table("diets")
+
+def _render_meal_plan(diet: str, meals) -> str:
+    return f"🍽️ **{diet.capitalize()} Meal Plan**:\n\n" + "\n".join(meals)
+
+# Rendered once at import; rebuilt automatically when the catalog reloads DIET_PLANS
+DIET_RESPONSES = ResponseTable(DIET_PLANS, _render_meal_plan)
+
+def identify_diet(input: str) -> str:
+    """Identify diet type from message (a term lookup in the plan index)"""
+    from tools.plan_search import current_index
+    return current_index().key_in("diets", input) or "unknown"
+
+async def generate_meal_plan(input: str, context, diet: Optional[str] = None) -> str:
     await asyncio.sleep(0)
 
-    diet_plans = {
-        "keto": [
-            "🍳 **Breakfast**: Scrambled eggs with spinach and avocado",
-            "🥗 **Lunch**: Grilled chicken salad with avocado and olive oil dressing",
-            "🐟 **Dinner**: Grilled salmon with asparagus"
-        ],
-        "vegetarian": [
-            "🥣 **Breakfast**: Oatmeal with almond milk and fresh berries",
-            "🥗 **Lunch**: Chickpea salad with cucumbers and tomatoes",
-            "🍛 **Dinner**: Lentil curry with brown rice"
-        ],
-        "vegan": [
-            "🍳 **Breakfast**: Tofu scramble with bell peppers and spinach",
-            "🥗 **Lunch**: Chickpea salad with lemon-tahini dressing",
-            "🌶️ **Dinner**: Vegan chili with black beans and sweet potatoes"
-        ],
-        "gluten-free": [
-            "🥣 **Breakfast**: Greek yogurt with honey and berries",
-            "🥗 **Lunch**: Grilled chicken quinoa salad",
-            "🐟 **Dinner**: Baked salmon with steamed broccoli"
-        ]
-    }
-
-    input_lower = input.lower()
-    for diet in diet_plans:
-        if diet in input_lower:
-            meals = "\n".join(diet_plans[diet])
-            return f"🍽️ **{diet.capitalize()} Meal Plan**:\n\n{meals}"
+    if diet is None:
+        diet = identify_diet(input)
+
+    response = DIET_RESPONSES.get(diet)
+    if response is not None:
+        return response
 
     # Fallback message
     return (
@@ -45,4 +39,4 @@ async def generate_meal_plan(input: str, context) -> str:
         "💡 Try asking:\n"
         "- 'keto or vegan or vegetarian or gluten-Free food / diet / meal'\n"
         "- 'common or general food / diet / meal'"
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,126 @@
+# health_wellness_agent2/tools/plan_builder.py
+import asyncio
+from typing import Optional
+from context import Goal, UserSessionContext
+from tools.meal_planner import DIET_PLANS
+from tools.workout_recommender import WORKOUT_PLANS
+
+DEFAULT_LEVEL = "beginner"
+DEFAULT_DIET = "balanced"
+
+# Meals for diets without a plan in DIET_PLANS (no preference, paleo, ...)
+BALANCED_MEALS = [
+    "🥣 **Breakfast**: Oats with Greek yogurt and fruit",
+    "🥗 **Lunch**: Whole-grain wrap with lean protein and salad",
+    "🍲 **Dinner**: Grilled fish or tofu with vegetables and brown rice"
+]
+
+WORKOUT_FOCUS = {
+    "lose": "🔥 **Goal focus**: 2 extra cardio sessions a week (30-45 mins)",
+    "gain": "📈 **Goal focus**: Add a set to each lift every week; keep cardio short",
+    "build": "💪 **Goal focus**: Progressive overload, 8-12 reps, 4 strength days a week",
+    "improve": "🌟 **Goal focus**: Mix strength and cardio; retest every 2 weeks"
+}
+
+KCAL_PER_UNIT = {"kg": 7700, "lbs": 3500}
+MAX_DAILY_KCAL = 1000
+# Fastest weight change a plan is built for; faster goals are flagged and planned at this rate
+MAX_WEEKLY_CHANGE = {"kg": 1.0, "lbs": 2.2}
+
+def _amount(value: float, unit: Optional[str]) -> str:
+    value = f"{round(value, 2):g}"
+    if unit == "%":
+        return f"{value}%"
+    return f"{value} {unit}" if unit else value
+
+def planned_weekly_rate(goal: Goal) -> float:
+    """The goal's weekly rate, or MAX_WEEKLY_CHANGE for a weight goal faster than that"""
+    limit = MAX_WEEKLY_CHANGE.get(goal.unit)
+    if limit is None or goal.action not in ("lose", "gain", "build"):
+        return goal.weekly_rate
+    return min(goal.weekly_rate, limit)
+
+def daily_calories(goal: Goal) -> Optional[int]:
+    """Daily calorie change that reaches a weight goal at its planned rate (capped); None otherwise"""
+    per_unit = KCAL_PER_UNIT.get(goal.unit)
+    if per_unit is None or goal.action not in ("lose", "gain", "build"):
+        return None
+    kcal = round(min(planned_weekly_rate(goal) * per_unit / 7, MAX_DAILY_KCAL))
+    return -kcal if goal.action == "lose" else kcal
+
+def summarize_goal(goal: Goal) -> str:
+    summary = (f"📌 **Your goal**: {goal.describe()} "
+               f"({_amount(goal.weekly_rate, goal.unit)}/week over {goal.weeks:.0f} weeks)")
+    rate = planned_weekly_rate(goal)
+    if rate < goal.weekly_rate:
+        summary += (f"\n⚠️ **Too fast to be safe**: this plan aims for {_amount(rate, goal.unit)}/week, "
+                    f"so {_amount(goal.amount, goal.unit)} takes about {goal.amount / rate:.0f} weeks")
+    return summary
+
+# A stored plan is reused while its key matches: same goal, same level or
+# diet, and the plan tables it was copied from are unchanged
+def workout_key(goal: Goal, level: str) -> str:
+    return f"{goal.describe()}|{level}|{WORKOUT_PLANS.version}"
+
+def meal_key(goal: Goal, diet: str) -> str:
+    return f"{goal.describe()}|{diet}|{DIET_PLANS.version}"
+
+def derive_workout_plan(goal: Goal, level: str) -> dict:
+    items = [*WORKOUT_PLANS[level], WORKOUT_FOCUS[goal.action]]
+    text = (f"{summarize_goal(goal)}\n\n🏋️ **{level.capitalize()} Workout Plan**:\n\n" + "\n".join(items))
+    return {"key": workout_key(goal, level), "level": level, "items": items, "text": text}
+
+def derive_meal_plan(goal: Goal, diet: str) -> dict:
+    items = list(DIET_PLANS.get(diet, BALANCED_MEALS))
+    kcal = daily_calories(goal)
+    if kcal is not None:
+        direction = "below" if kcal < 0 else "above"
+        items.append(f"🔢 **Calories**: about {abs(kcal)} kcal/day {direction} maintenance")
+    else:
+        items.append("🥩 **Protein**: 1.6-2.2g per kg of body weight daily")
+    text = (f"{summarize_goal(goal)}\n\n🍽️ **{diet.capitalize()} Meal Plan**:\n\n" + "\n".join(items))
+    return {"key": meal_key(goal, diet), "diet": diet, "items": items, "text": text}
+
+def sync_workout_plan(context: UserSessionContext, level: Optional[str] = None) -> bool:
+    """
+    Re-derive the stored workout plan only when it is stale; `level` is a
+    level the message asked for (else the stored plan's, else beginner).
+    Returns whether a plan was derived.
+    """
+    stored = context.workout_plan
+    if level not in WORKOUT_PLANS:
+        level = stored["level"] if stored is not None else DEFAULT_LEVEL
+        if level not in WORKOUT_PLANS:
+            level = DEFAULT_LEVEL
+    if stored is not None and stored["key"] == workout_key(context.goal, level):
+        return False
+    context.workout_plan = derive_workout_plan(context.goal, level)
+    return True
+
+def sync_meal_plan(context: UserSessionContext, diet: Optional[str] = None) -> bool:
+    """Same as sync_workout_plan for the meal plan; without `diet`, the stored plan's or the preference"""
+    stored = context.meal_plan
+    if diet is None:
+        diet = stored["diet"] if stored is not None else context.diet_preferences or DEFAULT_DIET
+    if diet not in DIET_PLANS:
+        diet = DEFAULT_DIET
+    if stored is not None and stored["key"] == meal_key(context.goal, diet):
+        return False
+    context.meal_plan = derive_meal_plan(context.goal, diet)
+    return True
+
+def sync_plans(context: UserSessionContext, diet: Optional[str] = None) -> int:
+    """Bring both plans up to date with the goal; returns how many were derived"""
+    if context.goal is None:
+        return 0
+    return sync_workout_plan(context) + sync_meal_plan(context, diet)
+
+async def workout_for_goal(context: UserSessionContext, level: Optional[str] = None) -> str:
+    await asyncio.sleep(0)
+    sync_workout_plan(context, level)
+    return context.workout_plan["text"]
+
+async def meal_plan_for_goal(context: UserSessionContext, diet: Optional[str] = None) -> str:
+    await asyncio.sleep(0)
+    sync_meal_plan(context, diet if diet in DIET_PLANS else None)
+    return context.meal_plan["text"]
@@ -0,0 +1,240 @@
+# health_wellness_agent2/tools/plan_search.py
+import asyncio
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from context import UserSessionContext
+from plan_catalog import catalog
+from router import STOPWORDS
+
+# Plan tables searched, and the advice tables whose "avoid" lists drop plans
+PLAN_TABLES = ("workouts", "diets")
+AVOID_TABLES = ("injuries", "nutrition")
+
+# Words that keep a search to one plan table
+TABLE_WORDS = {
+    "workouts": ("workout", "exercise", "training", "routine", "gym"),
+    "diets": ("meal", "diet", "food", "recipe", "nutrition")
+}
+
+# Category words left out of "avoid" entries: "Any Type Of Running" drops every line about running
+GENERIC_TERMS = frozenset(("any", "type", "food", "activity", "sport", "motion", "movement", "meal", "exercise"))
+
+TOP_K = 5
+K1, B = 1.2, 0.75  # BM25 term saturation and length normalisation
+
+_TERM = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_LABEL = re.compile(r"\*\*(.+?)\*\*")
+
+
+def stem(term: str) -> str:
+    """Light suffix stripping, so "squats"/"squat" and "running"/"run" are one term"""
+    if len(term) <= 4:
+        return term
+    if term.endswith("ies"):
+        return term[:-3] + "y"
+    if term.endswith("ing") and len(term) > 5:
+        term = term[:-3]
+        if term[-1] == term[-2] and term[-1] not in "aeioulsz":
+            term = term[:-1]
+        return term
+    if term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """Stemmed terms without stopwords; hyphenated words count whole and by part ("high-protein", "high", "protein")"""
+    terms = []
+    for word in _TERM.findall(text.lower()):
+        if "-" in word:
+            terms.append(stem(word))
+            terms.extend(stem(part) for part in word.split("-") if part not in STOPWORDS)
+        elif word not in STOPWORDS:
+            terms.append(stem(word))
+    return terms
+
+
+def _name_term(name: str) -> str:
+    """A level, diet or label as one term ("Gluten-Free" -> "gluten-free")"""
+    return stem("-".join(name.lower().split()))
+
+
+class PlanDoc(NamedTuple):
+    """One line of a plan (an exercise or a meal) and where it comes from"""
+    table: str
+    key: str
+    label: Optional[str]
+    text: str
+
+
+class PlanHit(NamedTuple):
+    score: float
+    doc: PlanDoc
+
+
+class PlanIndex:
+    """
+    Inverted index over every line of the plan tables: term -> (line ids,
+    BM25 weights), weights computed at build time.
+
+    A query's terms that name a level or diet, a line's label ("cardio",
+    "dinner") or a table ("workout", "meal") filter the lines: any value
+    within a facet, every facet across them. A body part or condition from
+    the advice tables drops the lines its "avoid" list names. The other
+    terms rank what is left with BM25, so "vegan high-protein dinner" and
+    "knee-safe beginner cardio" are one pass over a few postings.
+    """
+
+    def __init__(self, plans: Mapping[str, Mapping[str, Sequence[str]]],
+                 avoid: Optional[Mapping[str, Mapping[str, Mapping[str, Sequence[str]]]]] = None,
+                 versions: Optional[Tuple[int, ...]] = None):
+        self.versions = versions
+        self.docs: List[PlanDoc] = []
+        self._keys: Dict[str, Dict[str, Tuple[int, str]]] = {}
+        facet_ids: Dict[str, Dict[str, List[int]]] = {"key": {}, "label": {}, "table": {}}
+        term_ids: Dict[str, List[int]] = {}
+        term_counts: Dict[str, List[int]] = {}
+        lengths = []
+
+        for table, groups in plans.items():
+            keys = self._keys[table] = {}
+            table_ids = []
+            for position, (key, lines) in enumerate(groups.items()):
+                keys.setdefault(_name_term(key), (position, key))
+                key_ids = facet_ids["key"].setdefault(_name_term(key), [])
+                for line in lines:
+                    doc_id = len(self.docs)
+                    label = _LABEL.search(line)
+                    label = label.group(1) if label else None
+                    self.docs.append(PlanDoc(table, key, label, line))
+                    table_ids.append(doc_id)
+                    key_ids.append(doc_id)
+                    if label is not None:
+                        facet_ids["label"].setdefault(_name_term(label), []).append(doc_id)
+                    terms = tokenize(line)
+                    lengths.append(len(terms))
+                    for term, count in Counter(terms).items():
+                        term_ids.setdefault(term, []).append(doc_id)
+                        term_counts.setdefault(term, []).append(count)
+            for word in TABLE_WORDS.get(table, ()):
+                facet_ids["table"].setdefault(stem(word), []).extend(table_ids)  # "training" -> "train"
+
+        # A term filters one facet: a level or diet before a label before a table word
+        self._facets: Dict[str, Tuple[str, np.ndarray]] = {}
+        for facet in ("table", "label", "key"):
+            for term, ids in facet_ids[facet].items():
+                self._facets[term] = (facet, np.array(ids, dtype=np.int64))
+
+        count = len(self.docs)
+        lengths = np.array(lengths, dtype=np.float64)
+        average = lengths.mean() if count else 1.0
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, ids in term_ids.items():
+            ids = np.array(ids, dtype=np.int64)
+            tf = np.array(term_counts[term], dtype=np.float64)
+            idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            weights = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[ids] / average))
+            self._postings[term] = (ids, weights)
+
+        # Lines to drop per body part or condition: those with every term of an "avoid" entry
+        self._avoid: Dict[str, np.ndarray] = {}
+        for advice in (avoid or {}).values():
+            for name, entry in advice.items():
+                dropped = set()
+                for phrase in entry.get("avoid", ()):
+                    terms = set(tokenize(phrase)) - GENERIC_TERMS
+                    if terms and all(term in term_ids for term in terms):
+                        dropped.update(set.intersection(*(set(term_ids[term]) for term in terms)))
+                self._avoid[_name_term(name)] = np.array(sorted(dropped), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def key_in(self, table: str, text: str) -> Optional[str]:
+        """The level or diet of `table` named in the text (the first in table order), or None"""
+        keys = self._keys.get(table, {})
+        found = [keys[term] for term in tokenize(text) if term in keys]
+        return min(found)[1] if found else None
+
+    def search(self, query: str, k: int = TOP_K) -> List[PlanHit]:
+        """Top k lines for the query, best first (ties in catalog order)"""
+        filters: Dict[str, List[np.ndarray]] = {}
+        dropped = []
+        scored = []
+        for term in dict.fromkeys(tokenize(query)):
+            facet = self._facets.get(term)
+            if facet is not None:
+                filters.setdefault(facet[0], []).append(facet[1])
+            elif term in self._avoid:
+                dropped.append(self._avoid[term])
+            elif term in self._postings:
+                scored.append(self._postings[term])
+        if not (filters or dropped or scored) or k <= 0:
+            return []
+
+        count = len(self.docs)
+        allowed = None
+        for id_arrays in filters.values():
+            mask = np.zeros(count, dtype=bool)
+            for ids in id_arrays:
+                mask[ids] = True
+            allowed = mask if allowed is None else allowed & mask
+        if dropped:
+            if allowed is None:
+                allowed = np.ones(count, dtype=bool)
+            for ids in dropped:
+                allowed[ids] = False
+
+        scores = np.zeros(count)
+        for ids, weights in scored:
+            scores[ids] += weights
+        candidates = np.flatnonzero(scores if allowed is None else allowed)
+        values = scores[candidates]
+        positive = values > 0
+        hits, hit_values = candidates[positive], values[positive]
+        if len(hits) > k:
+            threshold = np.partition(hit_values, len(hit_values) - k)[len(hit_values) - k]
+            keep = hit_values >= threshold
+            hits, hit_values = hits[keep], hit_values[keep]
+        top = hits[np.lexsort((hits, -hit_values))[:k]]
+        if len(top) < k:  # filtered lines no ranked term matched, in catalog order
+            top = np.concatenate((top, candidates[~positive][:k - len(top)]))
+        docs = self.docs
+        return [PlanHit(float(scores[i]), docs[i]) for i in top.tolist()]
+
+
+_index: Optional[PlanIndex] = None
+
+
+def current_index() -> PlanIndex:
+    """The index of the loaded catalog, rebuilt once a reload changes a table it was built from"""
+    global _index
+    versions = tuple(catalog.table(name).version for name in PLAN_TABLES + AVOID_TABLES)
+    index = _index
+    if index is None or index.versions != versions:
+        index = _index = PlanIndex({name: catalog.table(name) for name in PLAN_TABLES},
+                                   {name: catalog.table(name) for name in AVOID_TABLES}, versions)
+    return index
+
+
+def _source(doc: PlanDoc) -> str:
+    return f"{doc.key.capitalize()} {'workout' if doc.table == 'workouts' else 'meal'} plan"
+
+
+async def search_plans(input: str, context: UserSessionContext, k: int = TOP_K) -> str:
+    """Exercises and meals matching every constraint in the message"""
+    await asyncio.sleep(0)
+    hits = current_index().search(input, k)
+    if not hits:
+        return (
+            "🔎 **No matching plans found**\n\n"
+            "💡 Combine a level or diet with what you are after, e.g.:\n"
+            "- 'find vegan high-protein dinner'\n"
+            "- 'find knee-safe beginner cardio'"
+        )
+    return "🔎 **Matching plans**:\n\n" + "\n".join(f"{hit.doc.text} ({_source(hit.doc)})" for hit in hits)
@@ -0,0 +1,162 @@
+# health_wellness_agent2/tools/progress_analytics.py
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from tools.progress_trends import WEEK, ProgressTrends
+
+
+class ProgressSeries:
+    """
+    Dense per-user daily time series backed by NumPy arrays: one slot per
+    day from `start_day`, with workout and meal counts and the last value
+    of every measurement that day (NaN when nothing was measured).
+    """
+
+    __slots__ = ("start_day", "workouts", "meals", "measurements")
+
+    def __init__(self, start_day: int, workouts: np.ndarray, meals: np.ndarray,
+                 measurements: Dict[str, np.ndarray]):
+        self.start_day = start_day
+        self.workouts = workouts
+        self.meals = meals
+        self.measurements = measurements
+
+    def __len__(self) -> int:
+        return len(self.workouts)
+
+    @classmethod
+    def from_daily(cls, rows: Iterable[Tuple[int, str, str, int, Optional[float]]],
+                   start_day: int, end_day: int) -> "ProgressSeries":
+        """Build from (day, kind, name, count, last value) rows, e.g. ActivityStore.daily"""
+        length = end_day - start_day + 1
+        rows = list(rows)
+        if not rows:
+            empty = np.zeros(length, dtype=np.int64)
+            return cls(start_day, empty, empty.copy(), {})
+        day_column, kind_column, name_column, count_column, value_column = zip(*rows)
+        days = np.array(day_column, dtype=np.int64) - start_day
+        counts = np.array(count_column, dtype=np.int64)
+        kinds = np.array(kind_column)
+        names = np.array(name_column)
+        values = np.array([np.nan if value is None else value for value in value_column], dtype=float)
+        inside = (days >= 0) & (days < length)
+
+        def column(mask: np.ndarray) -> np.ndarray:
+            out = np.zeros(length, dtype=np.int64)
+            np.add.at(out, days[mask], counts[mask])
+            return out
+
+        measured = inside & (kinds == "measurement") & ~np.isnan(values)
+        measurements: Dict[str, np.ndarray] = {}
+        for name in np.unique(names[measured]):
+            mask = measured & (names == name)
+            series = np.full(length, np.nan)
+            series[days[mask]] = values[mask]
+            measurements[str(name)] = series
+        return cls(start_day, column(inside & (kinds == "workout")), column(inside & (kinds == "meal")),
+                   measurements)
+
+    def active_span(self) -> int:
+        """Days from the first day with any entry to the end of the series"""
+        any_entry = (self.workouts > 0) | (self.meals > 0)
+        for values in self.measurements.values():
+            any_entry |= ~np.isnan(values)
+        first = np.argmax(any_entry) if any_entry.any() else len(self)
+        return len(self) - int(first)
+
+    def tail(self, days: int) -> "ProgressSeries":
+        """The last `days` days (views, no copy)"""
+        cut = max(0, len(self) - days)
+        return ProgressSeries(self.start_day + cut, self.workouts[cut:], self.meals[cut:],
+                              {name: values[cut:] for name, values in self.measurements.items()})
+
+    def downsample(self, bucket_days: int) -> "ProgressSeries":
+        """
+        Coarser series for long histories: counts are summed and
+        measurements averaged (ignoring missing days) per bucket. The
+        oldest partial bucket is dropped so buckets end on the last day.
+        """
+        usable = len(self) - len(self) % bucket_days
+        series = self.tail(usable)
+        return ProgressSeries(
+            series.start_day,
+            series.workouts.reshape(-1, bucket_days).sum(axis=1),
+            series.meals.reshape(-1, bucket_days).sum(axis=1),
+            {name: nanmean_rows(values.reshape(-1, bucket_days)) for name, values in series.measurements.items()}
+        )
+
+
+def nanmean_rows(matrix: np.ndarray) -> np.ndarray:
+    """Row means ignoring NaN; NaN for rows with no values (without RuntimeWarnings)"""
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=1)
+    sums = np.where(present, matrix, 0.0).sum(axis=1)
+    return np.divide(sums, counts, out=np.full(len(matrix), np.nan), where=counts > 0)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing moving average over `window` slots ignoring NaN (missing
+    days), via cumulative sums: O(n) whatever the window. Slots whose
+    window holds no value are NaN.
+    """
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    lagged = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    total = sums[1:] - sums[lagged]
+    seen = counts[1:] - counts[lagged]
+    return np.divide(total, seen, out=np.full(len(values), np.nan), where=seen > 0)
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sum over `window` slots"""
+    sums = np.concatenate(([0], np.cumsum(values)))
+    lagged = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    return sums[1:] - sums[lagged]
+
+
+def slope_per_day(values: np.ndarray) -> Optional[float]:
+    """Least-squares slope of the non-missing values against their day index"""
+    present = ~np.isnan(values)
+    if present.sum() < 2:
+        return None
+    x = np.flatnonzero(present).astype(float)
+    y = values[present]
+    x -= x.mean()
+    denominator = (x * x).sum()
+    return float((x * (y - y.mean())).sum() / denominator) if denominator else None
+
+
+def trends(series: ProgressSeries, window: int = WEEK, trend_days: int = 4 * WEEK,
+           meals_per_day: int = 3) -> ProgressTrends:
+    """
+    Trends at the end of the series: `window`-day moving averages of
+    weight and the other measurements, the weight slope over the last
+    `trend_days` days, workouts per week over `trend_days`, and meal
+    adherence (logged meals against `meals_per_day`, capped per day) over
+    the last `window` days. Rates only count the days since the first entry,
+    so a new user is not averaged over weeks before they started.
+    """
+    span = series.active_span()
+    recent = series.tail(min(trend_days, span))
+    averages = {}
+    for name, values in series.measurements.items():
+        average = rolling_mean(values[-window:], window)[-1] if len(values) else np.nan
+        if not np.isnan(average):
+            averages[name] = round(float(average), 2)
+
+    slope = slope_per_day(recent.measurements["weight"]) if "weight" in series.measurements else None
+    days = min(window, span)
+    week_meals = series.meals[-days:] if days else series.meals[:0]
+    adherence = float(np.minimum(week_meals, meals_per_day).sum() / (meals_per_day * days)) if days else 0.0
+    weeks = max(len(recent), WEEK) / WEEK
+    return ProgressTrends(
+        weight_avg=averages.get("weight"),
+        weight_change_per_week=None if slope is None else round(slope * WEEK, 2),
+        measurements_avg={name: value for name, value in averages.items() if name != "weight"},
+        workouts_per_week=round(float(recent.workouts.sum()) / weeks, 2),
+        meal_adherence=round(adherence, 3),
+        days=len(series)
+    )
@@ -0,0 +1,71 @@
+# health_wellness_agent2/tools/progress_trends.py
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+WEEK = 7
+
+
+class ProgressTrends(NamedTuple):
+    """Trend figures for the end of a series; None when there is not enough data"""
+    weight_avg: Optional[float]
+    weight_change_per_week: Optional[float]
+    measurements_avg: Dict[str, float]
+    workouts_per_week: float
+    meal_adherence: float
+    days: int
+
+
+def _slope(points: List[Tuple[int, float]]) -> Optional[float]:
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator if denominator else None
+
+
+def daily_trends(rows: Iterable[Tuple[int, str, str, int, Optional[float]]], start_day: int, end_day: int,
+                 window: int = WEEK, trend_days: int = 4 * WEEK, meals_per_day: int = 3) -> ProgressTrends:
+    """
+    progress_analytics.trends over (day, kind, name, count, last value)
+    rows in plain Python, for a few months of days. Serves progress
+    requests until NumPy has been imported in the background.
+    """
+    length = end_day - start_day + 1
+    workouts, meals = [0] * length, [0] * length
+    measurements: Dict[str, List[Optional[float]]] = {}
+    for day, kind, name, count, value in rows:
+        slot = day - start_day
+        if not 0 <= slot < length:
+            continue
+        if kind == "workout":
+            workouts[slot] += count
+        elif kind == "meal":
+            meals[slot] += count
+        elif kind == "measurement" and value is not None:
+            measurements.setdefault(name, [None] * length)[slot] = value
+
+    first = next((slot for slot in range(length) if workouts[slot] > 0 or meals[slot] > 0
+                  or any(values[slot] is not None for values in measurements.values())), length)
+    span = length - first
+    recent = min(trend_days, span)
+    averages = {}
+    for name, values in measurements.items():
+        present = [value for value in values[-window:] if value is not None]
+        if present:
+            averages[name] = round(sum(present) / len(present), 2)
+
+    slope = None
+    if "weight" in measurements:
+        weight = measurements["weight"][length - recent:]
+        slope = _slope([(x, value) for x, value in enumerate(weight) if value is not None])
+    days = min(window, span)
+    adherence = sum(min(count, meals_per_day) for count in meals[length - days:]) / (meals_per_day * days) if days else 0.0
+    weeks = max(recent, WEEK) / WEEK
+    return ProgressTrends(
+        weight_avg=averages.get("weight"),
+        weight_change_per_week=None if slope is None else round(slope * WEEK, 2),
+        measurements_avg={name: value for name, value in averages.items() if name != "weight"},
+        workouts_per_week=round(sum(workouts[length - recent:]) / weeks, 2),
+        meal_adherence=round(adherence, 3),
+        days=length
+    )
@@ -1,15 +1,65 @@
 # health_wellness_agent2/tools/scheduler.py
-from typing import Any
 import asyncio
+import re
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from checkin_scheduler import WEEKDAYS, CheckinRule, create_checkin_scheduler, describe
 from context import UserSessionContext
 
-async def schedule_checkin(context: UserSessionContext) -> str:
-    """Enhanced Monday check-in response with tips and change option"""
-    await asyncio.sleep(0)  # Maintains async compatibility
-    
+checkin_scheduler = create_checkin_scheduler()
+
+_TIME = re.compile(r"\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b")
+
+
+def parse_schedule(text: str) -> Tuple[Optional[str], Optional[int], Optional[Tuple[int, int]]]:
+    """
+    Read "/schedule biweekly", "schedule monthly on friday at 7pm" or
+    "remind me weekly at 18:30" into (cadence, weekday, (hour, minute));
+    parts the message does not mention are None.
+    """
+    text = text.lower()
+    cadence = None
+    if "biweekly" in text or "every other week" in text or "fortnight" in text:
+        cadence = "biweekly"
+    elif "monthly" in text:
+        cadence = "monthly"
+    elif "weekly" in text:
+        cadence = "weekly"
+    weekday = next((index for index, name in enumerate(WEEKDAYS) if name in text), None)
+
+    at = None
+    for match in _TIME.finditer(text):
+        hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        if not (meridiem or match.group(2) or match.group(0).startswith("at")):
+            continue  # a bare number is not a time
+        if meridiem == "pm" and hour < 12:
+            hour += 12
+        elif meridiem == "am" and hour == 12:
+            hour = 0
+        if hour < 24 and minute < 60:
+            at = (hour, minute)
+            break
+    return cadence, weekday, at
+
+
+async def schedule_checkin(context: UserSessionContext, input: str = "") -> str:
+    """Show the user's check-in schedule; cadence, weekday or time in the message change it"""
+    uid = str(context.uid)
+    cadence, weekday, at = parse_schedule(input)
+    rule = await asyncio.to_thread(checkin_scheduler.rule, uid)
+    if rule is None or cadence or weekday is not None or at:
+        current = rule or CheckinRule(uid)
+        hour, minute = at or (current.hour, current.minute)
+        rule = await asyncio.to_thread(
+            checkin_scheduler.set_rule, uid, cadence or current.cadence,
+            current.weekday if weekday is None else weekday, hour, minute
+        )
+    next_due = datetime.fromtimestamp(rule.next_due, timezone.utc).strftime("%A %d %B, %H:%M UTC")
+
     return (
-        "📅 Weekly Check-in Schedule\n\n"
-        "⏰ Every Monday at 9 AM\n\n"
+        f"📅 {rule.cadence.capitalize()} Check-in Schedule\n\n"
+        f"⏰ {describe(rule)}\n"
+        f"🔔 Next check-in: {next_due}\n\n"
         "✨ What to track each week:\n"
         "• Body measurements 📏\n"
         "• Progress photos 📸\n"
@@ -20,8 +70,6 @@ async def schedule_checkin(context: UserSessionContext) -> str:
         "2. Measure at the same time of day\n"
         "3. Wear similar clothing for photos\n"
         "4. Record notes about your week\n\n"
-        
-        "⚙️ Change with: /schedule weekly|biweekly|monthly\n\n"
 
-        "🔔 Set a recurring phone reminder!"
-    )
\ No newline at end of file
+        "⚙️ Change with: /schedule weekly|biweekly|monthly (optionally 'on friday at 7pm')"
+    )
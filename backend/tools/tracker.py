@@ -1,43 +1,177 @@
 # health_wellness_agent1/tools/tracker.py
-from typing import Any
-import asyncio
+import re
+import threading
+from typing import Optional, Tuple
+from activity_store import ProgressSummary, create_activity_store
 from context import UserSessionContext
+from tools.progress_trends import ProgressTrends, daily_trends
 
-async def track_progress(context: UserSessionContext) -> str:
-    """Track progress with colored rich text"""
-    await asyncio.sleep(0)
+activity_store = create_activity_store()
+TREND_DAYS = 90
+
+# tools.progress_analytics once imported: NumPy loads in a thread, never inside a request
+_analytics = None
+_analytics_loading: Optional[threading.Thread] = None
+
+_AMOUNT = re.compile(r"(\d+(?:\.\d+)?)\s*(kg|kgs|lbs?|pounds|km|mi|miles|min|mins|minutes|hours?|h|reps|steps|cal|kcal|cm|in|%)?(?![a-z])")
+_MEAL_WORDS = ("meal", "food", "breakfast", "lunch", "dinner", "snack", "ate ", "calories", "kcal")
+_MEASUREMENTS = ("weight", "waist", "body fat", "chest", "hips", "steps", "sleep", "water")
+_UNITS = {"kgs": "kg", "lb": "lbs", "pounds": "lbs", "miles": "mi", "mins": "min", "minutes": "min",
+          "hour": "h", "hours": "h", "kcal": "cal"}
+_METRIC = {"lbs": ("kg", 0.45359237), "in": ("cm", 2.54)}  # measurements are stored in one unit each
+_COMMANDS = ("log ", "track ")
+_QUESTION_WORDS = frozenset(("how", "what", "when", "why", "which", "should", "can", "could",
+                             "do", "does", "is", "are", "will", "would"))
+
+
+def parse_activity(text: str) -> Tuple[str, str, Optional[float], Optional[str]]:
+    """
+    Turn "log 5km run", "log weight 72kg" or "log lunch salad" into
+    (kind, name, value, unit); anything not a meal or a measurement is a workout.
+    Measurements in lbs or inches are converted to kg or cm, so that changes
+    and averages over entries typed in either unit add up.
+    """
+    text = text.lower().strip()
+    for prefix in ("log ", "track "):
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+            break
+    amount = _AMOUNT.search(text)
+    value = float(amount.group(1)) if amount else None
+    unit = _UNITS.get(amount.group(2), amount.group(2)) if amount else None
+    words = [word for word in _AMOUNT.sub(" ", text).split() if word not in ("my", "of", "a", "an")]
+    name = " ".join(words) or "activity"
+
+    measurement = next((m for m in _MEASUREMENTS if m in text), None)
+    if measurement and value is not None:
+        if unit in _METRIC:
+            unit, factor = _METRIC[unit]
+            value = round(value * factor, 2)
+        return "measurement", measurement, value, unit
+    if any(word in f"{text} " for word in _MEAL_WORDS):
+        return "meal", name, value, unit
+    return "workout", name, value, unit
+
+
+def activity_command(text: str) -> Optional[Tuple[str, str, Optional[float], Optional[str]]]:
+    """
+    parse_activity for an explicit command ("log 5km run", "track weight
+    72kg"), None for anything else: no leading log/track, a question, or a
+    measurement without both a value and a unit. Only commands are written.
+    """
+    text = text.lower().strip()
+    if not text.startswith(_COMMANDS) or "?" in text:
+        return None
+    words = text.split()
+    if len(words) < 2 or words[1] in _QUESTION_WORDS:
+        return None
+    kind, name, value, unit = parse_activity(text)
+    if kind == "measurement" and (value is None or unit is None):
+        return None
+    return kind, name, value, unit
+
+
+def load_analytics() -> None:
+    """Import NumPy and the trends module (warm-up runs this ahead of the first progress request)"""
+    global _analytics
+    import tools.progress_analytics as analytics
+
+    _analytics = analytics
+
+
+def _trends(rows: list, start_day: int, end_day: int) -> ProgressTrends:
+    """NumPy trends once loaded; until then the pure-Python ones, with the import started in a thread"""
+    global _analytics_loading
+    analytics = _analytics
+    if analytics is None:
+        if _analytics_loading is None:
+            _analytics_loading = threading.Thread(target=load_analytics, name="progress-analytics", daemon=True)
+            _analytics_loading.start()
+        return daily_trends(rows, start_day, end_day)
+    return analytics.trends(analytics.ProgressSeries.from_daily(rows, start_day, end_day))
+
+
+def _uid(context: UserSessionContext) -> str:
+    return str(context.uid)
+
+
+def _week_line(counts: dict) -> str:
+    return f"{counts['workout']} workouts, {counts['meal']} meals, {counts['measurement']} measurements"
+
+
+def _weight_line(summary: ProgressSummary) -> str:
+    if summary.weight is None:
+        return "• No weight logged yet ('log weight 72kg') ⚖️"
+    week = "" if summary.weight_change_week is None else f", {summary.weight_change_week:+.1f} this week"
+    return f"• Weight {summary.weight:g} kg ({summary.weight_change_total:+.1f} overall{week}) ⚖️"
+
+
+def _trend_lines(trend: ProgressTrends) -> str:
+    lines = [
+        f"• {trend.workouts_per_week:g} workouts/week (4-week average) 🏋️",
+        f"• Meal adherence this week: {trend.meal_adherence:.0%} 🍎"
+    ]
+    if trend.weight_avg is not None:
+        slope = "" if trend.weight_change_per_week is None else f", {trend.weight_change_per_week:+.2f}/week"
+        lines.append(f"• 7-day average weight {trend.weight_avg:g} kg{slope} ⚖️")
+    lines.extend(f"• 7-day average {name} {value:g} 📏" for name, value in sorted(trend.measurements_avg.items()))
+    return "\n".join(lines)
+
+
+async def track_progress(context: UserSessionContext, input: str = "") -> str:
+    """Tracking overview; a "track ..."/"log ..." measurement command ("track weight 72kg") records it too"""
+    command = activity_command(input)
+    if command is not None and command[0] == "measurement":
+        summary = await activity_store.log(_uid(context), *command)
+    else:
+        summary = await activity_store.progress(_uid(context))
     return (
         "\033[1;32m✅ Progress Tracking Active\033[0m\n\n"  # Green
         "\033[1;31m📊 Currently Monitoring:\033[0m\n"
-        "• Workout frequency \033[1;33m🏋️\033[0m\n"
-        "• Nutrition goals \033[1;33m🍎\033[0m\n"
-        "• Measurement trends \033[1;33m📏\033[0m\n\n"
+        f"• Workout frequency: {summary.totals['workout']} logged \033[1;33m🏋️\033[0m\n"
+        f"• Nutrition goals: {summary.totals['meal']} meals logged \033[1;33m🍎\033[0m\n"
+        f"• Measurement trends: {summary.totals['measurement']} logged \033[1;33m📏\033[0m\n\n"
         "\033[1;31m💡 Quick Tips:\033[0m\n"
-        "1. Use '\033[1;36m/log workout\033[0m' after exercise\n"
-        "2. Track meals with '\033[1;36m/log food\033[0m'\n"
-        "3. Review weekly with '\033[1;36m/progress\033[0m'\n\n"
-        "\033[1;35m🔔 Next automatic save: Tonight at 8 PM\033[0m"
+        "1. Use '\033[1;36mlog workout\033[0m' after exercise\n"
+        "2. Track meals with '\033[1;36mlog lunch ...\033[0m'\n"
+        "3. Review weekly with '\033[1;36mprogress\033[0m'"
     )
 
-async def log_activity(context: UserSessionContext) -> str:
-    """Log activity with colored confirmation"""
-    await asyncio.sleep(0)
+
+async def log_activity(context: UserSessionContext, input: str = "") -> str:
+    """Record the activity of a "log ..." command and confirm it with the current streak"""
+    command = activity_command(input)
+    if command is None:  # a question or an incomplete measurement: nothing is written
+        return await track_progress(context, input)
+    kind, name, value, unit = command
+    summary = await activity_store.log(_uid(context), kind, name, value, unit)
+    context.update_progress(f"logged {kind}: {name}")
+    amount = "" if value is None else f" ({value:g}{unit or ''})"
     return (
         "\033[1;32m📝 Activity Logged Successfully!\033[0m\n\n"  # Green
-        "Your \033[1;31mconsistency streak: 7 days 🔥\033[0m\n\n"  # Red
-        "\033[1;34m⚙️ Manage tracking: /tracking_settings\033[0m\n"  # Blue
-        "\033[1;34m📅 View history: /progress_history\033[0m"  # Blue
+        f"{kind.capitalize()}: {name}{amount}\n"
+        f"Your \033[1;31mconsistency streak: {summary.streak} day{'s' if summary.streak != 1 else ''} 🔥\033[0m\n\n"  # Red
+        f"\033[1;34m📅 This week: {_week_line(summary.this_week)}\033[0m"  # Blue
     )
 
+
 async def search_progress(context: UserSessionContext) -> str:
-    """Simple progress search response"""
-    await asyncio.sleep(0)
+    """Progress summary from the user's running aggregates (no history scan)"""
+    summary = await activity_store.progress(_uid(context))
+    if not summary.total:
+        return (
+            "🔍 Your Progress Summary:\n\n"
+            "Nothing logged yet. Try 'log 30 min run', 'log lunch salad' or 'log weight 72kg' 📝"
+        )
+    start_day, end_day, rows = await activity_store.recent_days(_uid(context), TREND_DAYS)
+    trend = _trends(rows, start_day, end_day)
     return (
         "🔍 Your Progress Summary:\n\n"
-        "📅 Last 7 Days:\n"
-        "• 5 workouts logged 🏋️✓\n"
-        "• 90% nutrition goals met 🍎\n"
-        "• 2.1kg progress ⚖️\n\n"
-        "📈 Current streak: 12 days\n\n"
-        "⚙️ View details: /progress_detail"
-    )
\ No newline at end of file
+        "📅 This Week:\n"
+        f"• {summary.this_week['workout']} workouts logged 🏋️✓ (last week: {summary.last_week['workout']})\n"
+        f"• {summary.this_week['meal']} meals logged 🍎\n"
+        f"{_weight_line(summary)}\n\n"
+        f"📈 Current streak: {summary.streak} days (best: {summary.best_streak})\n"
+        f"🗓️ Active days: {summary.active_days}, {summary.total} entries in total\n\n"
+        f"📊 Trends:\n{_trend_lines(trend)}"
+    )
@@ -1,33 +1,32 @@
 # health_wellness_agent2/tools/workout_recommender.py
 import asyncio
+from typing import Optional
 from context import UserSessionContext
+from plan_catalog import catalog
+from response_cache import ResponseTable
 
-async def recommend_workout(input: str, context) -> str:
+WORKOUT_PLANS = catalog.table("workouts")
+
+def _render_workout_plan(level: str, workouts) -> str:
+    return f"🏋️ **{level.capitalize()} Workout Plan**:\n\n" + "\n".join(workouts)
+
+# Rendered once at import; rebuilt automatically when the catalog reloads WORKOUT_PLANS
+WORKOUT_RESPONSES = ResponseTable(WORKOUT_PLANS, _render_workout_plan)
+
+def identify_workout_level(input: str) -> str:
+    """Identify experience level from message (a term lookup in the plan index)"""
+    from tools.plan_search import current_index
+    return current_index().key_in("workouts", input) or "unknown"
+
+async def recommend_workout(input: str, context, level: Optional[str] = None) -> str:
     await asyncio.sleep(0)  # Makes it truly async
 
-    workout_plans = {
-        "beginner": [
-            "🏋️ **Strength**: Bodyweight squats (3x10), Wall push-ups (3x8)",
-            "🧘 **Flexibility**: Daily stretching (10 mins)",
-            "🚶 **Cardio**: Brisk walking 20 mins (3x/week)"
-        ],
-        "intermediate": [
-            "🏋️ **Strength**: Dumbbell rows (3x12), Lunges (3x10/side)",
-            "🤸 **Mobility**: Dynamic stretches (15 mins)",
-            "🏃 **Cardio**: Jogging 30 mins (3x/week)"
-        ],
-        "advanced": [
-            "🏋️ **Strength**: Deadlifts (4x8), Pull-ups (3x max reps)",
-            "🧗 **Plyometrics**: Box jumps (3x10), Burpees (3x15)",
-            "⚡ **HIIT**: 30 sec sprint/90 sec walk (8 rounds)"
-        ]
-    }
-
-    input_lower = input.lower()
-    for level in workout_plans:
-        if level in input_lower:
-            workouts = "\n".join(workout_plans[level])
-            return f"🏋️ **{level.capitalize()} Workout Plan**:\n\n{workouts}"
+    if level is None:
+        level = identify_workout_level(input)
+
+    response = WORKOUT_RESPONSES.get(level)
+    if response is not None:
+        return response
 
     # Fallback message
     return (